@@ -139,6 +139,46 @@ TEST = {
     'CREATE_DB': True,
 }
 
+# Cache configuration: local memory by default so no Redis is needed
+# Set CACHE_BACKEND to django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.db.DatabaseCache (with CACHE_LOCATION / SUGGESTION_CACHE_LOCATION
+# pointing at a directory or table) to share caches between worker processes. The version
+# counters behind the suggestion cache and ingredient ETags live there too, so local memory
+# is only right for a single process; see recipes/checks.py
+CACHE_BACKEND = os.getenv(
+    "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+# Worker processes the server runs, as read by gunicorn
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("CACHE_LOCATION", "basilandbyte-default"),
+    },
+    # Per-user suggest_recipes results, see recipes/caching.py
+    "suggestions": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": os.getenv("SUGGESTION_CACHE_LOCATION", "basilandbyte-suggestions"),
+        "TIMEOUT": int(os.getenv("SUGGESTION_CACHE_TIMEOUT", "900")),  # Seconds
+        "OPTIONS": {
+            # Oldest entries are culled once this many are stored
+            "MAX_ENTRIES": int(os.getenv("SUGGESTION_CACHE_MAX_ENTRIES", "5000")),
+        },
+    },
+}
+
+# Pantry coverage of other users is rescored after recipe and ingredient changes on a
+# background thread, see recipes/coverage.py. False rescores right after the commit instead
+COVERAGE_REFRESH_BUFFERED = os.getenv("COVERAGE_REFRESH_BUFFERED", "True").lower() == "true"
+
+# Recipe suggestion backend: "index" (inverted ingredient index) or "matrix"
+# (sparse recipe x ingredient matrix, needs numpy and scipy installed)
+SUGGESTION_BACKEND = os.getenv("SUGGESTION_BACKEND", "index")
+
+# Trigram similarity (0-1) an ingredient name needs to stand in for another one
+# 0.3 lets "olive oil" match "oil" but not "boil"; names must also share whole words,
+# see recipes.suggestions.words_contained
+INGREDIENT_MATCH_THRESHOLD = float(os.getenv("INGREDIENT_MATCH_THRESHOLD", "0.3"))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -169,7 +209,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django Rest Framework Authentication Settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication plus an in-process user cache, see recipes/authentication.py
+        "recipes.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         # Allows public access unless restricted in views
@@ -177,6 +218,21 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Recipe list pagination (?limit= / ?cursor= on the recipes endpoint)
+RECIPE_PAGE_SIZE = int(os.getenv("RECIPE_PAGE_SIZE", "20"))
+RECIPE_PAGE_SIZE_MAX = int(os.getenv("RECIPE_PAGE_SIZE_MAX", "100"))
+
+# Default page size for recipe suggestions requested with ?limit= / ?cursor=
+SUGGESTION_PAGE_SIZE = int(os.getenv("SUGGESTION_PAGE_SIZE", "20"))
+
+# Number of similar recipes returned when ?limit= is not given
+SIMILAR_RECIPES_DEFAULT = int(os.getenv("SIMILAR_RECIPES_DEFAULT", "10"))
+
+# Days deletes are remembered for delta sync; older sync tokens get a full resync
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+# Rows changed this long before a sync token are sent again, so late-committing writes are not missed
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+
 # JWT Authentication Configuration
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
@@ -184,8 +240,29 @@ SIMPLE_JWT = {
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "recipes.authentication.ClaimsTokenObtainPairSerializer",
 }
 
+# Users kept in memory per process by the authentication class, and for how many seconds
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "300"))
+
+# Login events are queued and bulk-written, see recipes/login_events.py
+# False writes each event in the request instead
+LOGIN_EVENT_BUFFERED = os.getenv("LOGIN_EVENT_BUFFERED", "True").lower() == "true"
+LOGIN_EVENT_QUEUE_SIZE = int(os.getenv("LOGIN_EVENT_QUEUE_SIZE", "10000"))
+LOGIN_EVENT_BATCH_SIZE = int(os.getenv("LOGIN_EVENT_BATCH_SIZE", "500"))
+LOGIN_EVENT_FLUSH_SECONDS = float(os.getenv("LOGIN_EVENT_FLUSH_SECONDS", "2"))
+# Days raw login events are kept before rollup_login_events turns them into daily counts
+LOGIN_EVENT_RETENTION_DAYS = int(os.getenv("LOGIN_EVENT_RETENTION_DAYS", "90"))
+
+# User data exports: rows fetched per query chunk, and where background exports are written
+# Not under MEDIA_ROOT, so the files are only reachable through the authenticated download view
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+EXPORT_ROOT = os.getenv("EXPORT_ROOT", str(BASE_DIR / "exports"))
+# Seconds after which a background export still pending is taken to have died with its worker
+EXPORT_JOB_TIMEOUT = int(os.getenv("EXPORT_JOB_TIMEOUT", "3600"))
+
 # Server-Side Timeout Configuration
 SOCKET_TIMEOUT = 30  # Matches client timeout of 30000ms
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, LoginEvent, UserDeletion, UserInventory, ShoppingListItem
+from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, LoginEvent, LoginEventDailyCount, UserDeletion, UserInventory, ShoppingListItem
 
 # Register your models here.
 
@@ -9,6 +9,7 @@ admin.site.register(RecipeIngredient)
 admin.site.register(FoodGroup)
 admin.site.register(SavedItem)
 admin.site.register(LoginEvent)
+admin.site.register(LoginEventDailyCount)
 admin.site.register(UserDeletion)
 admin.site.register(UserInventory)
 admin.site.register(ShoppingListItem)
\ No newline at end of file
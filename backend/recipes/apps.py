@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        # Register signal handlers and system checks
+        from . import checks, signals  # noqa: F401
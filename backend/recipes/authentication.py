@@ -0,0 +1,115 @@
+"""
+JWT authentication that skips the User query on most requests.
+
+Tokens carry the user's username as a signed claim next to the user id.
+Authenticated users are kept in a small per-process LRU cache with a TTL, so a request
+whose user was seen recently costs no query before the view runs. Each entry remembers
+the user's auth version from the shared cache (see caching.py), which signals.py bumps
+whenever the user is saved or deleted. Every request compares it with the current
+version, so deactivation by request_account_deletion is seen by all processes at once.
+
+Cached users can be slightly behind the database, so views that write to request.user
+save only the fields they change.
+
+The username claim must match the user found for the id, so a token cannot authenticate
+a different user who later got the same id, which SQLite can hand out again after deletes.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .caching import get_auth_version
+
+
+def refresh_token_for_user(user):
+    """Refresh token with the claims CachedJWTAuthentication reads; access tokens copy them."""
+    token = RefreshToken.for_user(user)
+    token["username"] = user.username
+    return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """api/token/ issues the same claims as the login endpoint."""
+
+    @classmethod
+    def get_token(cls, user):
+        return refresh_token_for_user(user)
+
+
+class UserCache:
+    """
+    Thread-safe LRU of User field values by id. An entry is valid for ttl seconds and only
+    while the user's auth version is the one it was stored with.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is None:
+                return None
+            expires, entry_version, field_names, values = entry
+            if expires < time.monotonic() or entry_version != version:
+                del self.entries[user_id]
+                return None
+            self.entries.move_to_end(user_id)
+        # A fresh instance per request, so a view changing request.user cannot change the cached copy
+        return User.from_db('default', field_names, values)
+
+    def set(self, user, version):
+        field_names = [field.attname for field in User._meta.concrete_fields]
+        values = [getattr(user, name) for name in field_names]
+        with self.lock:
+            self.entries[user.pk] = (time.monotonic() + self.ttl, version, field_names, values)
+            self.entries.move_to_end(user.pk)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that answers from the token claims and the user cache when it can."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        # Read before the user is loaded, so a change committed meanwhile outdates the entry
+        version = get_auth_version(user_id)
+        user = user_cache.get(user_id, version)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user, version)
+        elif not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        # Tokens issued before the claims existed only carry the id
+        username = validated_token.get("username")
+        if username is not None and username != user.username:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return user
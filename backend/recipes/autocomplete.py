@@ -0,0 +1,92 @@
+"""
+In-process prefix index for ingredient autocomplete.
+
+Names are kept in sorted lists, so a prefix search is a binary search to the first
+candidate followed by a short forward scan. Whole names are searched first ("oli" ->
+"Olive Oil"), then the later words of names ("oil" -> "Olive Oil").
+"""
+import bisect
+import logging
+
+from .caching import CatalogStructure, get_catalog_version
+from .models import Ingredient, canonical_ingredient_name
+
+logger = logging.getLogger(__name__)
+
+# Largest number of results a search returns
+MAX_RESULTS = 50
+
+
+class IngredientPrefixIndex(CatalogStructure):
+    """Sorted (key, id) lists over canonical ingredient names, refreshed from the catalog version."""
+
+    def __init__(self):
+        super().__init__()
+        self.names = []
+        self.words = []
+        self.display_names = {}
+
+    def load_all(self):
+        self.names = []
+        self.words = []
+        self.display_names = {}
+        self.load_ingredients(None)
+        self.names.sort()
+        self.words.sort()
+        logger.info(f"Built ingredient prefix index: {len(self.display_names)} ingredients")
+
+    def apply_changes(self, recipe_ids, ingredient_ids):
+        if not ingredient_ids:
+            return
+        for ingredient_id in ingredient_ids:
+            self.display_names.pop(ingredient_id, None)
+        ingredient_ids = set(ingredient_ids)
+        self.names = [entry for entry in self.names if entry[1] not in ingredient_ids]
+        self.words = [entry for entry in self.words if entry[1] not in ingredient_ids]
+        self.load_ingredients(ingredient_ids)
+        self.names.sort()
+        self.words.sort()
+
+    def load_ingredients(self, ingredient_ids):
+        queryset = Ingredient.objects.all()
+        if ingredient_ids is not None:
+            queryset = queryset.filter(id__in=ingredient_ids)
+        for ingredient_id, name, key in queryset.values_list('id', 'ingredient_name', 'canonical_name'):
+            self.display_names[ingredient_id] = name
+            self.names.append((key, ingredient_id))
+            words = key.split()
+            for position in range(1, len(words)):
+                self.words.append((" ".join(words[position:]), ingredient_id))
+
+    def search(self, query, limit):
+        """Return up to limit (id, ingredient_name) pairs whose name or a later word starts with query."""
+        prefix = canonical_ingredient_name(query)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        with self.lock:
+            for entries in (self.names, self.words):
+                position = bisect.bisect_left(entries, (prefix,))
+                while position < len(entries) and len(results) < limit:
+                    key, ingredient_id = entries[position]
+                    if not key.startswith(prefix):
+                        break
+                    if ingredient_id not in seen:
+                        seen.add(ingredient_id)
+                        results.append((ingredient_id, self.display_names[ingredient_id]))
+                    position += 1
+        return results
+
+
+_prefix_index = IngredientPrefixIndex()
+
+
+def get_prefix_index():
+    """Return the shared prefix index, refreshed if the catalog changed since it was built."""
+    _prefix_index.refresh(get_catalog_version())
+    return _prefix_index
+
+
+def mark_prefix_index_changed(recipe_ids, ingredient_ids, version):
+    _prefix_index.mark_changed(recipe_ids, ingredient_ids, version)
@@ -0,0 +1,150 @@
+"""
+Version counters, the per-user suggestion cache and ETag checks.
+
+Cached values are never deleted on writes. Instead the signals bump a version number
+that is part of the cache key, so stale entries are simply never read again and age out
+through the cache's TTL and MAX_ENTRIES culling. Versions are bumped once the write
+commits, so no request reads old data under a new version.
+Use a shared backend (file or database cache) when running several worker processes or
+writing from management commands; the recipes.W001 check warns otherwise.
+"""
+import threading
+
+from django.core.cache import cache, caches
+from django.utils.http import parse_etags
+
+# Bumped whenever recipes, recipe ingredients or ingredients change
+CATALOG_VERSION_KEY = "recipes:catalog_version"
+# Bumped whenever ingredients change, part of the ingredient list ETag
+INGREDIENT_VERSION_KEY = "recipes:ingredient_version"
+# Bumped whenever one user's inventory changes
+INVENTORY_VERSION_KEY = "recipes:inventory_version:{user_id}"
+# Bumped whenever a user is saved or deleted, checked against the per-process user cache
+AUTH_VERSION_KEY = "recipes:auth_version:{user_id}"
+
+
+def get_version(key):
+    """Return the current version for key, seeding it if the cache has none."""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def bump_version(key):
+    """Increment the version for key and return the new value."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key was never set or has been evicted
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate everything derived from the recipe catalog."""
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def get_ingredient_version():
+    return get_version(INGREDIENT_VERSION_KEY)
+
+
+def bump_ingredient_version():
+    bump_version(INGREDIENT_VERSION_KEY)
+
+
+def get_inventory_version(user_id):
+    return get_version(INVENTORY_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_inventory_version(user_id):
+    """Invalidate everything derived from one user's inventory."""
+    bump_version(INVENTORY_VERSION_KEY.format(user_id=user_id))
+
+
+def get_auth_version(user_id):
+    return get_version(AUTH_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_auth_version(user_id):
+    """Invalidate a user's cached copy in every process sharing the cache."""
+    bump_version(AUTH_VERSION_KEY.format(user_id=user_id))
+
+
+def suggestion_cache_key(user_id):
+    return "suggestions:{}:{}:{}".format(
+        user_id, get_inventory_version(user_id), get_catalog_version())
+
+
+def get_cached_suggestions(key):
+    return caches['suggestions'].get(key)
+
+
+def set_cached_suggestions(key, payload):
+    # Stored under the key computed before the work started, so a write that
+    # lands mid-request leaves this entry under an already outdated version
+    caches['suggestions'].set(key, payload)
+
+
+def etag_matches(request, etag):
+    """True if the request's If-None-Match lists etag, so a 304 can be sent."""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in parse_etags(header)
+
+
+class CatalogStructure:
+    """
+    Base for in-process structures derived from the catalog (ingredient index, recipe matrix).
+
+    Catalog signals in this process record which recipes and ingredients each version bump
+    touched. If every version since the last refresh came from this process only those are
+    reloaded through apply_changes(); otherwise another process wrote to the catalog and the
+    structure is reloaded in full through load_all().
+
+    Refreshes update the structure in place while holding self.lock, so subclasses take the
+    lock in their read methods too: the coverage refresher thread refreshes while requests read.
+    """
+
+    def __init__(self):
+        self.version = None
+        # catalog version -> (recipe ids, ingredient ids) changed by this process
+        self.pending = {}
+        self.lock = threading.RLock()
+
+    def mark_changed(self, recipe_ids, ingredient_ids, version):
+        if self.version is None:
+            return  # Nothing loaded yet, the first refresh loads everything anyway
+        with self.lock:
+            recipes, ingredients = self.pending.setdefault(version, (set(), set()))
+            recipes.update(recipe_ids)
+            ingredients.update(ingredient_ids)
+
+    def refresh(self, version):
+        with self.lock:
+            if self.version == version:
+                return
+            changed = range(self.version + 1, version + 1) if isinstance(self.version, int) else ()
+            if changed and all(v in self.pending for v in changed):
+                recipe_ids, ingredient_ids = set(), set()
+                for v in changed:
+                    recipe_ids |= self.pending[v][0]
+                    ingredient_ids |= self.pending[v][1]
+                self.apply_changes(recipe_ids, ingredient_ids)
+            else:
+                self.load_all()
+            self.pending = {v: ids for v, ids in self.pending.items() if v > version}
+            self.version = version
+
+    def load_all(self):
+        raise NotImplementedError
+
+    def apply_changes(self, recipe_ids, ingredient_ids):
+        raise NotImplementedError
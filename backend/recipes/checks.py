@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCMEM_BACKEND = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Version counters in a per-process cache are never seen by the other processes."""
+    if settings.CACHES["default"]["BACKEND"] != LOCMEM_BACKEND or settings.WEB_CONCURRENCY <= 1:
+        return []
+    return [Warning(
+        f"The cache uses local memory but WEB_CONCURRENCY is {settings.WEB_CONCURRENCY}.",
+        hint="Catalog and inventory version bumps stay in the worker that made them, so other workers "
+             "serve stale suggestions and ingredient ETags. Set CACHE_BACKEND to a shared backend "
+             "such as django.core.cache.backends.db.DatabaseCache and run createcachetable.",
+        id="recipes.W001",
+    )]
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_deploy(app_configs, **kwargs):
+    """Management commands run in their own process, so a deployment needs a shared cache."""
+    if settings.CACHES["default"]["BACKEND"] != LOCMEM_BACKEND:
+        return []
+    return [Warning(
+        "The default cache uses local memory.",
+        hint="Changes made by management commands such as delete_old_users are not seen by the "
+             "web process until cached entries expire. Set CACHE_BACKEND to a shared backend.",
+        id="recipes.W002",
+    )]
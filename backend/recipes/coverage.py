@@ -0,0 +1,254 @@
+"""
+Materialized pantry coverage: one PantryCoverage row per (user, suggestible recipe).
+
+Rows are rewritten from the signals when a user's inventory or a recipe's ingredients
+change, touching only the recipes that share an ingredient with the change. Reading
+suggestions is then one ordered range scan over the user's rows instead of rescoring
+the catalog. Users get their rows built on first read, so existing accounts need no backfill.
+
+An inventory change only rescores its own user and runs in the request. A recipe or
+ingredient change can reach every user, so that fan-out is recorded as a
+PendingCoverageRefresh row and run by coverage_refresher on a background thread once the
+change commits.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+
+from .caching import bump_inventory_version
+from .models import PantryCoverage, PantryCoverageState, PendingCoverageRefresh, UserInventory
+from .suggestions import PantryMatcher, get_ingredient_index, recipes_for_scoring
+
+logger = logging.getLogger(__name__)
+
+# Users rescored per transaction when a catalog change fans out
+USERS_PER_TRANSACTION = 100
+
+# Can make first, then fewest missing, then best covered, then soonest expiring
+RANK_ORDER = (
+    F('can_make').desc(),
+    F('missing_count').asc(),
+    F('coverage').desc(),
+    F('expires_at').asc(nulls_last=True),
+    F('recipe_id').asc(),
+)
+
+
+def available_inventory(user_ids):
+    return UserInventory.objects.filter(
+        user_id__in=user_ids, is_available=True).select_related('ingredient')
+
+
+def coverage_rows(user_id, matcher, recipes):
+    rows = []
+    for recipe in recipes:
+        score = matcher.score(recipe)
+        if score is None:
+            continue
+        rows.append(PantryCoverage(
+            user_id=user_id,
+            recipe=recipe,
+            can_make=score["can_make"],
+            matched_count=score["matched_count"],
+            missing_count=len(score["missing_ingredients"]),
+            coverage=score["coverage"],
+            expires_at=score["expires_at"],
+            missing_ingredients=score["missing_ingredients"]
+        ))
+    return rows
+
+
+def lock_user_coverage(user_ids):
+    """
+    Lock the users' PantryCoverageState rows until the transaction ends and return the ids
+    of those who have one. The request thread and the refresher both rewrite a user's rows,
+    and without the lock they can insert the same (user, recipe) pair at once.
+    """
+    return set(PantryCoverageState.objects.select_for_update().filter(
+        user_id__in=user_ids).order_by('user_id').values_list('user_id', flat=True))
+
+
+def refresh_user_coverage(user_id, recipe_ids=None):
+    """
+    Rewrite one user's rows, for every recipe or only for recipe_ids.
+    A full rewrite builds the user's rows; a partial one only touches users already built.
+    """
+    with transaction.atomic():
+        if recipe_ids is None:
+            state, _ = PantryCoverageState.objects.get_or_create(user_id=user_id)
+        if not lock_user_coverage((user_id,)):
+            return
+        # Scored under the lock, so a rewrite that committed first is not undone with older data
+        index = get_ingredient_index()
+        matcher = PantryMatcher(available_inventory((user_id,)), index)
+        candidates = matcher.candidate_recipe_ids()
+        if recipe_ids is not None:
+            candidates &= set(recipe_ids)
+
+        stale = PantryCoverage.objects.filter(user_id=user_id)
+        if recipe_ids is not None:
+            stale = stale.filter(recipe_id__in=recipe_ids)
+        stale.delete()
+        PantryCoverage.objects.bulk_create(
+            coverage_rows(user_id, matcher, recipes_for_scoring(candidates)))
+        if recipe_ids is None:
+            state.save()
+
+
+def refresh_inventory_coverage(user_id, ingredient_ids):
+    """Rescore the recipes a change to these pantry ingredients can affect, for users whose rows are built."""
+    index = get_ingredient_index()
+    matching = set()
+    for ingredient_id in ingredient_ids:
+        matching |= index.matching_ingredients(ingredient_id)
+    refresh_user_coverage(user_id, index.recipes_using(matching))
+
+
+def refresh_recipe_coverage(recipe_ids):
+    """Rescore recipes for every built user who has them suggested or stocks one of their ingredients."""
+    recipe_ids = set(recipe_ids)
+    index = get_ingredient_index()
+    ingredient_ids = set()
+    for ingredient_id in index.ingredients_used_by(recipe_ids):
+        ingredient_ids |= index.matching_ingredients(ingredient_id)
+
+    built = PantryCoverageState.objects.values('user_id')
+    user_ids = set(PantryCoverage.objects.filter(
+        recipe_id__in=recipe_ids, user_id__in=built).values_list('user_id', flat=True))
+    user_ids.update(UserInventory.objects.filter(
+        ingredient_id__in=ingredient_ids, is_available=True, user_id__in=built).values_list('user_id', flat=True))
+    if not user_ids:
+        return user_ids
+
+    recipes = list(recipes_for_scoring(recipe_ids))
+    ordered = sorted(user_ids)
+    # Users are locked a batch at a time, so their own pantry saves never wait for the whole fan-out
+    for start in range(0, len(ordered), USERS_PER_TRANSACTION):
+        with transaction.atomic():
+            batch = lock_user_coverage(ordered[start:start + USERS_PER_TRANSACTION])
+            inventories = {}
+            for item in available_inventory(batch):
+                inventories.setdefault(item.user_id, []).append(item)
+            rows = []
+            for user_id in batch:
+                matcher = PantryMatcher(inventories.get(user_id, ()), index)
+                rows.extend(coverage_rows(user_id, matcher, recipes))
+            PantryCoverage.objects.filter(recipe_id__in=recipe_ids, user_id__in=batch).delete()
+            PantryCoverage.objects.bulk_create(rows)
+    logger.debug(f"Refreshed pantry coverage of {len(recipe_ids)} recipes for {len(user_ids)} users")
+    return user_ids
+
+
+def ensure_user_coverage(user):
+    """Build the user's rows on first use; afterwards the signals keep them current."""
+    coverage_refresher.resume()
+    if not PantryCoverageState.objects.filter(user=user).exists():
+        refresh_user_coverage(user.id)
+
+
+def refresh_ingredient_coverage(ingredient_id):
+    """
+    Rescore after an ingredient is renamed, which can change what it matches:
+    recipes that use it, and users who stock it. Returns the ids of the users rescored.
+    """
+    index = get_ingredient_index()
+    refreshed = refresh_recipe_coverage(index.recipes_using(index.matching_ingredients(ingredient_id)))
+    user_ids = set(UserInventory.objects.filter(
+        ingredient_id=ingredient_id, user__pantry_coverage_state__isnull=False).values_list('user_id', flat=True))
+    for user_id in user_ids:
+        refresh_user_coverage(user_id)
+    return refreshed | user_ids
+
+
+def refresh_catalog_coverage(recipe_ids, ingredient_ids):
+    """Rescore after recipe and ingredient changes, then drop the rescored users' cached suggestions."""
+    user_ids = refresh_recipe_coverage(recipe_ids) if recipe_ids else set()
+    for ingredient_id in ingredient_ids:
+        user_ids |= refresh_ingredient_coverage(ingredient_id)
+    # Their suggestions may have been cached from the old rows after the catalog version moved
+    for user_id in user_ids:
+        bump_inventory_version(user_id)
+
+
+class CoverageRefresher:
+    """
+    Runs the coverage fan-out of catalog changes on a daemon thread. Each change is stored as
+    a PendingCoverageRefresh row in the transaction that makes it, and a refresh rescores and
+    deletes every row it finds, so a burst of recipe saves rescores each recipe once and the
+    changes a stopped worker left behind are picked up by the next refresh in any process.
+    """
+
+    def __init__(self):
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.resumed = False
+
+    def schedule(self, recipe_ids=(), ingredient_ids=()):
+        """Record a change and rescore once the current transaction commits, in the background if buffering is on."""
+        PendingCoverageRefresh.objects.create(recipe_ids=sorted(recipe_ids), ingredient_ids=sorted(ingredient_ids))
+        transaction.on_commit(self.wake if settings.COVERAGE_REFRESH_BUFFERED else self.refresh)
+
+    def resume(self):
+        """Rescore changes left behind by an earlier process, checked once per process."""
+        if self.resumed:
+            return
+        self.resumed = True
+        if not PendingCoverageRefresh.objects.exists():
+            return
+        if settings.COVERAGE_REFRESH_BUFFERED:
+            self.wake()
+        else:
+            self.refresh()
+
+    def wake(self):
+        self.wakeup.set()
+        self.start()
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="coverage-refresher", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            try:
+                self.refresh()
+            except Exception:
+                # The rows stay, the next wake-up retries them
+                logger.exception("Failed to refresh pantry coverage")
+            finally:
+                close_old_connections()
+
+    def refresh(self):
+        """Rescore every pending change and delete its row. Returns False if nothing was pending."""
+        pending = list(PendingCoverageRefresh.objects.values_list('id', 'recipe_ids', 'ingredient_ids'))
+        if not pending:
+            return False
+        recipe_ids, ingredient_ids = set(), set()
+        for _, recipes, ingredients in pending:
+            recipe_ids.update(recipes)
+            ingredient_ids.update(ingredients)
+        refresh_catalog_coverage(recipe_ids, ingredient_ids)
+        PendingCoverageRefresh.objects.filter(id__in=[row[0] for row in pending]).delete()
+        return True
+
+    def stop(self):
+        """Run what is still pending if this process started refreshing, called at exit."""
+        if self.thread is None:
+            return
+        try:
+            self.refresh()
+        finally:
+            connection.close()
+
+
+coverage_refresher = CoverageRefresher()
+atexit.register(coverage_refresher.stop)
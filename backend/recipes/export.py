@@ -0,0 +1,153 @@
+"""
+Full user data export, streamed.
+
+Each section is read with a values() query walked by .iterator(), so rows are fetched in
+EXPORT_CHUNK_SIZE chunks and encoded one at a time; memory stays flat however large the
+account is. The same generators feed the streamed download and the background job, which
+writes the file to EXPORT_ROOT for the user to fetch later.
+
+JSON keeps the profile fields at the top level, as the export always had, followed by one
+list per section. NDJSON writes one {"section": ..., "data": ...} object per line.
+"""
+import logging
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import (
+    LoginEvent, LoginEventDailyCount, Recipe, RecipeIngredient, SavedItem, ShoppingListItem, UserExport,
+    UserInventory, WeeklyPlan
+)
+
+logger = logging.getLogger(__name__)
+
+export_storage = FileSystemStorage(location=settings.EXPORT_ROOT)
+
+_encoder = DjangoJSONEncoder()
+
+
+def profile(user):
+    return {
+        "username": user.username,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "date_joined": user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def sections(user):
+    """
+    Section name -> values() queryset of the user's rows, in export order. Related names
+    are aliased so the file keeps stable field names rather than ORM lookup paths.
+    """
+    return {
+        "login_attempts": LoginEvent.objects.filter(username=user.username).order_by(
+            '-timestamp').values('timestamp', 'outcome', 'source'),
+        "login_history": LoginEventDailyCount.objects.filter(username=user.username).values(
+            'date', 'outcome', 'source', 'count'),
+        "recipes": Recipe.objects.filter(user=user).order_by('id').values(
+            'id', 'recipe_name', 'description', 'instructions', 'image_url', 'created_at', 'updated_at'),
+        "ingredients": RecipeIngredient.objects.filter(recipe__user=user).order_by('recipe_id', 'id').values(
+            'recipe_id', 'quantity', 'unit', ingredient_name=F('ingredient__ingredient_name')),
+        "saved_items": SavedItem.objects.filter(user=user).order_by('id').values(
+            'id', 'recipe_id', 'saved_at', recipe_name=F('recipe__recipe_name')),
+        "weekly_plan": WeeklyPlan.objects.filter(user=user).order_by('id').values(
+            'id', 'day', 'meal_type', 'recipe_id', 'created_at', recipe_name=F('recipe__recipe_name')),
+        "inventory": UserInventory.objects.filter(user=user).order_by('id').values(
+            'id', 'quantity_display', 'quantity', 'unit', 'storage_location', 'added_at', 'expires_at',
+            'is_available', ingredient_name=F('ingredient__ingredient_name')),
+        "shopping_list": ShoppingListItem.objects.filter(user=user).order_by('id').values(
+            'id', 'quantity', 'unit', 'is_purchased', 'added_at', ingredient_name=F('ingredient__ingredient_name')),
+    }
+
+
+def section_rows(queryset):
+    return queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def iter_json(user):
+    """Yield the export as one JSON object, a row at a time."""
+    head = _encoder.encode(profile(user))
+    yield head[:-1]
+    for name, queryset in sections(user).items():
+        yield f', "{name}": ['
+        separator = "\n"
+        for row in section_rows(queryset):
+            yield separator + _encoder.encode(row)
+            separator = ",\n"
+        yield "]"
+    yield "}\n"
+
+
+def iter_ndjson(user):
+    """Yield the export as newline-delimited JSON, the profile first."""
+    yield _encoder.encode({"section": "profile", "data": profile(user)}) + "\n"
+    for name, queryset in sections(user).items():
+        for row in section_rows(queryset):
+            yield _encoder.encode({"section": name, "data": row}) + "\n"
+
+
+FORMATS = {
+    # format -> (generator, content type, file extension)
+    "json": (iter_json, "application/json", "json"),
+    "ndjson": (iter_ndjson, "application/x-ndjson", "ndjson"),
+}
+
+
+def start_export_job(user, output):
+    """
+    Record a background export and start it once the job row is committed. A job still
+    running is returned instead, and finished ones are removed, so each account keeps at
+    most one file. A job pending for longer than EXPORT_JOB_TIMEOUT lost its thread to a
+    restart or crash; it is marked failed and replaced.
+    """
+    now = timezone.now()
+    pending = UserExport.objects.filter(user=user, status=UserExport.PENDING)
+    pending.filter(created_at__lt=now - timedelta(seconds=settings.EXPORT_JOB_TIMEOUT)).update(
+        status=UserExport.FAILED, finished_at=now)
+    running = pending.first()
+    if running is not None:
+        return running
+    for job in UserExport.objects.filter(user=user):
+        job.delete()
+    job = UserExport.objects.create(user=user, output=output)
+    transaction.on_commit(lambda: threading.Thread(
+        target=_run_in_thread, args=(job.id,), name=f"user-export-{job.id}", daemon=True).start())
+    return job
+
+
+def _run_in_thread(job_id):
+    try:
+        run_export_job(job_id)
+    finally:
+        connection.close()
+
+
+def run_export_job(job_id):
+    """Write the export file for a job and mark it done or failed."""
+    job = UserExport.objects.select_related('user').get(id=job_id)
+    generate, _, extension = FORMATS[job.output]
+    file_name = f"{job.user_id}/{job.id}.{extension}"
+    path = export_storage.path(file_name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as export_file:
+            for chunk in generate(job.user):
+                export_file.write(chunk)
+        status, finished_name = UserExport.DONE, file_name
+    except Exception:
+        logger.exception(f"Export {job.id} for user {job.user_id} failed")
+        status, finished_name = UserExport.FAILED, ""
+    # Only a job still pending is finished; one given up on as stale may already be replaced
+    finished = UserExport.objects.filter(id=job.id, status=UserExport.PENDING).update(
+        status=status, file_name=finished_name, finished_at=timezone.now())
+    if (not finished or status == UserExport.FAILED) and os.path.exists(path):
+        os.remove(path)
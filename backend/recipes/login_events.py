@@ -0,0 +1,117 @@
+"""
+Buffered LoginEvent writes.
+
+log_login_event puts events on a bounded in-memory queue instead of inserting each one.
+A background thread writes them with bulk_create once LOGIN_EVENT_BATCH_SIZE are waiting
+or LOGIN_EVENT_FLUSH_SECONDS have passed, so a login storm costs one INSERT per batch
+rather than one per event. The view validates events before they are queued, and a batch
+that still fails is retried a row at a time so only the bad rows are lost. When the queue
+is full new events are dropped and counted, which keeps audit logging from competing with
+logins for the database. Whatever is still queued is written when the process exits.
+"""
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import LoginEvent
+
+logger = logging.getLogger(__name__)
+
+
+class LoginEventWriter:
+    """Bounded queue of unsaved LoginEvents, flushed in batches by a daemon thread."""
+
+    def __init__(self, max_queue, batch_size, flush_seconds):
+        self.events = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.dropped = 0
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def record(self, username, outcome, source='unknown'):
+        """Queue an event; returns False if the queue is full and the event was dropped."""
+        event = LoginEvent(username=username, outcome=outcome, source=source, timestamp=timezone.now())
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Login event queue full, {self.dropped} event(s) dropped so far")
+            return False
+        self.start()
+        if self.events.qsize() >= self.batch_size:
+            self.wake.set()
+        return True
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="login-event-writer", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while not self.stopping.is_set():
+            self.wake.wait(self.flush_seconds)
+            self.wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to write login events")
+            finally:
+                close_old_connections()
+        connection.close()
+
+    def flush(self):
+        """Write everything queued so far in batches of batch_size. Returns the number written."""
+        written = 0
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.events.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return written
+            written += self.write(batch)
+
+    def write(self, batch):
+        """Insert a batch in one statement, falling back to a row at a time if that fails."""
+        try:
+            with transaction.atomic():
+                LoginEvent.objects.bulk_create(batch)
+            return len(batch)
+        except DatabaseError:
+            logger.exception(f"Failed to write {len(batch)} login event(s) at once, retrying one by one")
+        written = 0
+        for event in batch:
+            try:
+                with transaction.atomic():
+                    event.save(force_insert=True)
+                written += 1
+            except DatabaseError:
+                logger.exception(f"Dropped login event for {event.username!r}")
+        return written
+
+    def stop(self):
+        """Stop the thread and write what is left, called at exit."""
+        self.stopping.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join(timeout=self.flush_seconds + 5)
+        written = self.flush()
+        if written:
+            logger.info(f"Wrote {written} queued login event(s) at shutdown")
+
+
+login_event_writer = LoginEventWriter(
+    settings.LOGIN_EVENT_QUEUE_SIZE, settings.LOGIN_EVENT_BATCH_SIZE, settings.LOGIN_EVENT_FLUSH_SECONDS)
+atexit.register(login_event_writer.stop)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.models import Recipe, RecipeBand, RecipeSignature
+from recipes.similarity import ingredient_sets, write_signatures
+
+class Command(BaseCommand):
+    help = "Rebuild the MinHash signatures and LSH buckets used for similar-recipe lookups."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Number of recipes signed per batch.")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        recipe_ids = list(Recipe.objects.order_by('id').values_list('id', flat=True))
+
+        with transaction.atomic():
+            RecipeBand.objects.all().delete()
+            RecipeSignature.objects.all().delete()
+            signed = 0
+            for start in range(0, len(recipe_ids), batch_size):
+                sets = ingredient_sets(recipe_ids[start:start + batch_size])
+                write_signatures(sets)
+                signed += len(sets)
+                self.stdout.write(f"Signed {signed} recipe(s), {min(start + batch_size, len(recipe_ids))}"
+                                  f" of {len(recipe_ids)} checked.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Built similarity index for {signed} recipe(s); {len(recipe_ids) - signed} without ingredients."))
@@ -1,29 +1,97 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import User
-from recipes.models import UserDeletion
+from recipes.export import export_storage
+from recipes.models import Recipe, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, UserDeletion, UserExport
+from recipes.signals import deferred_catalog_updates
+
+# The user's rows in these tables are deleted with one DELETE per table and batch. Their
+# post_delete receivers only keep per-user state (sync tombstones, pantry caches) that
+# goes away with the user, so skipping them loses nothing.
+BULK_DELETED = [SavedItem, WeeklyPlan, UserInventory, ShoppingListItem]
+
+
+def delete_user_rows(model, user_ids):
+    """Delete the users' rows in one statement, without loading them or sending signals."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.get_field('user').column)
+    placeholders = ", ".join(["%s"] * len(user_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({placeholders})", list(user_ids))
+
+
+def delete_export_files(names):
+    for name in names:
+        export_storage.delete(name)
+
 
 class Command(BaseCommand):
     help = "Permanently delete users who requested deletion over 6 months ago."
 
-    def handle(self, *args, **kwargs):
-        # Time for deletion in Production
-        threshold_date = timezone.now() - timedelta(days=180)
-
-        #Time for deletion in Preview to test
-        #threshold_date = timezone.now() - timedelta(minutes=5)
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=180,
+                            help="Delete users who requested deletion at least this many days ago.")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Users deleted per transaction.")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report what would be deleted without deleting anything.")
 
+    def handle(self, *args, **options):
+        threshold_date = timezone.now() - timedelta(days=options["days"])
         deletions = UserDeletion.objects.filter(delete_request_time__lte=threshold_date)
 
-        if not deletions.exists():
+        total = deletions.count()
+        if not total:
             self.stdout.write("No Accounts to Delete.")
             return
 
-        for deletion in deletions:
-            user = deletion.user
-            username = user.username
-            self.stdout.write(f"Deleting user: {username}")
-            user.delete()
+        if options["dry_run"]:
+            self.report(deletions, total)
+            return
+
+        # Each batch commits on its own and takes its UserDeletion rows with it, so after a
+        # failure running the command again carries on with the users that are left
+        deleted = 0
+        last_user_id = 0
+        while True:
+            user_ids = list(deletions.filter(user_id__gt=last_user_id).order_by('user_id').values_list(
+                'user_id', flat=True)[:options["batch_size"]])
+            if not user_ids:
+                break
+            try:
+                self.delete_batch(user_ids)
+            except Exception as e:
+                raise CommandError(
+                    f"Failed after deleting {deleted} of {total} user(s), run again to resume: {e}") from e
+            deleted += len(user_ids)
+            last_user_id = user_ids[-1]
+            self.stdout.write(f"Deleted {deleted} of {total} user(s)...")
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} user(s)."))
+
+    def delete_batch(self, user_ids):
+        """Delete a batch of users and everything they own in one transaction, table by table."""
+        with transaction.atomic():
+            # Recipes go through the ORM so the catalog, search index and other users' plans follow.
+            # Deletion requests hand recipes over to the basilandbyte user, so this is usually empty
+            with deferred_catalog_updates():
+                Recipe.objects.filter(user_id__in=user_ids).delete()
+
+            export_files = [name for name in UserExport.objects.filter(
+                user_id__in=user_ids).values_list('file_name', flat=True) if name]
+            for model in [UserExport] + BULK_DELETED:
+                delete_user_rows(model, user_ids)
+
+            # What is left (deletion requests, coverage, tokens, tombstones) has no receivers and
+            # is fast-deleted by the collector with one DELETE per table
+            User.objects.filter(id__in=user_ids).delete()
+            transaction.on_commit(lambda: delete_export_files(export_files))
 
-        self.stdout.write(self.style.SUCCESS(f"Deleted {deletions.count()} user(s)."))
\ No newline at end of file
+    def report(self, deletions, total):
+        user_ids = deletions.values('user_id')
+        self.stdout.write(f"Would delete {total} user(s):")
+        for model in [Recipe, UserExport] + BULK_DELETED:
+            count = model.objects.filter(user_id__in=user_ids).count()
+            self.stdout.write(f"  {model._meta.verbose_name_plural}: {count}")
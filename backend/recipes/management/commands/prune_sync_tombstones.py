@@ -0,0 +1,11 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from recipes.sync import prune_tombstones
+
+class Command(BaseCommand):
+    help = "Delete delta-sync tombstones older than SYNC_TOMBSTONE_DAYS."
+
+    def handle(self, *args, **kwargs):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} tombstone(s) older than {settings.SYNC_TOMBSTONE_DAYS} days."))
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from recipes.models import LoginEvent, LoginEventDailyCount
+
+class Command(BaseCommand):
+    help = ("Roll login events older than --days into daily per-user, outcome and source counts, "
+            "deleting the raw rows in chunks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.LOGIN_EVENT_RETENTION_DAYS,
+                            help="Keep raw events for this many days.")
+        parser.add_argument("--batch-size", type=int, default=5000,
+                            help="Raw events rolled up and deleted per transaction.")
+
+    def handle(self, *args, **options):
+        # Only whole days are rolled up, so a day's count is never split across runs
+        today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        threshold = today - timedelta(days=options["days"])
+        old_events = LoginEvent.objects.filter(timestamp__lt=threshold).order_by('id')
+
+        total = 0
+        while True:
+            # Each chunk is counted and deleted in one transaction, so a failed run can be rerun
+            with transaction.atomic():
+                ids = list(old_events.values_list('id', flat=True)[:options["batch_size"]])
+                if not ids:
+                    break
+                self.add_counts(LoginEvent.objects.filter(id__in=ids))
+                LoginEvent.objects.filter(id__in=ids).delete()
+            total += len(ids)
+            self.stdout.write(f"Rolled up {total} event(s)...")
+
+        if not total:
+            self.stdout.write("No login events to roll up.")
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {total} login event(s) older than {threshold.date()}."))
+
+    def add_counts(self, events):
+        """Add the events' per-day counts to the rollup, in one read and two bulk writes."""
+        counts = {
+            (row['username'], row['date'], row['outcome'], row['source']): row['count']
+            for row in events.annotate(date=TruncDate('timestamp')).order_by().values(
+                'username', 'date', 'outcome', 'source').annotate(count=Count('id'))
+        }
+        existing = LoginEventDailyCount.objects.select_for_update().filter(
+            username__in={key[0] for key in counts}, date__in={key[1] for key in counts})
+        updated = []
+        for row in existing:
+            key = (row.username, row.date, row.outcome, row.source)
+            if key in counts:
+                row.count += counts.pop(key)
+                updated.append(row)
+        LoginEventDailyCount.objects.bulk_update(updated, ['count'])
+        LoginEventDailyCount.objects.bulk_create([
+            LoginEventDailyCount(username=username, date=date, outcome=outcome, source=source, count=count)
+            for (username, date, outcome, source), count in counts.items()
+        ])
@@ -0,0 +1,161 @@
+"""
+Sparse recipe x ingredient matrix for scoring a pantry against the whole catalog at once.
+
+Used when SUGGESTION_BACKEND = "matrix". Each row is a recipe, each column an ingredient,
+and each stored value the required quantity in its dimension's base unit (see units.py),
+with the dimension kept alongside. Scoring a pantry is a handful of vectorized operations
+over the non-zero entries, which yields missing-ingredient counts and quantity shortfalls
+for every recipe in one pass.
+
+Requires numpy and scipy, which are optional and not in requirements.txt.
+"""
+import logging
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .caching import CatalogStructure, get_catalog_version
+from .models import RecipeIngredient
+from .units import to_base
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Only needed for the matrix backend
+    np = sparse = None
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeMatrix(CatalogStructure):
+    """
+    In-process CSR matrix of required quantities, refreshed from the catalog version.
+
+    A catalog change reloads only the changed recipes' rows from the database. The rows that
+    did not change are kept by masking the CSR arrays and the reloaded rows are appended, so
+    the cost is a few numpy copies of the arrays rather than a rebuild from the database.
+    Columns are only ever added; those of deleted ingredients stay empty until the next full load.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # dimension -> small integer code, stored per entry next to the matrix
+        self.dimension_codes = {}
+        self.matrix = None
+        self.entry_dimensions = None
+        self.recipe_ids = None
+        # ingredient id -> column
+        self.columns = {}
+        self.entry_rows = None
+
+    def load_all(self):
+        self.columns = {}
+        self.set_rows(*self.load_rows(None))
+        logger.info(
+            f"Assembled recipe matrix: {len(self.recipe_ids)} recipes x {len(self.columns)} ingredients, "
+            f"{self.matrix.nnz} entries")
+
+    def apply_changes(self, recipe_ids, ingredient_ids):
+        # Ingredient renames do not move any entries, only recipe rows need reloading
+        if not recipe_ids:
+            return
+        lengths = np.diff(self.matrix.indptr)
+        kept_rows = ~np.isin(self.recipe_ids, np.fromiter(recipe_ids, dtype=np.int64, count=len(recipe_ids)))
+        kept_entries = np.repeat(kept_rows, lengths)
+        new_recipe_ids, new_lengths, new_indices, new_required, new_dimensions = self.load_rows(recipe_ids)
+        self.set_rows(
+            np.concatenate((self.recipe_ids[kept_rows], new_recipe_ids)),
+            np.concatenate((lengths[kept_rows], new_lengths)),
+            np.concatenate((self.matrix.indices[kept_entries], new_indices)),
+            np.concatenate((self.matrix.data[kept_entries], new_required)),
+            np.concatenate((self.entry_dimensions[kept_entries], new_dimensions)))
+
+    def load_rows(self, recipe_ids):
+        """
+        Read the rows of recipe_ids, or of every recipe, as arrays:
+        (recipe ids, entries per recipe, columns, required base quantities, dimension codes).
+        """
+        queryset = RecipeIngredient.objects.order_by('recipe_id', 'id')
+        if recipe_ids is not None:
+            queryset = queryset.filter(recipe_id__in=recipe_ids)
+        row_ids, lengths, indices, required, dimensions = [], [], [], [], []
+        rows = queryset.values_list('recipe_id', 'ingredient_id', 'quantity_value', 'unit')
+        for recipe_id, ingredient_id, quantity, unit in rows:
+            if not row_ids or row_ids[-1] != recipe_id:
+                row_ids.append(recipe_id)
+                lengths.append(0)
+            lengths[-1] += 1
+            indices.append(self.columns.setdefault(ingredient_id, len(self.columns)))
+            dimension, base = to_base(float(quantity) if quantity is not None else np.nan, unit)
+            # NaN marks a quantity that could not be parsed, it never counts as covered
+            required.append(base)
+            dimensions.append(self.dimension_codes.setdefault(dimension, len(self.dimension_codes)))
+        return (np.array(row_ids, dtype=np.int64), np.array(lengths, dtype=np.int64),
+                np.array(indices, dtype=np.int64), np.array(required, dtype=np.float64),
+                np.array(dimensions, dtype=np.int64))
+
+    def set_rows(self, recipe_ids, lengths, indices, required, dimensions):
+        indptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.matrix = sparse.csr_matrix(
+            (required, indices, indptr), shape=(len(recipe_ids), len(self.columns)))
+        self.recipe_ids = recipe_ids
+        self.entry_dimensions = dimensions
+        # Row of every stored entry, so per-entry results can be summed per recipe with bincount
+        self.entry_rows = np.repeat(np.arange(len(recipe_ids)), lengths)
+
+    def score(self, available):
+        """
+        Score a pantry against every recipe.
+        available maps ingredient id -> (dimension, available quantity in base units); a dimension
+        of None means the pantry holds it in several dimensions and it is never counted missing.
+        Entries whose dimension differs from the pantry's are not counted missing either, since
+        a density may still convert them. Returns (recipe_ids, shared_counts, missing_counts,
+        shortfalls) as aligned arrays.
+        """
+        with self.lock:
+            n_rows, n_cols = self.matrix.shape
+            pantry = np.zeros(n_cols)
+            pantry_dimensions = np.full(n_cols, -1, dtype=np.int64)
+            present = np.zeros(n_cols, dtype=bool)
+            for ingredient_id, (dimension, quantity) in available.items():
+                col = self.columns.get(ingredient_id)
+                if col is not None:
+                    pantry[col] = quantity
+                    pantry_dimensions[col] = self.dimension_codes.get(dimension, -1)
+                    present[col] = True
+
+            required = self.matrix.data
+            has = present[self.matrix.indices]
+            comparable = has & (pantry_dimensions[self.matrix.indices] == self.entry_dimensions)
+            on_hand = pantry[self.matrix.indices]
+            parsed = ~np.isnan(required)
+            missing = np.where(has, comparable & (on_hand < required), parsed)
+            shortfall = np.where(parsed & ~(has & ~comparable),
+                                 np.maximum(required - np.where(comparable, on_hand, 0), 0), 0)
+            entry_rows, recipe_ids = self.entry_rows, self.recipe_ids
+
+        shared_counts = np.bincount(entry_rows, weights=has, minlength=n_rows)
+        missing_counts = np.bincount(entry_rows, weights=missing, minlength=n_rows)
+        shortfalls = np.bincount(entry_rows, weights=shortfall, minlength=n_rows)
+        return recipe_ids, shared_counts, missing_counts, shortfalls
+
+    def candidates(self, available, max_missing):
+        """Ids of recipes sharing an ingredient with the pantry and missing at most max_missing."""
+        recipe_ids, shared, missing, _ = self.score(available)
+        keep = (shared > 0) & (missing <= max_missing)
+        return set(recipe_ids[keep].tolist())
+
+
+_matrix = RecipeMatrix()
+
+
+def get_recipe_matrix():
+    """Return the shared matrix, refreshed if the catalog changed since it was assembled."""
+    if np is None:
+        raise ImproperlyConfigured(
+            'SUGGESTION_BACKEND = "matrix" requires numpy and scipy to be installed.')
+    _matrix.refresh(get_catalog_version())
+    return _matrix
+
+
+def mark_matrix_changed(recipe_ids, ingredient_ids, version):
+    _matrix.mark_changed(recipe_ids, ingredient_ids, version)
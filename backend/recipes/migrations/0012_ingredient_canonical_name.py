@@ -0,0 +1,151 @@
+import re
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+PREP_WORDS = re.compile(
+    r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b', re.IGNORECASE)
+
+
+def canonical_ingredient_name(name):
+    return " ".join(name.split()).casefold()
+
+
+def normalize_ingredient_name(name):
+    return " ".join(PREP_WORDS.sub('', canonical_ingredient_name(name)).split())
+
+
+# Largest value that fits the max_digits=6, decimal_places=2 quantity column
+MAX_QUANTITY = 9999.99
+
+# Frozen copy of the unit table in recipes/units.py, so later edits there cannot change
+# what this migration does: unit -> (dimension, factor to the base unit), plus other spellings
+UNITS = {
+    "ml": ("volume", 1.0, ("milliliter", "millilitre", "mls")),
+    "l": ("volume", 1000.0, ("liter", "litre", "ltr")),
+    "tsp": ("volume", 4.92892159375, ("teaspoon", "tsps")),
+    "tbsp": ("volume", 14.78676478125, ("tablespoon", "tbs", "tbsps", "tbl")),
+    "fl oz": ("volume", 29.5735295625, ("fluid ounce", "floz")),
+    "cup": ("volume", 236.5882365, ("c",)),
+    "pint": ("volume", 473.176473, ("pt",)),
+    "quart": ("volume", 946.352946, ("qt",)),
+    "gallon": ("volume", 3785.411784, ("gal",)),
+    "g": ("mass", 1.0, ("gram", "gr", "gramme")),
+    "mg": ("mass", 0.001, ("milligram",)),
+    "kg": ("mass", 1000.0, ("kilogram", "kilo")),
+    "oz": ("mass", 28.3495, ("ounce",)),
+    "lb": ("mass", 453.592, ("pound", "lbs")),
+    "piece": ("count", 1.0, ("pc", "pcs", "each", "ea", "whole", "item", "unit", "count")),
+    "dozen": ("count", 12.0, ("doz",)),
+}
+
+
+def build_unit_factors():
+    factors = {}
+    for name, (dimension, factor, aliases) in UNITS.items():
+        for alias in (name,) + aliases:
+            factors[alias] = (dimension, factor)
+            factors.setdefault(alias + "s", (dimension, factor))
+            factors.setdefault(alias + "es", (dimension, factor))
+    return factors
+
+
+UNIT_FACTORS = build_unit_factors()
+
+
+def lookup_unit(unit):
+    key = " ".join(str(unit).split()).casefold().rstrip(".")
+    return UNIT_FACTORS.get(key, ("unit:" + key, 1.0))
+
+
+def convert(quantity, from_unit, to_unit):
+    """Convert quantity between units of one dimension, None if their dimensions differ."""
+    from_dimension, from_factor = lookup_unit(from_unit)
+    to_dimension, to_factor = lookup_unit(to_unit)
+    if from_dimension != to_dimension:
+        return None
+    return quantity * from_factor / to_factor
+
+
+def merge_inventory_item(kept, duplicate):
+    """
+    Add a duplicate pantry row's quantity to the row that is kept for the same slot.
+    Returns False, changing nothing, if the units cannot be added up (pieces and grams).
+    """
+    extra = convert(float(duplicate.quantity), duplicate.unit, kept.unit)
+    if extra is None:
+        return False
+    kept.quantity = Decimal(str(round(min(float(kept.quantity) + extra, MAX_QUANTITY), 2)))
+    kept.quantity_display = f"{kept.quantity.normalize():f}"
+    if duplicate.expires_at and (kept.expires_at is None or duplicate.expires_at < kept.expires_at):
+        kept.expires_at = duplicate.expires_at
+    kept.is_available = kept.is_available or duplicate.is_available
+    kept.save(update_fields=['quantity', 'quantity_display', 'expires_at', 'is_available'])
+    return True
+
+
+def backfill_canonical_names(apps, schema_editor):
+    """Fill the new columns and merge ingredients that only differ by case or spacing."""
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    UserInventory = apps.get_model('recipes', 'UserInventory')
+    ShoppingListItem = apps.get_model('recipes', 'ShoppingListItem')
+
+    kept = {}
+    conflicts = []
+    for ingredient in Ingredient.objects.order_by('id'):
+        canonical = canonical_ingredient_name(ingredient.ingredient_name)
+        keeper = kept.get(canonical)
+        if keeper is None:
+            ingredient.canonical_name = canonical
+            ingredient.match_name = normalize_ingredient_name(ingredient.ingredient_name)
+            ingredient.save(update_fields=['canonical_name', 'match_name'])
+            kept[canonical] = ingredient
+            continue
+
+        # Duplicate: point everything at the first ingredient with this name
+        RecipeIngredient.objects.filter(ingredient=ingredient).update(ingredient=keeper)
+        ShoppingListItem.objects.filter(ingredient=ingredient).update(ingredient=keeper)
+        for item in UserInventory.objects.filter(ingredient=ingredient):
+            kept_item = UserInventory.objects.filter(user_id=item.user_id, ingredient=keeper,
+                                                     storage_location=item.storage_location).first()
+            if kept_item is None:
+                item.ingredient = keeper
+                item.save(update_fields=['ingredient'])
+            elif merge_inventory_item(kept_item, item):
+                item.delete()
+            else:
+                conflicts.append(
+                    f"user {item.user_id}, {item.storage_location}: {kept_item.quantity} {kept_item.unit} of "
+                    f"'{keeper.ingredient_name}' and {item.quantity} {item.unit} of '{ingredient.ingredient_name}'")
+        ingredient.delete()
+
+    # Both rows cannot stay in one (user, ingredient, storage_location) slot, and deleting
+    # either would lose pantry data, so stop; the migration's transaction undoes the merges
+    if conflicts:
+        raise RuntimeError(
+            "Cannot merge pantry items whose units do not convert, change one of them and migrate "
+            "again:\n" + "\n".join(conflicts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0011_userinventory_quantity_display_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='canonical_name',
+            field=models.CharField(editable=False, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='match_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_canonical_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_ingredient_canonical_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ingredient',
+            name='canonical_name',
+            field=models.CharField(editable=False, max_length=100, unique=True),
+        ),
+    ]
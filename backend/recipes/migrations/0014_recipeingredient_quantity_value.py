@@ -0,0 +1,46 @@
+from fractions import Fraction
+
+from django.db import migrations, models
+
+
+def parse_quantity(display):
+    parts = str(display).split()
+    if not 1 <= len(parts) <= 2:
+        return None
+    try:
+        value = sum(Fraction(part) for part in parts)
+    except (ValueError, ZeroDivisionError):
+        return None
+    if value < 0 or value > 9999.99:
+        return None
+    return float(value)
+
+
+def backfill_quantity_values(apps, schema_editor):
+    """Parse existing quantities once. Rows that cannot be parsed are left NULL."""
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    batch = []
+    for ri in RecipeIngredient.objects.only('id', 'quantity').iterator(chunk_size=2000):
+        ri.quantity_value = parse_quantity(ri.quantity)
+        batch.append(ri)
+        if len(batch) >= 2000:
+            RecipeIngredient.objects.bulk_update(batch, ['quantity_value'])
+            batch = []
+    if batch:
+        RecipeIngredient.objects.bulk_update(batch, ['quantity_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0013_alter_ingredient_canonical_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='quantity_value',
+            field=models.DecimalField(decimal_places=2, editable=False, help_text='Numeric Version for calculations', max_digits=6, null=True),
+        ),
+        migrations.RunPython(backfill_quantity_values, migrations.RunPython.noop),
+    ]
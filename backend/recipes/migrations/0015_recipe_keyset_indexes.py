@@ -0,0 +1,21 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_recipeingredient_quantity_value'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-created_at', '-id'], name='recipe_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='recipe_user_created_idx'),
+        ),
+    ]
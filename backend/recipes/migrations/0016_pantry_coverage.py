@@ -0,0 +1,43 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0015_recipe_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PantryCoverageState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pantry_coverage_state', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PantryCoverage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('can_make', models.BooleanField()),
+                ('matched_count', models.PositiveIntegerField()),
+                ('missing_count', models.PositiveIntegerField()),
+                ('coverage', models.FloatField(help_text="Share of the recipe's ingredients in the pantry")),
+                ('expires_at', models.DateField(blank=True, help_text='Earliest expiration of the pantry items the recipe uses', null=True)),
+                ('missing_ingredients', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pantry_coverage', to='recipes.recipe')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pantry_coverage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-can_make', 'missing_count', '-coverage', 'expires_at', 'recipe'], name='pantry_coverage_rank_idx')],
+                'unique_together': {('user', 'recipe')},
+            },
+        ),
+    ]
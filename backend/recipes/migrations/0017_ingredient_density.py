@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_pantry_coverage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='density',
+            field=models.FloatField(blank=True, help_text='Grams per millilitre, lets quantities convert between volume and mass', null=True),
+        ),
+    ]
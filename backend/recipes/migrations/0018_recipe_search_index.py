@@ -0,0 +1,51 @@
+from django.db import migrations
+
+# The index tables are outside the ORM, see recipes/search.py
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE recipes_recipe_fts USING fts5("
+            "recipe_id UNINDEXED, recipe_name, ingredients, description, instructions, "
+            "tokenize = 'porter unicode61')")
+        schema_editor.execute(
+            "INSERT INTO recipes_recipe_fts (recipe_id, recipe_name, ingredients, description, instructions) "
+            "SELECT r.id, r.recipe_name, COALESCE((SELECT group_concat(i.ingredient_name, ' ') "
+            "FROM recipes_recipeingredient ri JOIN recipes_ingredient i ON i.id = ri.ingredient_id "
+            "WHERE ri.recipe_id = r.id), ''), r.description, r.instructions FROM recipes_recipe r")
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            "CREATE TABLE recipes_recipesearch ("
+            "recipe_id bigint PRIMARY KEY REFERENCES recipes_recipe (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)")
+        schema_editor.execute(
+            "CREATE INDEX recipes_recipesearch_document_idx ON recipes_recipesearch USING GIN (document)")
+        schema_editor.execute(
+            "INSERT INTO recipes_recipesearch (recipe_id, document) "
+            "SELECT r.id, setweight(to_tsvector('english', r.recipe_name), 'A') || "
+            "setweight(to_tsvector('english', COALESCE((SELECT string_agg(i.ingredient_name, ' ') "
+            "FROM recipes_recipeingredient ri JOIN recipes_ingredient i ON i.id = ri.ingredient_id "
+            "WHERE ri.recipe_id = r.id), '')), 'B') || "
+            "setweight(to_tsvector('english', r.description), 'C') || "
+            "setweight(to_tsvector('english', r.instructions), 'D') FROM recipes_recipe r")
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS recipes_recipe_fts")
+    elif vendor == "postgresql":
+        schema_editor.execute("DROP TABLE IF EXISTS recipes_recipesearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_ingredient_density'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0018_recipe_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeSignature',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='minhash', serialize=False, to='recipes.recipe')),
+                ('signature', models.JSONField(help_text='Minimum hash value per hash function')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RecipeBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='minhash_bands', to='recipes.recipe')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket'], name='recipe_band_bucket_idx')],
+                'unique_together': {('recipe', 'band')},
+            },
+        ),
+    ]
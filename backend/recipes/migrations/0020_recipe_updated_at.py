@@ -0,0 +1,27 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:58
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing recipes were last changed no earlier than they were created."""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    Recipe.objects.update(updated_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0019_recipe_minhash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
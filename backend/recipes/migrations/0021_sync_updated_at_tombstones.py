@@ -0,0 +1,82 @@
+# Generated by Django 4.2.18 on 2026-10-18 00:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def backfill_updated_at(apps, schema_editor):
+    """Existing rows were last changed no earlier than they were added."""
+    for model_name, added in [('SavedItem', 'saved_at'), ('WeeklyPlan', 'created_at'),
+                              ('UserInventory', 'added_at'), ('ShoppingListItem', 'added_at')]:
+        apps.get_model('recipes', model_name).objects.update(updated_at=models.F(added))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0020_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saveditem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='weeklyplan',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='userinventory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='shoppinglistitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['updated_at'], name='recipe_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='saveditem',
+            index=models.Index(fields=['user', 'updated_at'], name='saveditem_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyplan',
+            index=models.Index(fields=['user', 'updated_at'], name='weeklyplan_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userinventory',
+            index=models.Index(fields=['user', 'updated_at'], name='inventory_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglistitem',
+            index=models.Index(fields=['user', 'updated_at'], name='shopping_user_updated_idx'),
+        ),
+        migrations.CreateModel(
+            name='SyncTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Recipe'), ('saved_item', 'Saved item'), ('weekly_plan', 'Weekly plan'), ('inventory', 'Inventory'), ('shopping_list', 'Shopping list')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sync_tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'), models.Index(fields=['kind', 'deleted_at'], name='tombstone_kind_deleted_idx')],
+            },
+        ),
+    ]
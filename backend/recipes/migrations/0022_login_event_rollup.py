@@ -0,0 +1,35 @@
+# Generated by Django 4.2.18 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0021_sync_updated_at_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginEventDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150)),
+                ('date', models.DateField()),
+                ('outcome', models.CharField(max_length=10)),
+                ('source', models.CharField(max_length=10)),
+                ('count', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='loginevent',
+            index=models.Index(fields=['username', 'timestamp'], name='loginevent_user_time_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='logineventdailycount',
+            unique_together={('username', 'date', 'outcome', 'source')},
+        ),
+    ]
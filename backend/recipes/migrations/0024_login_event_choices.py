@@ -0,0 +1,23 @@
+# Generated by Django 4.2.18 on 2026-10-18 00:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0023_user_export'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='loginevent',
+            name='outcome',
+            field=models.CharField(choices=[('attempt', 'Attempt'), ('success', 'Success'), ('failure', 'Failure')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='loginevent',
+            name='source',
+            field=models.CharField(choices=[('mobile', 'Mobile'), ('web', 'Web'), ('unknown', 'Unknown')], default='unknown', max_length=10),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.18 on 2026-10-18 00:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0024_login_event_choices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingCoverageRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_ids', models.JSONField(default=list)),
+                ('ingredient_ids', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -1,11 +1,59 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
+import uuid
 from fractions import Fraction
+import re
+
+# Preparation words that should not stop "chopped onion" from matching "onion"
+PREP_WORDS = re.compile(
+    r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b', re.IGNORECASE)
+
+
+def canonical_ingredient_name(name):
+    """Case-folded, whitespace-collapsed name used to dedupe and look up ingredients."""
+    return " ".join(name.split()).casefold()
+
+
+def normalize_ingredient_name(name):
+    """Canonical name with preparation words stripped, used to match pantry items to recipes."""
+    return " ".join(PREP_WORDS.sub('', canonical_ingredient_name(name)).split())
+
+
+# Largest value that fits the max_digits=6, decimal_places=2 quantity columns
+MAX_QUANTITY = 9999.99
+
+
+def parse_quantity(display):
+    """Parse a quantity like '1', '1/2', '0.5' or '1 1/2' into a float. Raises ValueError if invalid."""
+    parts = str(display).split()
+    if not 1 <= len(parts) <= 2:
+        raise ValueError(f"Invalid quantity '{display}'")
+    try:
+        value = sum(Fraction(part) for part in parts)
+    except ZeroDivisionError:
+        raise ValueError(f"Invalid quantity '{display}'")
+    if value < 0 or value > MAX_QUANTITY:
+        raise ValueError(f"Quantity '{display}' is out of range")
+    return float(value)
 
 # The models below create tables. Primary keys are specified and foreign keys are referenced
 # We do not need to create a user model, as we are using Django's user model
 
+class RecipeQuerySet(models.QuerySet):
+    def with_details(self):
+        """Load the author and ingredients RecipeSerializer needs in a fixed number of queries."""
+        return self.select_related('user').prefetch_related(
+            models.Prefetch(
+                'recipe_ingredients',
+                queryset=RecipeIngredient.objects.select_related('ingredient')))
+
+    def touch(self):
+        """Move updated_at forward without saving, for changes made through related rows."""
+        return self.update(updated_at=timezone.now())
+
+
 class Recipe(models.Model):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="recipes")
@@ -13,8 +61,21 @@ class Recipe(models.Model):
     description = models.TextField()
     instructions = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also moved forward when the recipe's ingredients change, see signals.py
+    updated_at = models.DateTimeField(auto_now=True)
     image_url = models.URLField(null=True, blank=True)
 
+    objects = RecipeQuerySet.as_manager()
+
+    class Meta:
+        # Keyset pagination walks these newest first, see pagination.py
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='recipe_created_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='recipe_user_created_idx'),
+            # Delta sync reads rows changed since a token, see sync.py
+            models.Index(fields=['updated_at'], name='recipe_updated_idx'),
+        ]
+
     def __str__(self):
         return self.recipe_name
 
@@ -27,14 +88,56 @@ class FoodGroup(models.Model):
         """Returns a string that represents the food group."""
         return self.food_group_name
 
+class IngredientQuerySet(models.QuerySet):
+    def resolve(self, names):
+        """
+        Return ({canonical name: Ingredient}, ids of the ingredients created) for names,
+        creating the missing ones in bulk. bulk_create skips save() and signals, callers
+        record the created ingredients as a catalog change themselves.
+        """
+        wanted = {}
+        for name in names:
+            wanted.setdefault(canonical_ingredient_name(name), name.strip())
+        found = {i.canonical_name: i for i in self.filter(canonical_name__in=wanted)}
+        missing = [Ingredient(ingredient_name=name) for key, name in wanted.items() if key not in found]
+        created = []
+        if missing:
+            for ingredient in missing:
+                ingredient.set_derived_names()
+            # Rows created concurrently are skipped here and picked up by the re-read
+            self.bulk_create(missing, ignore_conflicts=True)
+            for ingredient in self.filter(canonical_name__in=[i.canonical_name for i in missing]):
+                found[ingredient.canonical_name] = ingredient
+                created.append(ingredient.id)
+        return found, created
+
+
 class Ingredient(models.Model):
     ingredient_name = models.CharField(max_length=100)
+    # Derived from ingredient_name on save so lookups and matching can use an index
+    canonical_name = models.CharField(max_length=100, unique=True, editable=False)
+    match_name = models.CharField(max_length=100, db_index=True, editable=False)
     food_group = models.ForeignKey(
         "FoodGroup", on_delete=models.SET_NULL, null=True, related_name="ingredients")
     specific_species = models.CharField(max_length=100, null=True, blank=True)
+    density = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Grams per millilitre, lets quantities convert between volume and mass"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     image_url = models.URLField(null=True, blank=True)
 
+    objects = IngredientQuerySet.as_manager()
+
+    def set_derived_names(self):
+        self.canonical_name = canonical_ingredient_name(self.ingredient_name)
+        self.match_name = normalize_ingredient_name(self.ingredient_name)
+
+    def save(self, *args, **kwargs):
+        self.set_derived_names()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.ingredient_name
 
@@ -45,9 +148,36 @@ class RecipeIngredient(models.Model):
     ingredient = models.ForeignKey(
         Ingredient, on_delete=models.CASCADE, related_name="ingredient_recipes")
     quantity = models.CharField(max_length=20)
+    # Parsed from quantity on save so matching never has to parse strings
+    quantity_value = models.DecimalField(
+        max_digits=6,
+        decimal_places=2,
+        null=True,
+        editable=False,
+        help_text="Numeric Version for calculations"
+    )
     unit = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    def set_quantity_value(self):
+        # Quantities that cannot be parsed (legacy rows, "a pinch") are stored without a value,
+        # which matching treats as unknown; forms and serializers reject them through clean()
+        try:
+            self.quantity_value = parse_quantity(self.quantity)
+        except ValueError:
+            self.quantity_value = None
+
+    def clean(self):
+        super().clean()
+        try:
+            parse_quantity(self.quantity)
+        except ValueError:
+            raise ValidationError({"quantity": "Enter a valid quantity like '1', '1/2', or '1 1/2'"})
+
+    def save(self, *args, **kwargs):
+        self.set_quantity_value()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         """Returns a f-string of the recipe name and the ingredient name"""
         return f"{self.recipe.recipe_name} - {self.ingredient.ingredient_name}"
@@ -60,6 +190,12 @@ class SavedItem(models.Model):
     recipe = models.ForeignKey(
         Recipe, on_delete=models.CASCADE, related_name="saved_by_users")
     saved_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='saveditem_user_updated_idx'),
+        ]
 
     def __str__(self):
         """Returns a f-string of the username and the saved recipe name"""
@@ -81,10 +217,14 @@ class WeeklyPlan(models.Model):
         ("Breakfast", "Breakfast"), ("Lunch", "Lunch"), ("Dinner", "Dinner")
     ])
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         # One recipe per meal per day
         unique_together = ('user', 'day', 'meal_type')
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='weeklyplan_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.day} {self.meal_type}: {self.recipe.recipe_name}"
@@ -95,17 +235,37 @@ class LoginEvent(models.Model):
     timestamp = models.DateTimeField(
         default=timezone.now)  # When the attempt occurred
     outcome = models.CharField(max_length=10, choices=[(
-        'success', 'Success'), ('failure', 'Failure')])  # Result
+        'attempt', 'Attempt'), ('success', 'Success'), ('failure', 'Failure')])  # Result
     source = models.CharField(max_length=10, choices=[(
         # Source of attempt
-        'mobile', 'Mobile'), ('web', 'Web')], default='unknown')
+        'mobile', 'Mobile'), ('web', 'Web'), ('unknown', 'Unknown')], default='unknown')
 
     class Meta:
         ordering = ['-timestamp']  # Latest events first
+        # Exports read one user's events newest first
+        indexes = [
+            models.Index(fields=['username', 'timestamp'], name='loginevent_user_time_idx'),
+        ]
 
     def __str__(self):
         return f"{self.username} - {self.timestamp} - {self.outcome} ({self.source})"
 
+
+class LoginEventDailyCount(models.Model):
+    """LoginEvents past retention, counted per day, written by the rollup_login_events command."""
+    username = models.CharField(max_length=150)
+    date = models.DateField()
+    outcome = models.CharField(max_length=10)
+    source = models.CharField(max_length=10)
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('username', 'date', 'outcome', 'source')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.username} - {self.date} - {self.outcome} ({self.source}): {self.count}"
+
 class UserDeletion(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='deletion_request')
     delete_request_time = models.DateTimeField(default=timezone.now)
@@ -163,11 +323,23 @@ class UserInventory(models.Model):
         default=True,
         help_text="Whether the item is still available for use"
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         # Prevent duplicate entries for same user and ingredient
         unique_together = ('user', 'ingredient', 'storage_location')
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='inventory_user_updated_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remembered so a save that moves the row to another ingredient also rescores the old one
+        if 'ingredient_id' in field_names:
+            instance._loaded_ingredient_id = values[field_names.index('ingredient_id')]
+        return instance
 
     def __str__(self):
         return f"{self.user.username}'s {self.ingredient.ingredient_name} ({self.quantity} {self.unit}) - {self.storage_location}"
@@ -182,9 +354,140 @@ class ShoppingListItem(models.Model):
     unit = models.CharField(max_length=50)
     is_purchased = models.BooleanField(default=False)
     added_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', 'updated_at'], name='shopping_user_updated_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username}'s {self.ingredient.ingredient_name} ({self.quantity} {self.unit}) - {'Purchased' if self.is_purchased else 'Not Purchased'}"
+
+
+class PantryCoverage(models.Model):
+    """
+    How well one user's pantry covers one recipe. Only recipes worth suggesting get a row.
+    Maintained by the UserInventory and RecipeIngredient signals, see coverage.py.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="pantry_coverage")
+    recipe = models.ForeignKey(
+        Recipe, on_delete=models.CASCADE, related_name="pantry_coverage")
+    can_make = models.BooleanField()
+    matched_count = models.PositiveIntegerField()
+    missing_count = models.PositiveIntegerField()
+    coverage = models.FloatField(help_text="Share of the recipe's ingredients in the pantry")
+    expires_at = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Earliest expiration of the pantry items the recipe uses"
+    )
+    missing_ingredients = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('user', 'recipe')
+        # Suggestions are read as one ordered range scan per user
+        indexes = [
+            models.Index(fields=['user', '-can_make', 'missing_count', '-coverage', 'expires_at', 'recipe'],
+                         name='pantry_coverage_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.recipe.recipe_name}: {self.missing_count} missing"
+
+
+class PantryCoverageState(models.Model):
+    """Marks users whose PantryCoverage rows have been built and are kept up to date."""
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="pantry_coverage_state")
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Pantry coverage for {self.user.username} built at {self.built_at}"
+
+
+class PendingCoverageRefresh(models.Model):
+    """
+    A catalog change whose PantryCoverage fan-out has not run yet, see CoverageRefresher.
+    Written in the transaction that makes the change, so a worker restart loses nothing.
+    """
+    recipe_ids = models.JSONField(default=list)
+    ingredient_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Coverage refresh of {len(self.recipe_ids)} recipes and {len(self.ingredient_ids)} ingredients"
+
+
+class RecipeSignature(models.Model):
+    """MinHash signature of a recipe's ingredient set, kept up to date by similarity.py."""
+    recipe = models.OneToOneField(
+        Recipe, on_delete=models.CASCADE, primary_key=True, related_name="minhash")
+    signature = models.JSONField(help_text="Minimum hash value per hash function")
+
+    def __str__(self):
+        return f"MinHash signature of {self.recipe.recipe_name}"
+
+
+class RecipeBand(models.Model):
+    """One LSH bucket of a recipe: recipes sharing any (band, bucket) are similarity candidates."""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name="minhash_bands")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ('recipe', 'band')
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='recipe_band_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe.recipe_name} band {self.band}: {self.bucket}"
+
+
+class SyncTombstone(models.Model):
+    """A deleted row, kept so delta syncs can tell clients to drop it, see sync.py."""
+    RECIPE = "recipe"
+    KIND_CHOICES = [
+        (RECIPE, "Recipe"),
+        ("saved_item", "Saved item"),
+        ("weekly_plan", "Weekly plan"),
+        ("inventory", "Inventory"),
+        ("shopping_list", "Shopping list"),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    # Owner of the deleted row; recipe tombstones have none, every client lists every recipe
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True, related_name="sync_tombstones")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx'),
+            models.Index(fields=['kind', 'deleted_at'], name='tombstone_kind_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.deleted_at}"
+
+
+class UserExport(models.Model):
+    """A background export of a user's data to a file under EXPORT_ROOT, see export.py."""
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="exports")
+    output = models.CharField(max_length=10, choices=[("json", "JSON"), ("ndjson", "NDJSON")], default="json")
+    status = models.CharField(max_length=10, choices=[
+        (PENDING, "Pending"), (DONE, "Done"), (FAILED, "Failed")], default=PENDING)
+    file_name = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Export for {self.user.username} ({self.status})"
@@ -0,0 +1,81 @@
+"""
+Keyset (cursor) pagination on (created_at, id).
+
+Each page filters on the last row of the previous page instead of using OFFSET,
+so deep pages cost the same as the first one. Ranked results (suggestions) have no
+such key and use opaque offset cursors instead.
+"""
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj):
+    raw = f"{obj.created_at.isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def encode_offset_cursor(offset):
+    """Cursor for ranked results, which have no stable key to seek on."""
+    return base64.urlsafe_b64encode(f"o|{offset}".encode()).decode().rstrip("=")
+
+
+def decode_offset_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        kind, offset = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        if kind != "o" or int(offset) < 0:
+            raise ValueError(token)
+        return int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def get_page_size(request, default=None, maximum=None):
+    """Read ?limit=, falling back to the default and clamping to the maximum page size."""
+    default = default or settings.RECIPE_PAGE_SIZE
+    maximum = maximum or settings.RECIPE_PAGE_SIZE_MAX
+    try:
+        limit = int(request.query_params.get('limit', default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def wants_page(request):
+    """Pagination is opt-in so clients that expect a plain list keep working."""
+    return 'limit' in request.query_params or 'cursor' in request.query_params
+
+
+def paginate_keyset(queryset, request):
+    """
+    Return (rows, next_cursor) for the page after ?cursor=, newest first.
+    Raises InvalidCursor if the token cannot be decoded.
+    """
+    limit = get_page_size(request)
+    queryset = queryset.order_by('-created_at', '-id')
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # Fetch one extra row to know whether there is a next page
+    rows = list(queryset[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,95 @@
+"""
+Full-text recipe search over the name, description, instructions and ingredient names.
+
+The index lives in a side table created by migration 0018, which depends on the database:
+- SQLite: an FTS5 virtual table, ranked with bm25().
+- PostgreSQL: a tsvector column with a GIN index, ranked with ts_rank().
+Other databases fall back to icontains filters ordered by date.
+
+The catalog signals call index_recipes() for every recipe whose text changed, in the
+same transaction as the write, see signals.py.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Recipe, RecipeIngredient
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "recipes_recipe_fts"
+SEARCH_TABLE = "recipes_recipesearch"
+
+# Column weights: the name counts most, then ingredients, description and instructions
+SQLITE_WEIGHTS = "10.0, 5.0, 2.0, 1.0"
+
+
+def search_terms(query):
+    """Split a query into lowercase words, dropping any search syntax."""
+    return re.findall(r"\w+", query.lower())
+
+
+def index_recipes(recipe_ids):
+    """Rewrite the index rows of these recipes; deleted recipes are just removed."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids or connection.vendor not in ("sqlite", "postgresql"):
+        return
+    ingredient_names = {}
+    for recipe_id, name in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids).order_by('id').values_list('recipe_id', 'ingredient__ingredient_name'):
+        ingredient_names.setdefault(recipe_id, []).append(name)
+    rows = [
+        (recipe_id, name, " ".join(ingredient_names.get(recipe_id, ())), description, instructions)
+        for recipe_id, name, description, instructions in Recipe.objects.filter(
+            id__in=recipe_ids).values_list('id', 'recipe_name', 'description', 'instructions')
+    ]
+    placeholders = ", ".join(["%s"] * len(recipe_ids))
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE recipe_id IN ({placeholders})", recipe_ids)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (recipe_id, recipe_name, ingredients, description, instructions) "
+                "VALUES (%s, %s, %s, %s, %s)", rows)
+        else:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE recipe_id IN ({placeholders})", recipe_ids)
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (recipe_id, document) VALUES (%s, "
+                "setweight(to_tsvector('english', %s), 'A') || setweight(to_tsvector('english', %s), 'B') || "
+                "setweight(to_tsvector('english', %s), 'C') || setweight(to_tsvector('english', %s), 'D'))", rows)
+
+
+def recipes_for_ingredients(ingredient_ids):
+    """Ids of the recipes whose indexed text includes these ingredients' names."""
+    return set(RecipeIngredient.objects.filter(
+        ingredient_id__in=ingredient_ids).values_list('recipe_id', flat=True))
+
+
+def search_recipe_ids(query, offset, limit):
+    """Return the ids of the matching recipes, best first, for one page."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if connection.vendor == "sqlite":
+        # Every word must match, the last one as a prefix so results follow typing
+        match = " ".join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+        sql = (f"SELECT recipe_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+               f"ORDER BY bm25({FTS_TABLE}, 0.0, {SQLITE_WEIGHTS}), recipe_id LIMIT %s OFFSET %s")
+        params = [match.strip(), limit, offset]
+    elif connection.vendor == "postgresql":
+        tsquery = " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+        sql = (f"SELECT recipe_id FROM {SEARCH_TABLE}, to_tsquery('english', %s) query "
+               "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, recipe_id LIMIT %s OFFSET %s")
+        params = [tsquery, limit, offset]
+    else:
+        matches = Q()
+        for term in terms:
+            matches &= (Q(recipe_name__icontains=term) | Q(description__icontains=term) |
+                        Q(instructions__icontains=term) |
+                        Q(recipe_ingredients__ingredient__ingredient_name__icontains=term))
+        return list(Recipe.objects.filter(matches).distinct().order_by(
+            '-created_at', '-id').values_list('id', flat=True)[offset:offset + limit])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
@@ -1,9 +1,11 @@
+import json
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
-from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem
-from fractions import Fraction
+from .signals import catalog_changed, deferred_catalog_updates
+from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, LoginEvent, canonical_ingredient_name, parse_quantity
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -67,30 +69,94 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RecipeIngredient
-        fields = ['id', 'ingredient_name', 'quantity', 'unit']
+        fields = ['id', 'ingredient_name', 'quantity', 'quantity_value', 'unit']
+        read_only_fields = ['quantity_value']
 
+    @staticmethod
     def parse_quantity_to_float(quantity_str):
         try:
-            return float(Fraction(quantity_str.strip()))
-        except Exception:
+            return parse_quantity(quantity_str)
+        except ValueError:
             raise ValueError("Invalid quantity format. Use values like '1', '1/2', or '1 1/2'")
 
+    def validate_quantity(self, value):
+        try:
+            parse_quantity(value)
+        except ValueError:
+            raise serializers.ValidationError(
+                "Enter a valid quantity like '1', '1/2', or '1 1/2'")
+        return value.strip()
+
+
+class RecipeIngredientWriteSerializer(RecipeIngredientSerializer):
+    """One entry of the nested ingredients list accepted by RecipeSerializer."""
+    ingredient_name = serializers.CharField(max_length=100)
+
+    class Meta(RecipeIngredientSerializer.Meta):
+        fields = ['ingredient_name', 'quantity', 'unit']
+
 
 class RecipeSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(required=False)
     user = serializers.PrimaryKeyRelatedField(read_only=True)
     username = serializers.SerializerMethodField()
     recipe_ingredients = RecipeIngredientSerializer(many=True, read_only=True)
+    # When given, replaces the recipe's ingredients in the same transaction as the recipe
+    ingredients = RecipeIngredientWriteSerializer(many=True, write_only=True, required=False)
 
     class Meta:
         model = Recipe
         fields = "__all__"
 
+    def to_internal_value(self, data):
+        # Multipart requests (used to upload an image) carry the nested list as a JSON string
+        if hasattr(data, 'getlist') and isinstance(data.get('ingredients'), str):
+            try:
+                ingredients = json.loads(data['ingredients'])
+            except ValueError:
+                raise serializers.ValidationError({"ingredients": ["Enter a valid JSON list."]})
+            data = {**data.dict(), 'ingredients': ingredients}
+        return super().to_internal_value(data)
+
     def create(self, validated_data):
-        return Recipe.objects.create(**validated_data)
+        ingredients = validated_data.pop('ingredients', None)
+        with transaction.atomic(), deferred_catalog_updates():
+            recipe = Recipe.objects.create(**validated_data)
+            if ingredients is not None:
+                self.replace_ingredients(recipe, ingredients)
+        return recipe
 
     def update(self, instance, validated_data):
-        return super().update(instance, validated_data)
+        ingredients = validated_data.pop('ingredients', None)
+        with transaction.atomic(), deferred_catalog_updates():
+            instance = super().update(instance, validated_data)
+            if ingredients is not None:
+                self.replace_ingredients(instance, ingredients)
+        return instance
+
+    @staticmethod
+    def replace_ingredients(recipe, ingredients):
+        """Write the recipe's ingredient rows in a fixed number of queries."""
+        resolved, created_ids = Ingredient.objects.resolve(item['ingredient_name'] for item in ingredients)
+        rows = []
+        for item in ingredients:
+            row = RecipeIngredient(
+                recipe=recipe,
+                ingredient=resolved[canonical_ingredient_name(item['ingredient_name'])],
+                quantity=item['quantity'],
+                unit=item['unit']
+            )
+            row.set_quantity_value()
+            rows.append(row)
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(rows)
+        catalog_changed(
+            recipe_ids=(recipe.id,),
+            # Only new ingredients change the ingredient list; existing ones are merely referenced
+            ingredient_ids=created_ids,
+            coverage_recipe_ids=(recipe.id,))
+        # Drop any prefetched rows so the response shows the new ingredients
+        getattr(recipe, '_prefetched_objects_cache', {}).pop('recipe_ingredients', None)
 
     def get_username(self, obj):
         return obj.user.username if obj.user else "Unknown User"
@@ -138,7 +204,7 @@ class UserInventorySerializer(serializers.ModelSerializer):
 
         display = validated_data.pop('quantity_display').strip()
         try:
-            validated_data['quantity'] = float(Fraction(display))
+            validated_data['quantity'] = parse_quantity(display)
         except ValueError:
             raise serializers.ValidationError({
                 "quantity_display": "Enter a valid quantity like '1', '1/2', or '1 1/2'"
@@ -152,14 +218,15 @@ class IngredientSerializer(serializers.ModelSerializer):
         model = Ingredient
         # Changed 'image' to 'image_url'
         fields = ['id', 'ingredient_name', 'food_group',
-                  'specific_species', 'image_url']
+                  'specific_species', 'density', 'image_url']
         read_only_fields = ['id']
 
     def create(self, validated_data):
         normalized_name = validated_data['ingredient_name'].strip().title()
+        # canonical_name is unique and indexed, unlike an iexact match on ingredient_name
         ingredient, _ = Ingredient.objects.get_or_create(
-            ingredient_name__iexact=normalized_name,
-            defaults={'ingredient_name': normalized_name, **validated_data}
+            canonical_name=canonical_ingredient_name(normalized_name),
+            defaults={**validated_data, 'ingredient_name': normalized_name}
         )
         return ingredient
 
@@ -177,3 +244,10 @@ class ShoppingListItemSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
+
+
+class LoginEventSerializer(serializers.ModelSerializer):
+    # Checked before an event is queued, so a bad row never reaches the batched insert
+    class Meta:
+        model = LoginEvent
+        fields = ['username', 'outcome', 'source']
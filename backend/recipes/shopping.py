@@ -0,0 +1,148 @@
+"""
+Set-based shopping list writes.
+
+Everything a request needs is read up front (the pantry, the recipe ingredients and the
+unpurchased shopping list), the rows are worked out in memory and written with one
+bulk_create (plus one bulk_update for rows already on the list), so the query count does
+not grow with the number of recipes or ingredients.
+"""
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MAX_QUANTITY, RecipeIngredient, ShoppingListItem, UserInventory, WeeklyPlan
+from .suggestions import PantryMatcher
+from .units import convert, covers, lookup
+
+
+def missing_for_recipes(user, recipe_ids):
+    """
+    Return {ingredient_id: RecipeIngredient} for the ingredients of the recipes that the
+    pantry does not cover, keeping the first recipe row seen for each ingredient.
+    """
+    inventory = UserInventory.objects.filter(user=user, is_available=True).select_related('ingredient')
+    matcher = PantryMatcher(inventory)
+    recipe_ingredients = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids).select_related('ingredient').order_by('recipe_id', 'id')
+
+    missing = {}
+    for ri in recipe_ingredients:
+        if ri.quantity_value is None or ri.ingredient_id in missing:
+            # Quantity could not be parsed when the row was written
+            continue
+        # Like suggestions, the closest pantry match by name decides
+        pantry_ids = matcher.pantry_matches.get(ri.ingredient_id)
+        if not pantry_ids:
+            missing[ri.ingredient_id] = ri
+            continue
+        available = matcher.pantry[pantry_ids[0]]
+        if not covers(available["quantity"], available["unit"], float(ri.quantity_value), ri.unit,
+                      ri.ingredient.density or available["density"]):
+            missing[ri.ingredient_id] = ri
+    return missing
+
+
+def add_missing_to_shopping_list(user, recipe_ids):
+    """Add what the recipes need and the pantry lacks, skipping items already on the list. Returns the new items."""
+    missing = missing_for_recipes(user, recipe_ids)
+    if not missing:
+        return []
+    with transaction.atomic():
+        listed = set(ShoppingListItem.objects.filter(
+            user=user, ingredient_id__in=missing, is_purchased=False).values_list('ingredient_id', flat=True))
+        items = [
+            ShoppingListItem(user=user, ingredient=ri.ingredient, quantity=ri.quantity_value,
+                             unit=ri.unit, is_purchased=False)
+            for ingredient_id, ri in missing.items() if ingredient_id not in listed
+        ]
+        return ShoppingListItem.objects.bulk_create(items)
+
+
+def weekly_plan_requirements(user):
+    """
+    Total the ingredients of every planned meal per ingredient and unit dimension, in the
+    unit of the first row seen. A recipe planned for several meals counts once per meal.
+    Returns ({(ingredient_id, dimension): quantity}, {(ingredient_id, dimension): RecipeIngredient}),
+    the second holding that first row, for its ingredient and unit.
+    """
+    meals = Counter(WeeklyPlan.objects.filter(user=user).values_list('recipe_id', flat=True))
+    required = defaultdict(float)
+    rows = {}
+    for ri in RecipeIngredient.objects.filter(recipe_id__in=meals).select_related('ingredient').order_by('id'):
+        if ri.quantity_value is None:
+            # Quantity could not be parsed when the row was written
+            continue
+        key = (ri.ingredient_id, lookup(ri.unit)[0])
+        first = rows.setdefault(key, ri)
+        # Same dimension, so this always converts
+        required[key] += convert(float(ri.quantity_value), ri.unit, first.unit) * meals[ri.recipe_id]
+    return required, rows
+
+
+def net_of_pantry(required, rows, matcher):
+    """
+    Subtract what the pantry has from the requirements. Pantry items are matched like
+    suggestions do and count against requirements they can be converted to; each one is
+    used up across requirements rather than counted once per recipe.
+    """
+    remaining = {pantry_id: item["quantity"] for pantry_id, item in matcher.pantry.items()}
+    needed = {}
+    for key, quantity in required.items():
+        ingredient_id, unit = key[0], rows[key].unit
+        for pantry_id in matcher.pantry_matches.get(ingredient_id, ()):
+            if quantity <= 0:
+                break
+            item = matcher.pantry[pantry_id]
+            density = rows[key].ingredient.density or item["density"]
+            on_hand = convert(remaining[pantry_id], item["unit"], unit, density)
+            if not on_hand:
+                continue
+            used = min(on_hand, quantity)
+            remaining[pantry_id] -= convert(used, unit, item["unit"], density)
+            quantity -= used
+        if quantity > 1e-9:
+            needed[key] = quantity
+    return needed
+
+
+def shopping_list_from_weekly_plan(user):
+    """
+    Write the net shopping list for the user's weekly plan: one unpurchased row per
+    ingredient and unit dimension. Rows already on the list are raised to the needed quantity,
+    never lowered, and new ones are created. Returns (created, updated).
+    """
+    required, rows = weekly_plan_requirements(user)
+    if not required:
+        return [], []
+    inventory = UserInventory.objects.filter(user=user, is_available=True).select_related('ingredient')
+    needed = net_of_pantry(required, rows, PantryMatcher(inventory))
+    if not needed:
+        return [], []
+
+    with transaction.atomic():
+        existing = {}
+        for item in ShoppingListItem.objects.select_for_update(of=('self',)).select_related('ingredient').filter(
+                user=user, ingredient_id__in={i for i, _ in needed}, is_purchased=False).order_by('id'):
+            existing.setdefault((item.ingredient_id, lookup(item.unit)[0]), item)
+
+        created, updated = [], []
+        for key, quantity in needed.items():
+            quantity = Decimal(str(round(min(quantity, MAX_QUANTITY), 2)))
+            if not quantity:
+                # A sliver left over after the pantry, too small for the quantity column
+                continue
+            item = existing.get(key)
+            if item is None:
+                created.append(ShoppingListItem(user=user, ingredient=rows[key].ingredient,
+                                                quantity=quantity, unit=rows[key].unit, is_purchased=False))
+            elif convert(float(item.quantity), item.unit, rows[key].unit) < float(quantity):
+                item.quantity = quantity
+                item.unit = rows[key].unit
+                item.updated_at = timezone.now()
+                updated.append(item)
+        # No unique constraint covers unpurchased rows, so the upsert is a locked read plus two bulk writes
+        ShoppingListItem.objects.bulk_update(updated, ['quantity', 'unit', 'updated_at'])
+        created = ShoppingListItem.objects.bulk_create(created)
+    return created, updated
@@ -0,0 +1,175 @@
+import threading
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import (
+    Recipe, Ingredient, RecipeIngredient, UserInventory, SavedItem, WeeklyPlan, ShoppingListItem, SyncTombstone,
+    UserExport
+)
+from .authentication import user_cache
+from .autocomplete import mark_prefix_index_changed
+from .caching import bump_auth_version, bump_catalog_version, bump_ingredient_version, bump_inventory_version
+from .coverage import coverage_refresher, refresh_inventory_coverage
+from .export import export_storage
+from .search import index_recipes, recipes_for_ingredients
+from .similarity import index_signatures
+from .suggestions import mark_catalog_changed
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_catalog_updates():
+    """
+    Collect catalog changes made inside the block and apply them once on exit:
+    one version bump and one coverage refresh instead of one per saved row.
+    Use inside transaction.atomic() so the indexes are rewritten in the same transaction;
+    the version bump and coverage refresh follow the commit.
+    bulk_create and bulk_update send no signals, record those with catalog_changed().
+    """
+    if getattr(_deferred, 'pending', None) is not None:
+        yield  # Nested, the outermost block applies everything
+        return
+    _deferred.pending = pending = (set(), set(), set())
+    try:
+        yield
+    finally:
+        _deferred.pending = None
+    apply_catalog_changes(*pending)
+
+
+def catalog_changed(recipe_ids=(), ingredient_ids=(), coverage_recipe_ids=()):
+    """Record a catalog change, applied now or when the enclosing deferred block exits."""
+    pending = getattr(_deferred, 'pending', None)
+    if pending is None:
+        apply_catalog_changes(recipe_ids, ingredient_ids, coverage_recipe_ids)
+        return
+    pending[0].update(recipe_ids)
+    pending[1].update(ingredient_ids)
+    pending[2].update(coverage_recipe_ids)
+
+
+def bump_catalog_versions(recipe_ids, ingredient_ids):
+    if ingredient_ids:
+        bump_ingredient_version()
+    if recipe_ids or ingredient_ids:
+        version = bump_catalog_version()
+        mark_catalog_changed(recipe_ids, ingredient_ids, version)
+        mark_prefix_index_changed(recipe_ids, ingredient_ids, version)
+
+
+def apply_catalog_changes(recipe_ids, ingredient_ids, coverage_recipe_ids):
+    # Versions move once the writes are committed. Bumped earlier, a concurrent request
+    # could cache suggestions or refresh an index under the new version from the old data
+    recipe_ids, ingredient_ids = set(recipe_ids), set(ingredient_ids)
+    transaction.on_commit(lambda: bump_catalog_versions(recipe_ids, ingredient_ids))
+    if recipe_ids:
+        # Ingredient rows are part of the recipe, so their changes move its updated_at too
+        Recipe.objects.filter(id__in=recipe_ids).touch()
+        index_recipes(recipe_ids)
+        index_signatures(recipe_ids)
+    if coverage_recipe_ids:
+        coverage_refresher.schedule(recipe_ids=coverage_recipe_ids)
+
+
+def is_cascade(sender, kwargs):
+    """True when a delete was cascaded from another model, whose own delete handles the cleanup."""
+    origin = kwargs.get('origin')
+    return origin is not None and not isinstance(origin, sender) and not (
+        hasattr(origin, 'model') and origin.model is sender)
+
+
+# Any change to the catalog invalidates the ingredient -> recipe index and every cached suggestion
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, created=False, **kwargs):
+    catalog_changed(ingredient_ids=(instance.id,))
+    # A new ingredient is in no recipe or pantry yet, and deletes cascade to the coverage rows
+    if kwargs.get('signal') is post_save and not created:
+        coverage_refresher.schedule(ingredient_ids=(instance.id,))
+        recipe_ids = recipes_for_ingredients((instance.id,))
+        Recipe.objects.filter(id__in=recipe_ids).touch()
+        index_recipes(recipe_ids)
+        index_signatures(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    catalog_changed(recipe_ids=(instance.id,))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    if is_cascade(sender, kwargs):
+        catalog_changed(recipe_ids=(instance.recipe_id,))
+    else:
+        catalog_changed(recipe_ids=(instance.recipe_id,), coverage_recipe_ids=(instance.recipe_id,))
+
+
+@receiver(post_save, sender=UserInventory)
+@receiver(post_delete, sender=UserInventory)
+def inventory_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_inventory_version(user_id))
+    if not is_cascade(sender, kwargs):
+        ingredient_ids = {instance.ingredient_id}
+        # An update that moved the row to another ingredient takes it away from the old one's recipes
+        loaded_ingredient_id = getattr(instance, '_loaded_ingredient_id', None)
+        if loaded_ingredient_id is not None:
+            ingredient_ids.add(loaded_ingredient_id)
+        instance._loaded_ingredient_id = instance.ingredient_id
+        refresh_inventory_coverage(instance.user_id, ingredient_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Covers deactivation and reactivation, which save the user. Other processes see the
+    # new auth version once the change is committed
+    user_id = instance.pk
+    user_cache.invalidate(user_id)
+    transaction.on_commit(lambda: bump_auth_version(user_id))
+
+
+# Deletes leave tombstones for delta sync, see sync.py
+
+TOMBSTONE_KINDS = {
+    Recipe: SyncTombstone.RECIPE,
+    SavedItem: "saved_item",
+    WeeklyPlan: "weekly_plan",
+    UserInventory: "inventory",
+    ShoppingListItem: "shopping_list",
+}
+
+
+def is_user_delete(kwargs):
+    """True when a delete cascaded from deleting users, who will not sync again."""
+    origin = kwargs.get('origin')
+    return isinstance(origin, User) or getattr(origin, 'model', None) is User
+
+
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=SavedItem)
+@receiver(post_delete, sender=WeeklyPlan)
+@receiver(post_delete, sender=UserInventory)
+@receiver(post_delete, sender=ShoppingListItem)
+def record_tombstone(sender, instance, **kwargs):
+    kind = TOMBSTONE_KINDS[sender]
+    if kind == SyncTombstone.RECIPE:
+        # Every client lists every recipe, so the tombstone has no owner
+        SyncTombstone.objects.create(kind=kind, object_id=instance.id)
+    elif not is_user_delete(kwargs):
+        SyncTombstone.objects.create(kind=kind, object_id=instance.id, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=UserExport)
+def export_deleted(sender, instance, **kwargs):
+    # Also runs when the user is deleted, so no export file outlives its account
+    if instance.file_name:
+        export_storage.delete(instance.file_name)
@@ -0,0 +1,116 @@
+"""
+Similar recipes by ingredient overlap, with MinHash signatures and an LSH index.
+
+Each recipe's ingredient set (matched names, so "Roma Tomatoes" and "tomato" agree) gets a
+MinHash signature of NUM_HASHES values; the share of equal values estimates the Jaccard
+similarity of two sets. The signature is cut into NUM_BANDS bands, and each band is hashed to
+a bucket stored in RecipeBand. Recipes sharing a bucket in any band are the candidates, so a
+lookup reads one recipe's signature and those of its candidates instead of every recipe.
+With 16 bands of 4 rows, pairs above ~0.5 similarity are almost always candidates.
+
+The rows are built by the build_similarity_index command and rewritten for changed recipes
+by the catalog signals, in the same transaction as the write, see signals.py.
+"""
+import hashlib
+import logging
+import random
+
+from django.db.models import Q
+
+from .models import RecipeBand, RecipeIngredient, RecipeSignature
+
+logger = logging.getLogger(__name__)
+
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+NUM_HASHES = NUM_BANDS * ROWS_PER_BAND
+
+# Hash functions (a * x + b) mod p over a Mersenne prime, seeded so signatures are stable
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240917)
+_HASH_PARAMS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def _element_hash(name):
+    return int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), 'big')
+
+
+def minhash(names):
+    """MinHash signature of a non-empty set of ingredient names."""
+    values = [_element_hash(name) for name in names]
+    return [min((a * x + b) % _PRIME for x in values) for a, b in _HASH_PARAMS]
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket per band, to fit a BigIntegerField."""
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(",".join(map(str, rows)).encode(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+
+def estimated_similarity(first, second):
+    """Share of equal signature values, an estimate of the Jaccard similarity of the sets."""
+    return sum(x == y for x, y in zip(first, second)) / NUM_HASHES
+
+
+def ingredient_sets(recipe_ids=None):
+    """Return {recipe_id: set of matched ingredient names}; recipes without ingredients are left out."""
+    queryset = RecipeIngredient.objects.all()
+    if recipe_ids is not None:
+        queryset = queryset.filter(recipe_id__in=recipe_ids)
+    sets = {}
+    for recipe_id, name in queryset.values_list('recipe_id', 'ingredient__match_name').iterator():
+        sets.setdefault(recipe_id, set()).add(name)
+    return sets
+
+
+def index_signatures(recipe_ids):
+    """Rewrite the signature and band rows of these recipes; deleted or emptied recipes are just removed."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    RecipeBand.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+    write_signatures(ingredient_sets(recipe_ids))
+
+
+def write_signatures(sets):
+    """Bulk-create the signature and band rows for {recipe_id: ingredient names}."""
+    signatures, bands = [], []
+    for recipe_id, names in sets.items():
+        signature = minhash(names)
+        signatures.append(RecipeSignature(recipe_id=recipe_id, signature=signature))
+        bands.extend(RecipeBand(recipe_id=recipe_id, band=band, bucket=bucket)
+                     for band, bucket in enumerate(band_buckets(signature)))
+    RecipeSignature.objects.bulk_create(signatures)
+    RecipeBand.objects.bulk_create(bands)
+
+
+def similar_recipe_ids(recipe_id, limit):
+    """
+    Return up to limit (recipe_id, similarity) pairs, most similar first, from the LSH candidates
+    of the recipe. A recipe missing from the index is signed first.
+    """
+    signature = RecipeSignature.objects.filter(recipe_id=recipe_id).values_list('signature', flat=True).first()
+    if signature is None:
+        index_signatures([recipe_id])
+        signature = RecipeSignature.objects.filter(
+            recipe_id=recipe_id).values_list('signature', flat=True).first()
+        if signature is None:
+            # No ingredients, nothing to compare
+            return []
+
+    same_bucket = Q()
+    for band, bucket in enumerate(band_buckets(signature)):
+        same_bucket |= Q(band=band, bucket=bucket)
+    candidates = RecipeSignature.objects.filter(
+        recipe_id__in=RecipeBand.objects.filter(same_bucket).values('recipe_id')
+    ).exclude(recipe_id=recipe_id).values_list('recipe_id', 'signature')
+
+    ranked = sorted(
+        ((other_id, estimated_similarity(signature, other)) for other_id, other in candidates),
+        key=lambda pair: (-pair[1], pair[0]))
+    return ranked[:limit]
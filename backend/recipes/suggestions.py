@@ -0,0 +1,337 @@
+"""
+Recipe suggestions backed by an inverted ingredient -> recipe index.
+
+The index maps each ingredient to the recipes that use it, so scoring a pantry only has
+to look at the recipes that share at least one ingredient with it instead of walking the
+whole catalog. Ingredient names are matched through a trigram index, see IngredientIndex.
+With SUGGESTION_BACKEND = "matrix" the candidates come from the sparse matrix in matrix.py
+instead. The scores are stored per user in PantryCoverage, see coverage.py.
+"""
+import logging
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .caching import CatalogStructure, get_catalog_version
+from .matrix import get_recipe_matrix, mark_matrix_changed
+from .models import Ingredient, Recipe, RecipeIngredient
+from .units import covers, to_base
+
+logger = logging.getLogger(__name__)
+
+# Recipes missing more than this many ingredients are not suggested
+MAX_MISSING_INGREDIENTS = 2
+
+
+def trigrams(name):
+    """Trigrams of each word padded like pg_trgm: "oil" -> {"  o", " oi", "oil", "il "}."""
+    grams = set()
+    for word in re.findall(r"\w+", name):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def same_word(a, b):
+    """Whole-word match that lets a plural stand in for its singular, "tomato" ~ "tomatoes"."""
+    return a == b or a + "s" == b or b + "s" == a or a + "es" == b or b + "es" == a
+
+
+def words_contained(name, other):
+    """
+    True if every word of the name with fewer words is a whole word of the other one, so
+    "oil" matches "olive oil" but "egg" does not match "eggplant", however many trigrams
+    they share.
+    """
+    words, other_words = re.findall(r"\w+", name), re.findall(r"\w+", other)
+    if len(words) > len(other_words):
+        words, other_words = other_words, words
+    return all(any(same_word(word, other_word) for other_word in other_words) for word in words)
+
+
+class IngredientIndex(CatalogStructure):
+    """
+    In-process inverted index from ingredients to the recipes that use them, plus a
+    trigram index over ingredient match names for fuzzy matching.
+
+    Matches are precomputed per name when ingredients are loaded, so scoring a pantry
+    never compares names. Similarity is the Jaccard index of the two trigram sets, and
+    only names sharing a trigram are compared. Trigrams alone also pair names that merely
+    start alike ("pea" and "peanut"), so a match must also pass words_contained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.names_by_id = {}
+        self.ids_by_name = defaultdict(set)
+        self.recipes_by_ingredient = defaultdict(set)
+        self.ingredients_by_recipe = defaultdict(set)
+        self.trigrams_by_name = {}
+        self.names_by_trigram = defaultdict(set)
+        # name -> {similar name: similarity}, symmetric, without the name itself
+        self.similar_names = {}
+
+    def load_all(self):
+        self.names_by_id = {}
+        self.ids_by_name = defaultdict(set)
+        self.recipes_by_ingredient = defaultdict(set)
+        self.ingredients_by_recipe = defaultdict(set)
+        self.trigrams_by_name = {}
+        self.names_by_trigram = defaultdict(set)
+        self.similar_names = {}
+        self.load_ingredients(None)
+        self.load_recipes(None)
+        logger.info(
+            f"Built ingredient index: {len(self.names_by_id)} ingredients, {len(self.ingredients_by_recipe)} recipes")
+
+    def apply_changes(self, recipe_ids, ingredient_ids):
+        if ingredient_ids:
+            self.load_ingredients(ingredient_ids)
+        if recipe_ids:
+            self.load_recipes(recipe_ids)
+
+    def load_ingredients(self, ingredient_ids):
+        queryset = Ingredient.objects.all()
+        if ingredient_ids is not None:
+            for ingredient_id in ingredient_ids:
+                name = self.names_by_id.pop(ingredient_id, None)
+                self.ids_by_name[name].discard(ingredient_id)
+                if name is not None and not self.ids_by_name[name]:
+                    self.remove_name(name)
+            queryset = queryset.filter(id__in=ingredient_ids)
+        added = set()
+        for ingredient_id, name in queryset.values_list('id', 'match_name'):
+            self.names_by_id[ingredient_id] = name
+            if not self.ids_by_name[name]:
+                added.add(name)
+            self.ids_by_name[name].add(ingredient_id)
+        for name in added:
+            self.add_name(name)
+
+    def add_name(self, name):
+        grams = trigrams(name)
+        if not grams:
+            return
+        self.trigrams_by_name[name] = grams
+        for gram in grams:
+            self.names_by_trigram[gram].add(name)
+        self.similar_names[name] = self.rank_similar(name, grams)
+        for other, similarity in self.similar_names[name].items():
+            self.similar_names[other][name] = similarity
+
+    def remove_name(self, name):
+        grams = self.trigrams_by_name.pop(name, ())
+        for gram in grams:
+            self.names_by_trigram[gram].discard(name)
+        for other in self.similar_names.pop(name, {}):
+            self.similar_names[other].pop(name, None)
+
+    def rank_similar(self, name, grams):
+        """Return {name: similarity} for the other indexed names at or above the threshold."""
+        shared = defaultdict(int)
+        for gram in grams:
+            for other in self.names_by_trigram.get(gram, ()):
+                shared[other] += 1
+        threshold = settings.INGREDIENT_MATCH_THRESHOLD
+        similar = {}
+        for other, count in shared.items():
+            if other == name:
+                continue
+            similarity = count / (len(grams) + len(self.trigrams_by_name[other]) - count)
+            if similarity >= threshold and words_contained(name, other):
+                similar[other] = similarity
+        return similar
+
+    def load_recipes(self, recipe_ids):
+        queryset = RecipeIngredient.objects.all()
+        if recipe_ids is not None:
+            for recipe_id in recipe_ids:
+                for ingredient_id in self.ingredients_by_recipe.pop(recipe_id, ()):
+                    self.recipes_by_ingredient[ingredient_id].discard(recipe_id)
+            queryset = queryset.filter(recipe_id__in=recipe_ids)
+        for recipe_id, ingredient_id in queryset.values_list('recipe_id', 'ingredient_id'):
+            self.recipes_by_ingredient[ingredient_id].add(recipe_id)
+            self.ingredients_by_recipe[recipe_id].add(ingredient_id)
+
+    def ranked_matches(self, ingredient_id, name=None):
+        """
+        Return {ingredient id: similarity} for the ingredients that can stand in for this one,
+        including itself with similarity 1. The relation is symmetric, so this works from the
+        pantry side and the recipe side.
+        """
+        with self.lock:
+            if name is None:
+                name = self.names_by_id.get(ingredient_id, "")
+            matches = {}
+            if name in self.similar_names:
+                similar = self.similar_names[name]
+            else:
+                # Not indexed (yet), compare against the index directly
+                grams = trigrams(name)
+                similar = self.rank_similar(name, grams) if grams else {}
+            for other, similarity in similar.items():
+                for other_id in self.ids_by_name.get(other, ()):
+                    matches[other_id] = similarity
+            if name:
+                for other_id in self.ids_by_name.get(name, ()):
+                    matches[other_id] = 1.0
+        matches[ingredient_id] = 1.0
+        return matches
+
+    def matching_ingredients(self, ingredient_id, name=None):
+        """Return the ids of ingredients that can stand in for this one."""
+        return set(self.ranked_matches(ingredient_id, name))
+
+    def recipes_using(self, ingredient_ids):
+        recipe_ids = set()
+        with self.lock:
+            for ingredient_id in ingredient_ids:
+                recipe_ids.update(self.recipes_by_ingredient.get(ingredient_id, ()))
+        return recipe_ids
+
+    def ingredients_used_by(self, recipe_ids):
+        ingredient_ids = set()
+        with self.lock:
+            for recipe_id in recipe_ids:
+                ingredient_ids.update(self.ingredients_by_recipe.get(recipe_id, ()))
+        return ingredient_ids
+
+
+_index = IngredientIndex()
+
+
+def get_ingredient_index():
+    """Return the shared index, refreshed if the catalog changed since it was built."""
+    _index.refresh(get_catalog_version())
+    return _index
+
+
+def mark_catalog_changed(recipe_ids, ingredient_ids, version):
+    """Called by the catalog signals so in-process structures can refresh incrementally."""
+    _index.mark_changed(recipe_ids, ingredient_ids, version)
+    mark_matrix_changed(recipe_ids, ingredient_ids, version)
+
+
+def build_pantry(inventory):
+    """
+    Collapse inventory rows into {ingredient_id: {"name", "quantity", "unit", "density", "expires_at"}}
+    in inventory order.
+    """
+    pantry = {}
+    for item in inventory:
+        pantry[item.ingredient.id] = {
+            "name": item.ingredient.match_name,
+            "quantity": float(item.quantity),
+            "unit": item.unit,
+            "density": item.ingredient.density,
+            "expires_at": item.expires_at
+        }
+    return pantry
+
+
+def score_recipe(recipe, pantry, pantry_matches):
+    """
+    Match one recipe against the pantry.
+    pantry_matches maps a catalog ingredient id to the pantry ids that can stand in for it,
+    most similar first. Returns (can_make, missing_ingredients, matched_pantry_ids).
+    """
+    can_make = True
+    missing_ingredients = []
+    matched_pantry_ids = set()
+
+    for ri in recipe.recipe_ingredients.all():
+        if ri.quantity_value is None:
+            # Quantity could not be parsed when the row was written
+            can_make = False
+            continue
+        required_quantity = float(ri.quantity_value)
+
+        found_match = False
+        for pantry_id in pantry_matches.get(ri.ingredient_id, ()):
+            if pantry_id in matched_pantry_ids:
+                continue
+            available = pantry[pantry_id]
+            density = ri.ingredient.density or available["density"]
+            if not covers(available["quantity"], available["unit"], required_quantity, ri.unit, density):
+                can_make = False
+                missing_ingredients.append({
+                    "ingredient_name": ri.ingredient.ingredient_name,
+                    "required_quantity": required_quantity,
+                    "unit": ri.unit,
+                    "available_quantity": available["quantity"],
+                    "available_unit": available["unit"]
+                })
+            else:
+                matched_pantry_ids.add(pantry_id)
+            found_match = True
+            break
+
+        if not found_match:
+            can_make = False
+            missing_ingredients.append({
+                "ingredient_name": ri.ingredient.ingredient_name,
+                "required_quantity": required_quantity,
+                "unit": ri.unit
+            })
+
+    return can_make, missing_ingredients, matched_pantry_ids
+
+
+class PantryMatcher:
+    """Scores recipes against one user's pantry."""
+
+    def __init__(self, inventory, index=None):
+        self.index = index or get_ingredient_index()
+        self.pantry = build_pantry(inventory)
+        # Catalog ingredient id -> pantry ids that can stand in for it, most similar first
+        ranked = defaultdict(list)
+        for position, (pantry_id, item) in enumerate(self.pantry.items()):
+            for ingredient_id, similarity in self.index.ranked_matches(pantry_id, item["name"]).items():
+                ranked[ingredient_id].append((-similarity, position, pantry_id))
+        self.pantry_matches = {
+            ingredient_id: [pantry_id for _, _, pantry_id in sorted(candidates)]
+            for ingredient_id, candidates in ranked.items()
+        }
+
+    def candidate_recipe_ids(self):
+        """Ids of the recipes worth scoring exactly, using the configured SUGGESTION_BACKEND."""
+        if settings.SUGGESTION_BACKEND == "matrix":
+            # Credit each ingredient with its best pantry match, in base units. That makes the
+            # matrix's missing count a lower bound of score_recipe's, so no recipe that qualifies
+            # is filtered out. Matches in mixed dimensions are left to the exact scoring
+            available = {}
+            for ingredient_id, pantry_ids in self.pantry_matches.items():
+                amounts = [to_base(self.pantry[p]["quantity"], self.pantry[p]["unit"]) for p in pantry_ids]
+                dimensions = {dimension for dimension, _ in amounts}
+                available[ingredient_id] = (
+                    dimensions.pop() if len(dimensions) == 1 else None, max(amount for _, amount in amounts))
+            return get_recipe_matrix().candidates(available, MAX_MISSING_INGREDIENTS)
+        return self.index.recipes_using(self.pantry_matches.keys())
+
+    def score(self, recipe):
+        """
+        Return {"can_make", "missing_ingredients", "matched_count", "coverage", "expires_at"}
+        for a recipe worth suggesting, or None if it shares nothing or misses too much.
+        """
+        if not any(ri.ingredient_id in self.pantry_matches for ri in recipe.recipe_ingredients.all()):
+            return None
+        can_make, missing_ingredients, matched = score_recipe(recipe, self.pantry, self.pantry_matches)
+        if not (can_make or len(missing_ingredients) <= MAX_MISSING_INGREDIENTS):
+            return None
+        total = len(recipe.recipe_ingredients.all())
+        expiry_dates = [self.pantry[p]["expires_at"] for p in matched if self.pantry[p]["expires_at"]]
+        return {
+            "can_make": can_make,
+            "missing_ingredients": missing_ingredients,
+            "matched_count": len(matched),
+            "coverage": len(matched) / total if total else 0.0,
+            "expires_at": min(expiry_dates) if expiry_dates else None
+        }
+
+
+def recipes_for_scoring(recipe_ids):
+    """Recipes with the ingredient rows score_recipe reads, in a fixed number of queries."""
+    return Recipe.objects.filter(id__in=recipe_ids).prefetch_related(
+        Prefetch('recipe_ingredients', queryset=RecipeIngredient.objects.select_related('ingredient')))
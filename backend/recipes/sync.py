@@ -0,0 +1,111 @@
+"""
+Delta sync for clients that keep an offline copy of the user's data.
+
+Every synced model has an updated_at column, and deletes leave a SyncTombstone row
+(written by the post_delete receivers in signals.py) instead of the rows being kept with a
+deleted flag, so the existing queries do not have to filter deleted rows out. A sync returns
+the rows changed and the ids deleted since the client's token, plus a new token.
+
+Tokens hold the server time the sync started. Rows changed up to SYNC_OVERLAP_SECONDS before
+it are sent again, so a write whose transaction commits after a sync read it is not missed;
+clients apply rows by id, so repeats are harmless. Tokens older than the tombstone retention
+get a full sync, as the deletes in between may have been pruned.
+"""
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Recipe, SavedItem, ShoppingListItem, SyncTombstone, UserInventory, WeeklyPlan
+from .serializers import (
+    RecipeSerializer, SavedItemSerializer, ShoppingListItemSerializer, UserInventorySerializer,
+    WeeklyPlanSerializer
+)
+
+# Response key -> tombstone kind; the kinds are SyncTombstone.KIND_CHOICES
+SYNC_KINDS = {
+    "recipes": "recipe",
+    "saved_items": "saved_item",
+    "weekly_plan": "weekly_plan",
+    "inventory": "inventory",
+    "shopping_list": "shopping_list",
+}
+
+SERIALIZERS = {
+    "recipes": RecipeSerializer,
+    "saved_items": SavedItemSerializer,
+    "weekly_plan": WeeklyPlanSerializer,
+    "inventory": UserInventorySerializer,
+    "shopping_list": ShoppingListItemSerializer,
+}
+
+
+class InvalidSyncToken(ValueError):
+    pass
+
+
+def encode_sync_token(moment):
+    return base64.urlsafe_b64encode(f"s|{moment.isoformat()}".encode()).decode().rstrip("=")
+
+
+def decode_sync_token(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        kind, moment = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        moment = datetime.fromisoformat(moment)
+        if kind != "s" or moment.tzinfo is None:
+            raise ValueError(token)
+        return moment
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidSyncToken("Invalid sync token")
+
+
+def synced_querysets(user):
+    """Response key -> queryset of every row the user syncs, loaded like the list endpoints load them."""
+    return {
+        "recipes": Recipe.objects.with_details(),
+        "saved_items": SavedItem.objects.filter(user=user).select_related('recipe', 'user'),
+        "weekly_plan": WeeklyPlan.objects.filter(user=user).select_related('recipe'),
+        "inventory": UserInventory.objects.filter(user=user).select_related('ingredient'),
+        "shopping_list": ShoppingListItem.objects.filter(user=user).select_related('ingredient'),
+    }
+
+
+def changes_since(user, since, request=None):
+    """
+    Return the sync payload: the rows changed since the given time (everything when since is
+    None or older than the tombstone retention), the ids deleted since then, and a new token.
+    """
+    now = timezone.now()
+    full = since is None or since < now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    if not full:
+        since -= timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+
+    payload = {"token": encode_sync_token(now), "full": full}
+    for key, queryset in synced_querysets(user).items():
+        if not full:
+            queryset = queryset.filter(updated_at__gte=since)
+        payload[key] = SERIALIZERS[key](queryset, many=True, context={'request': request}).data
+
+    present = {key: {row["id"] for row in payload[key]} for key in SYNC_KINDS}
+    deleted = {key: [] for key in SYNC_KINDS}
+    if not full:
+        keys = {kind: key for key, kind in SYNC_KINDS.items()}
+        tombstones = SyncTombstone.objects.filter(
+            Q(user=user) | Q(kind=SyncTombstone.RECIPE), deleted_at__gte=since
+        ).order_by('id').values_list('kind', 'object_id')
+        for kind, object_id in tombstones:
+            # SQLite can reuse the id of a deleted row, the row sent above is the current one
+            if object_id not in present[keys[kind]]:
+                deleted[keys[kind]].append(object_id)
+    payload["deleted"] = deleted
+    return payload
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention; tokens that old get a full sync anyway."""
+    threshold = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    deleted, _ = SyncTombstone.objects.filter(deleted_at__lt=threshold).delete()
+    return deleted
@@ -0,0 +1,88 @@
+"""
+Unit conversion for ingredient quantities.
+
+Every known unit belongs to a dimension (volume, mass or count) and has a factor to the
+dimension's base unit (millilitres, grams, pieces). The alias table below is expanded once
+at import into UNIT_FACTORS, so converting a quantity is one dict lookup and a multiply.
+Volume and mass can be converted into each other with an ingredient's density (g/ml).
+
+Units that are not in the table are only comparable with the same unit spelled the same way.
+"""
+
+VOLUME = "volume"
+MASS = "mass"
+COUNT = "count"
+
+# unit -> (dimension, factor to the base unit), plus the other spellings of that unit
+_UNITS = {
+    "ml": (VOLUME, 1.0, ("milliliter", "millilitre", "mls")),
+    "l": (VOLUME, 1000.0, ("liter", "litre", "ltr")),
+    "tsp": (VOLUME, 4.92892159375, ("teaspoon", "tsps")),
+    "tbsp": (VOLUME, 14.78676478125, ("tablespoon", "tbs", "tbsps", "tbl")),
+    "fl oz": (VOLUME, 29.5735295625, ("fluid ounce", "floz")),
+    "cup": (VOLUME, 236.5882365, ("c",)),
+    "pint": (VOLUME, 473.176473, ("pt",)),
+    "quart": (VOLUME, 946.352946, ("qt",)),
+    "gallon": (VOLUME, 3785.411784, ("gal",)),
+    "g": (MASS, 1.0, ("gram", "gr", "gramme")),
+    "mg": (MASS, 0.001, ("milligram",)),
+    "kg": (MASS, 1000.0, ("kilogram", "kilo")),
+    "oz": (MASS, 28.3495, ("ounce",)),
+    "lb": (MASS, 453.592, ("pound", "lbs")),
+    "piece": (COUNT, 1.0, ("pc", "pcs", "each", "ea", "whole", "item", "unit", "count")),
+    "dozen": (COUNT, 12.0, ("doz",)),
+}
+
+
+def unit_key(unit):
+    """Case-folded, whitespace-collapsed unit with trailing dots removed."""
+    return " ".join(str(unit).split()).casefold().rstrip(".")
+
+
+def _build_factors():
+    factors = {}
+    for name, (dimension, factor, aliases) in _UNITS.items():
+        for alias in (name,) + aliases:
+            factors[alias] = (dimension, factor)
+            # Plurals: cups, grams, pieces, ounces
+            factors.setdefault(alias + "s", (dimension, factor))
+            factors.setdefault(alias + "es", (dimension, factor))
+    return factors
+
+
+# unit_key -> (dimension, factor to the base unit)
+UNIT_FACTORS = _build_factors()
+
+
+def lookup(unit):
+    """Return (dimension, factor). Unknown units get a dimension of their own with factor 1."""
+    key = unit_key(unit)
+    return UNIT_FACTORS.get(key, ("unit:" + key, 1.0))
+
+
+def to_base(quantity, unit):
+    """Return (dimension, quantity in the dimension's base unit)."""
+    dimension, factor = lookup(unit)
+    return dimension, quantity * factor
+
+
+def convert(quantity, from_unit, to_unit, density=None):
+    """
+    Convert quantity between units, going through density (g/ml) between volume and mass.
+    Returns None if the units cannot be converted.
+    """
+    from_dimension, from_factor = lookup(from_unit)
+    to_dimension, to_factor = lookup(to_unit)
+    value = quantity * from_factor
+    if from_dimension != to_dimension:
+        if not density or {from_dimension, to_dimension} != {VOLUME, MASS}:
+            return None
+        value = value * density if from_dimension == VOLUME else value / density
+    return value / to_factor
+
+
+def covers(available, available_unit, required, required_unit, density=None):
+    """True if the available quantity is at least the required one, False if less or not comparable."""
+    converted = convert(available, available_unit, required_unit, density)
+    # Relative tolerance so round trips through the factors do not flip the result
+    return converted is not None and converted >= required * (1 - 1e-9)
@@ -2,19 +2,24 @@ from django.conf.urls.static import static
 from django.conf import settings
 from django.urls import path
 from .views import (
-    register_user, login_user, get_recipes, add_recipe, update_recipe, delete_recipe,
-    get_user_info, export_user_data, save_recipe, get_saved_recipes, unsave_recipe,
+    register_user, login_user, get_recipes, get_recipe, add_recipe, update_recipe, delete_recipe,
+    get_user_info, export_user_data, start_user_export, user_export_status, download_user_export, save_recipe, get_saved_recipes, unsave_recipe,
     add_recipe_ingredient, add_to_weekly_plan, get_weekly_plan, clear_weekly_plan, clear_day_plan, log_login_event,
     request_account_deletion, get_user_inventory, add_to_inventory, update_inventory_item, delete_inventory_item, suggest_recipes,
     get_ingredients, add_to_shopping_list, get_shopping_list, update_shopping_list_item,
-    delete_shopping_list_item, add_missing_ingredients_to_shopping_list, reactivate_account
+    delete_shopping_list_item, add_missing_ingredients_to_shopping_list, reactivate_account,
+    shopping_list_from_weekly_plan_view, search_ingredients, search_recipes, similar_recipes, sync, user_snapshot
 )
 
 urlpatterns = [
     path("export-user-data/", export_user_data, name="export-user-data"),
+    path("export-user-data/jobs/", start_user_export, name="user-export-start"),
+    path("export-user-data/jobs/<uuid:job_id>/", user_export_status, name="user-export-status"),
+    path("export-user-data/jobs/<uuid:job_id>/download/", download_user_export, name="user-export-download"),
     path("register/", register_user, name="register"),
     path("login/", login_user, name="login"),
     path("user-info/", get_user_info, name="user-info"),
+    path("me/snapshot/", user_snapshot, name="user-snapshot"),
     path("", get_recipes, name="get_recipes"),
     path("add/", add_recipe, name="add_recipe"),
     path("update/<int:recipe_id>/", update_recipe, name="update_recipe"),
@@ -36,7 +41,11 @@ urlpatterns = [
     path('inventory/delete/<int:inventory_id>/',
          delete_inventory_item, name='delete_inventory_item'),
     path('recipes/suggest/', suggest_recipes, name='suggest_recipes'),
+    path('recipes/search/', search_recipes, name='search_recipes'),
+    path('recipes/<int:recipe_id>/', get_recipe, name='get_recipe'),
+    path('recipes/<int:recipe_id>/similar/', similar_recipes, name='similar_recipes'),
     path('ingredients/', get_ingredients, name='get_ingredients'),
+    path('ingredients/search/', search_ingredients, name='search_ingredients'),
     path('shopping-list/add/', add_to_shopping_list, name='add_to_shopping_list'),
     path('shopping-list/', get_shopping_list, name='get_shopping_list'),
     path('shopping-list/update/<int:item_id>/',
@@ -45,7 +54,12 @@ urlpatterns = [
          delete_shopping_list_item, name='delete_shopping_list_item'),
     path('shopping-list/add-missing/<int:recipe_id>/', add_missing_ingredients_to_shopping_list,
          name='add_missing_ingredients_to_shopping_list'),
+    path('shopping-list/add-missing/', add_missing_ingredients_to_shopping_list,
+         name='add_missing_ingredients_to_shopping_list_bulk'),
+    path('shopping-list/from-weekly-plan/', shopping_list_from_weekly_plan_view,
+         name='shopping_list_from_weekly_plan'),
     path('reactivate/', reactivate_account, name="reactivate-account"),
+    path('sync/', sync, name='sync'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,26 +1,40 @@
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django.core.files.storage import default_storage
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
 from rest_framework.parsers import MultiPartParser, JSONParser
 from rest_framework.decorators import api_view, parser_classes, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, WeeklyPlan, LoginEvent, UserDeletion, UserInventory, ShoppingListItem, AccountReactivation
-from .serializers import RecipeSerializer, UserRegisterSerializer, UserLoginSerializer, SavedItemSerializer, WeeklyPlanSerializer, UserInventorySerializer, IngredientSerializer, ShoppingListItemSerializer
-from django.http import JsonResponse, HttpResponse
-from fractions import Fraction
-import json
+from .models import Recipe, Ingredient, RecipeIngredient, FoodGroup, SavedItem, WeeklyPlan, UserDeletion, UserInventory, ShoppingListItem, AccountReactivation, PantryCoverage, UserExport, canonical_ingredient_name, parse_quantity
+from .serializers import RecipeSerializer, UserRegisterSerializer, UserLoginSerializer, SavedItemSerializer, WeeklyPlanSerializer, UserInventorySerializer, IngredientSerializer, ShoppingListItemSerializer, LoginEventSerializer
+from .authentication import refresh_token_for_user
+from .login_events import login_event_writer
+from .coverage import RANK_ORDER, ensure_user_coverage
+from .export import FORMATS as EXPORT_FORMATS, export_storage, start_export_job
+from .shopping import add_missing_to_shopping_list, shopping_list_from_weekly_plan
+from .caching import etag_matches, get_cached_suggestions, get_ingredient_version, set_cached_suggestions, suggestion_cache_key
+from .autocomplete import MAX_RESULTS, get_prefix_index
+from .search import search_recipe_ids
+from .similarity import similar_recipe_ids
+from .sync import InvalidSyncToken, changes_since, decode_sync_token
+from .pagination import InvalidCursor, decode_offset_cursor, encode_offset_cursor, get_page_size, paginate_keyset, wants_page
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
+import hashlib
 import logging
-import re
 
 logger = logging.getLogger(__name__)
 
 
 def get_tokens_for_user(user):
-    refresh = RefreshToken.for_user(user)
+    refresh = refresh_token_for_user(user)
     return {
         'refresh': str(refresh),
         'access': str(refresh.access_token),
@@ -30,35 +44,68 @@ def get_tokens_for_user(user):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def export_user_data(request):
+    """
+    Stream the user's full data: profile, login history, recipes and their ingredients,
+    saved items, weekly plan, pantry and shopping list. ?output=ndjson for one row per line.
+    """
+    output = request.query_params.get("output", "json")
+    if output not in EXPORT_FORMATS:
+        return Response({"error": "output must be json or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    generate, content_type, extension = EXPORT_FORMATS[output]
     user = request.user
-    user_data = {
-        "username": user.username,
-        "first_name": user.first_name,
-        "last_name": user.last_name,
-        "email": user.email,
-        "date_joined": user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
-    }
-    # Add login events (1000 last logins)
-    login_events = LoginEvent.objects.filter(username=user.username).order_by('-timestamp')[:1000]
-    user_data["login_attempts"] = [
-        {
-            "timestamp": event.timestamp.isoformat(),
-            "outcome": event.outcome,
-            "source": event.source,
-        }
-        for event in login_events
-    ]
-    response = HttpResponse(json.dumps(user_data, indent=4),
-                            content_type="application/json")
-    response['Content-Disposition'] = f'attachment; filename="{user.username}_data.json"'
+    response = StreamingHttpResponse(generate(user), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{user.username}_data.{extension}"'
     return response
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def start_user_export(request):
+    """Write the export to a file in the background; poll the returned status_url for the download link."""
+    output = request.data.get("output", "json")
+    if output not in EXPORT_FORMATS:
+        return Response({"error": "output must be json or ndjson"}, status=status.HTTP_400_BAD_REQUEST)
+    job = start_export_job(request.user, output)
+    return Response(user_export_data(request, job), status=status.HTTP_202_ACCEPTED)
+
+
+def user_export_data(request, job):
+    data = {
+        "id": str(job.id),
+        "status": job.status,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+        "status_url": request.build_absolute_uri(reverse("user-export-status", args=[job.id])),
+    }
+    if job.status == UserExport.DONE:
+        data["download_url"] = request.build_absolute_uri(reverse("user-export-download", args=[job.id]))
+    return data
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def user_export_status(request, job_id):
+    job = get_object_or_404(UserExport, id=job_id, user=request.user)
+    return Response(user_export_data(request, job))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_user_export(request, job_id):
+    job = get_object_or_404(UserExport, id=job_id, user=request.user, status=UserExport.DONE)
+    _, content_type, extension = EXPORT_FORMATS[job.output]
+    return FileResponse(export_storage.open(job.file_name, 'rb'), as_attachment=True,
+                        filename=f"{request.user.username}_data.{extension}", content_type=content_type)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_user_info(request):
-    user = request.user
-    return Response({"username": user.username})
+    return Response(user_info_data(request))
+
+
+def user_info_data(request):
+    return {"username": request.user.username}
 
 
 @api_view(["POST"])
@@ -123,7 +170,7 @@ def reactivate_account(request):
             if user.is_active:
                 return Response({"detail": "Account is already active."}, status=status.HTTP_400_BAD_REQUEST)
             user.is_active = True
-            user.save()
+            user.save(update_fields=["is_active"])
 
             #Remove already existing user deletion request
             UserDeletion.objects.filter(user=user).delete()
@@ -138,14 +185,55 @@ def reactivate_account(request):
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def get_recipes(request):
-    recipes = Recipe.objects.all()
+    recipes = Recipe.objects.with_details()
     if request.query_params.get('user') and request.user.is_authenticated:
         recipes = recipes.filter(user=request.user)
+    if wants_page(request):
+        # ?limit= and/or ?cursor= return one keyset page plus the token for the next one
+        try:
+            page, next_cursor = paginate_keyset(recipes, request)
+        except InvalidCursor:
+            return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = RecipeSerializer(
+            page, many=True, context={'request': request})
+        return Response({"results": serializer.data, "next_cursor": next_cursor})
     serializer = RecipeSerializer(
         recipes, many=True, context={'request': request})
     return Response(serializer.data)
 
 
+def recipe_validators(recipe_id, updated_at):
+    """ETag and Last-Modified headers for a recipe last changed at updated_at."""
+    return {
+        "ETag": quote_etag(f"recipe-{recipe_id}-{int(updated_at.timestamp() * 1000000)}"),
+        "Last-Modified": http_date(updated_at.timestamp()),
+    }
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def get_recipe(request, recipe_id):
+    """
+    One recipe with its ingredients. Responses carry an ETag and Last-Modified from
+    updated_at, and a matching If-None-Match (or If-Modified-Since) gets a 304 after one query.
+    """
+    updated_at = Recipe.objects.filter(id=recipe_id).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return Response({"error": "Recipe not found"}, status=status.HTTP_404_NOT_FOUND)
+    headers = recipe_validators(recipe_id, updated_at)
+    if "If-None-Match" in request.headers:
+        not_modified = etag_matches(request, headers["ETag"])
+    else:
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        not_modified = since is not None and int(updated_at.timestamp()) <= since
+    if not_modified:
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    recipe = get_object_or_404(Recipe.objects.with_details(), id=recipe_id)
+    serializer = RecipeSerializer(recipe, context={'request': request})
+    return Response(serializer.data, headers=recipe_validators(recipe.id, recipe.updated_at))
+
+
 @api_view(["POST"])
 @parser_classes([JSONParser, MultiPartParser])
 @permission_classes([IsAuthenticated])
@@ -156,6 +244,7 @@ def add_recipe(request):
         validated_data = serializer.validated_data
         validated_data['user'] = request.user
         recipe = serializer.save()
+        recipe = Recipe.objects.with_details().get(id=recipe.id)
         return Response(RecipeSerializer(recipe, context={'request': request}).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -171,13 +260,19 @@ def add_recipe_ingredient(request):
     if not all([recipe_id, ingredient_name, quantity, unit]):
         return Response({"error": "recipe_id, ingredient_name, quantity, and unit are required"}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        parse_quantity(quantity)
+    except ValueError:
+        return Response({"error": "Invalid quantity format. Use values like '1', '1/2', or '1 1/2'."}, status=status.HTTP_400_BAD_REQUEST)
+
     recipe = get_object_or_404(Recipe, id=recipe_id, user=request.user)
     ingredient, _ = Ingredient.objects.get_or_create(
-        ingredient_name=ingredient_name)
+        canonical_name=canonical_ingredient_name(ingredient_name),
+        defaults={'ingredient_name': ingredient_name.strip()})
     recipe_ingredient = RecipeIngredient.objects.create(
         recipe=recipe,
         ingredient=ingredient,
-        quantity=quantity,
+        quantity=str(quantity).strip(),
         unit=unit
     )
     return Response({"message": "Ingredient added"}, status=status.HTTP_201_CREATED)
@@ -193,8 +288,9 @@ def update_recipe(request, recipe_id):
     serializer = RecipeSerializer(
         recipe, data=request.data, partial=True, context={'request': request})
     if serializer.is_valid():
-        serializer.save()
-        return Response(serializer.data)
+        recipe = serializer.save()
+        recipe = Recipe.objects.with_details().get(id=recipe.id)
+        return Response(RecipeSerializer(recipe, context={'request': request}).data)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -236,11 +332,14 @@ def save_recipe(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_saved_recipes(request):
-    user = request.user
-    saved_items = SavedItem.objects.filter(user=user).select_related('recipe')
+    return Response(saved_recipes_data(request))
+
+
+def saved_recipes_data(request):
+    saved_items = SavedItem.objects.filter(user=request.user).select_related('recipe', 'user')
     serializer = SavedItemSerializer(
         saved_items, many=True, context={'request': request})
-    return Response(serializer.data)
+    return serializer.data
 
 
 @api_view(["DELETE"])
@@ -290,8 +389,12 @@ def add_to_weekly_plan(request):
 @permission_classes([IsAuthenticated])
 def get_weekly_plan(request):
     """Fetch the weekly plan for the authenticated user."""
-    user = request.user
-    plans = WeeklyPlan.objects.filter(user=user).select_related('recipe')
+    return Response(weekly_plan_data(request))
+
+
+def weekly_plan_data(request):
+    """The user's planned meals grouped by day."""
+    plans = WeeklyPlan.objects.filter(user=request.user).select_related('recipe')
     serializer = WeeklyPlanSerializer(
         plans, many=True, context={'request': request})
     # Group by day
@@ -301,7 +404,7 @@ def get_weekly_plan(request):
         if day not in plan_by_day:
             plan_by_day[day] = []
         plan_by_day[day].append(plan)
-    return Response(plan_by_day)
+    return plan_by_day
 
 
 @api_view(["DELETE"])
@@ -325,20 +428,17 @@ def clear_day_plan(request, day):
 @api_view(['POST'])
 def log_login_event(request):
     # Log a login event without authentication requirement
-    username = request.data.get('username')
-    outcome = request.data.get('outcome')
-    # Default to 'unknown' if not provided
-    source = request.data.get('source', 'unknown')
-
-    if not username or not outcome:
-        return Response({'error': 'Username and outcome are required'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = LoginEventSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    LoginEvent.objects.create(
-        username=username,
-        outcome=outcome,
-        source=source
-    )
-    return Response({'message': 'Login event logged'}, status=status.HTTP_201_CREATED)
+    if not settings.LOGIN_EVENT_BUFFERED:
+        serializer.save()
+        return Response({'message': 'Login event logged'}, status=status.HTTP_201_CREATED)
+    if not login_event_writer.record(**serializer.validated_data):
+        return Response({'error': 'Too many login events, try again later'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '5'})
+    return Response({'message': 'Login event queued'}, status=status.HTTP_202_ACCEPTED)
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
@@ -348,9 +448,9 @@ def request_account_deletion(request):
     if hasattr(user, 'deletion_request'):
         return Response({"error": "You have already requested account deletion. It will delete in 6 months from the time you deleted your account."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Mark user as inactive
+    # Mark user as inactive. request.user may be a cached copy, so only is_active is written
     user.is_active = False
-    user.save()
+    user.save(update_fields=["is_active"])
 
     # Create deletion request record
     UserDeletion.objects.create(user=user)
@@ -360,7 +460,7 @@ def request_account_deletion(request):
         username="basilandbyte",
         defaults={"email":"admin@basilandbyte.com","password":User.objects.make_random_password()}
     )
-    Recipe.objects.filter(user=user).update(user=basil_byte_user)
+    Recipe.objects.filter(user=user).update(user=basil_byte_user, updated_at=timezone.now())
 
     return Response({"message": "Account deletion requested successfully. Your account will be permanently deleted after 6 months."}, status=status.HTTP_200_OK)
 
@@ -371,12 +471,15 @@ def request_account_deletion(request):
 @permission_classes([IsAuthenticated])
 def get_user_inventory(request):
     """Fetch all inventory items for the authenticated user."""
-    user = request.user
+    return Response(inventory_data(request))
+
+
+def inventory_data(request):
     inventory_items = UserInventory.objects.filter(
-        user=user).select_related('ingredient')
+        user=request.user).select_related('ingredient')
     serializer = UserInventorySerializer(
         inventory_items, many=True, context={'request': request})
-    return Response(serializer.data)
+    return serializer.data
 
 
 # In backend/recipes/views.py (only add_to_inventory)
@@ -399,7 +502,7 @@ def add_to_inventory(request):
         if not quantity_display:
             return Response({"error": "quantity_display is required"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            quantity_parsed = float(Fraction(quantity_display))
+            quantity_parsed = parse_quantity(quantity_display)
         except Exception:
             return Response({"error": "Invalid quantity format. Use values like '1', '1/2', or '1 1/2'."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -440,7 +543,7 @@ def update_inventory_item(request, inventory_id):
     if "quantity_display" in data:
         quantity_display = data.get("quantity_display", "").strip()
         try:
-            quantity_parsed = float(Fraction(quantity_display))
+            quantity_parsed = parse_quantity(quantity_display)
         except Exception:
             return Response({"error":"Invalid quantity format. Use values like '1', '1/2', or '1 1/2'."}, status=status.HTTP_400_BAD_REQUEST)
         data["quantity"] = quantity_parsed
@@ -465,113 +568,140 @@ def delete_inventory_item(request, inventory_id):
     return Response({"message": "Inventory item deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
 
 
-def convert_units(quantity, from_unit, to_unit):
-    # Simple conversion table (expand as needed)
-    conversions = {
-        # Approximate, depends on ingredient
-        ('grams', 'cups'): lambda q: q / 240,
-        ('cups', 'grams'): lambda q: q * 240,
-    }
-    if from_unit == to_unit:
-        return quantity
-    key = (from_unit, to_unit)
-    if key in conversions:
-        return conversions[key](quantity)
-    return None  # No conversion available
-
-
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def suggest_recipes(request):
-    """Suggest recipes based on user's inventory with fuzzy name matching."""
+    """
+    Suggest recipes for the user's pantry, best covered first, read from the user's ranked
+    PantryCoverage rows instead of scoring the catalog. Offset pages with ?limit= / ?cursor=
+    when asked; they stand in for streaming the response, so plain-list clients keep working.
+    """
     user = request.user
-    inventory = UserInventory.objects.filter(user=user, is_available=True)
-    if not inventory.exists():
-        return Response({"message": "No items in inventory to suggest recipes", "suggested_recipes": []}, status=status.HTTP_200_OK)
-
-    # Normalize inventory
-    inventory_dict = {}
-    for item in inventory:
-        name = item.ingredient.ingredient_name.lower()
-        name = re.sub(r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b',
-                      '', name, flags=re.IGNORECASE).strip()
-        inventory_dict[item.ingredient.id] = {
-            "name": name,
-            "quantity": float(item.quantity),
-            "unit": item.unit
+    paginate = wants_page(request)
+    try:
+        offset = decode_offset_cursor(request.query_params['cursor']) if 'cursor' in request.query_params else 0
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = get_page_size(request, default=settings.SUGGESTION_PAGE_SIZE) if paginate else None
+
+    # Repeat requests are a cache read until the user's inventory or the catalog changes
+    cache_key = f"{suggestion_cache_key(user.id)}:{offset}:{limit}"
+    payload = get_cached_suggestions(cache_key)
+    if payload is not None:
+        return Response(payload, status=status.HTTP_200_OK)
+
+    inventory_count = UserInventory.objects.filter(user=user, is_available=True).count()
+    if not inventory_count:
+        payload = {"message": "No items in inventory to suggest recipes", "suggested_recipes": []}
+        set_cached_suggestions(cache_key, payload)
+        return Response(payload, status=status.HTTP_200_OK)
+
+    # Scores are kept up to date by the signals, so a page is one ordered range scan, see coverage.py
+    ensure_user_coverage(user)
+    ranked = PantryCoverage.objects.filter(user=user).order_by(*RANK_ORDER).select_related('recipe__user').prefetch_related(
+        Prefetch('recipe__recipe_ingredients', queryset=RecipeIngredient.objects.select_related('ingredient')))
+    if paginate:
+        page = list(ranked[offset:offset + limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+    else:
+        page = list(ranked)
+        has_more = False
+    suggested_recipes = [
+        {
+            "recipe": RecipeSerializer(row.recipe, context={'request': request}).data,
+            "can_make": row.can_make,
+            "missing_ingredients": row.missing_ingredients
         }
+        for row in page
+    ]
+    payload = {
+        "suggested_recipes": suggested_recipes,
+        "inventory_count": inventory_count
+    }
+    if paginate:
+        payload["next_cursor"] = encode_offset_cursor(offset + limit) if has_more else None
+    set_cached_suggestions(cache_key, payload)
+    return Response(payload, status=status.HTTP_200_OK)
 
-    recipes = Recipe.objects.all().prefetch_related('recipe_ingredients__ingredient')
-    suggested_recipes = []
 
-    for recipe in recipes:
-        recipe_ingredients = recipe.recipe_ingredients.all()
-        can_make = True
-        missing_ingredients = []
-        matched_ingredient_ids = set()
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_recipes(request):
+    """Full-text search over recipe names, descriptions, instructions and ingredients, best match first."""
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        offset = decode_offset_cursor(request.query_params['cursor']) if 'cursor' in request.query_params else 0
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    limit = get_page_size(request)
 
-        for ri in recipe_ingredients:
-            try:
-                required_quantity = float(Fraction(ri.quantity.strip()))
-            except Exception as e:
-                logger.warning(
-                    f"Skipping ingredient '{ri.ingredient.ingredient_name}' in recipe '{recipe.recipe_name}' due to invalid quantity '{ri.quantity}': {e}")
-                can_make = False
-                continue
-
-            normalized_name = re.sub(
-                r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b',
-                '', ri.ingredient.ingredient_name.lower(),
-                flags=re.IGNORECASE
-            ).strip()
-
-            found_match = False
-            for inv_id, inv in inventory_dict.items():
-                if inv_id == ri.ingredient.id or normalized_name in inv["name"] or inv["name"] in normalized_name:
-                    if inv_id in matched_ingredient_ids:
-                        continue
-                    if inv["quantity"] < required_quantity:
-                        can_make = False
-                        missing_ingredients.append({
-                            "ingredient_name": ri.ingredient.ingredient_name,
-                            "required_quantity": required_quantity,
-                            "unit": ri.unit,
-                            "available_quantity": inv["quantity"],
-                            "available_unit": inv["unit"]
-                        })
-                    else:
-                        matched_ingredient_ids.add(inv_id)
-                    found_match = True
-                    break
-
-            if not found_match:
-                can_make = False
-                missing_ingredients.append({
-                    "ingredient_name": ri.ingredient.ingredient_name,
-                    "required_quantity": required_quantity,
-                    "unit": ri.unit
-                })
-
-        if can_make or (len(missing_ingredients) <= 2):
-            suggested_recipes.append({
-                "recipe": RecipeSerializer(recipe, context={'request': request}).data,
-                "can_make": can_make,
-                "missing_ingredients": missing_ingredients
-            })
-
-    suggested_recipes.sort(key=lambda x: x["can_make"], reverse=True)
-    return Response({
-        "suggested_recipes": suggested_recipes,
-        "inventory_count": inventory.count()
-    }, status=status.HTTP_200_OK)
+    # Fetch one extra id to know whether there is a next page
+    recipe_ids = search_recipe_ids(query, offset, limit + 1)
+    recipes = Recipe.objects.with_details().in_bulk(recipe_ids[:limit])
+    page = [recipes[recipe_id] for recipe_id in recipe_ids[:limit] if recipe_id in recipes]
+    serializer = RecipeSerializer(page, many=True, context={'request': request})
+    next_cursor = encode_offset_cursor(offset + limit) if len(recipe_ids) > limit else None
+    return Response({"results": serializer.data, "next_cursor": next_cursor})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def similar_recipes(request, recipe_id):
+    """Recipes with the most ingredients in common with this one, by estimated Jaccard similarity."""
+    get_object_or_404(Recipe.objects.only('id'), id=recipe_id)
+    limit = get_page_size(request, default=settings.SIMILAR_RECIPES_DEFAULT)
+
+    ranked = similar_recipe_ids(recipe_id, limit)
+    recipes = Recipe.objects.with_details().in_bulk([other_id for other_id, _ in ranked])
+    results = [
+        {"recipe": RecipeSerializer(recipes[other_id], context={'request': request}).data,
+         "similarity": round(similarity, 3)}
+        for other_id, similarity in ranked if other_id in recipes
+    ]
+    return Response({"results": results})
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def get_ingredients(request):
-    ingredients = Ingredient.objects.all()
-    serializer = IngredientSerializer(ingredients, many=True)
-    return Response(serializer.data)
+    """
+    List ingredients, paged with ?limit= / ?cursor= when asked.
+    Responses carry an ETag of the ingredient version, and are cached under it.
+    """
+    etag = quote_etag("ingredients-{}-{}".format(
+        get_ingredient_version(), hashlib.md5(request.GET.urlencode().encode()).hexdigest()[:12]))
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    cache_key = f"ingredients:{etag}"
+    payload = cache.get(cache_key)
+    if payload is None:
+        ingredients = Ingredient.objects.all()
+        if wants_page(request):
+            try:
+                page, next_cursor = paginate_keyset(ingredients, request)
+            except InvalidCursor:
+                return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+            payload = {"results": IngredientSerializer(page, many=True).data, "next_cursor": next_cursor}
+        else:
+            payload = IngredientSerializer(ingredients, many=True).data
+        cache.set(cache_key, payload)
+    return Response(payload, headers={"ETag": etag})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_ingredients(request):
+    """Autocomplete ingredient names from ?q=, served from the in-process prefix index."""
+    query = request.query_params.get("q", "")
+    limit = get_page_size(request, default=10, maximum=MAX_RESULTS)
+    results = get_prefix_index().search(query, limit)
+    return Response({"results": [
+        {"id": ingredient_id, "ingredient_name": name} for ingredient_id, name in results
+    ]})
 
 
 @api_view(["POST"])
@@ -616,12 +746,15 @@ def add_to_shopping_list(request):
 @permission_classes([IsAuthenticated])
 def get_shopping_list(request):
     """Fetch all shopping list items for the authenticated user."""
-    user = request.user
+    return Response(shopping_list_data(request))
+
+
+def shopping_list_data(request):
     items = ShoppingListItem.objects.filter(
-        user=user).select_related('ingredient')
+        user=request.user).select_related('ingredient')
     serializer = ShoppingListItemSerializer(
         items, many=True, context={'request': request})
-    return Response(serializer.data)
+    return serializer.data
 
 
 @api_view(["PUT"])
@@ -648,62 +781,84 @@ def delete_shopping_list_item(request, item_id):
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
-def add_missing_ingredients_to_shopping_list(request, recipe_id):
-    """Add missing ingredients from a saved recipe to the shopping list."""
+def shopping_list_from_weekly_plan_view(request):
+    """Add everything the weekly plan needs beyond the pantry to the shopping list, merged per ingredient and unit."""
+    created, updated = shopping_list_from_weekly_plan(request.user)
+    serializer = ShoppingListItemSerializer(created + updated, many=True)
+    return Response({
+        "message": "Shopping list updated from weekly plan",
+        "created": len(created),
+        "updated": len(updated),
+        "items": serializer.data
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def add_missing_ingredients_to_shopping_list(request, recipe_id=None):
+    """
+    Add missing ingredients from saved recipes to the shopping list.
+    Takes one recipe in the URL or several as {"recipe_ids": [...]} in the body.
+    """
     user = request.user
-    saved_item = get_object_or_404(SavedItem, recipe_id=recipe_id, user=user)
-    recipe = saved_item.recipe
-    inventory = UserInventory.objects.filter(user=user, is_available=True)
-    inventory_dict = {}
-    for item in inventory:
-        name = item.ingredient.ingredient_name.lower()
-        name = re.sub(r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b',
-                      '', name, flags=re.IGNORECASE).strip()
-        inventory_dict[item.ingredient.id] = {
-            "name": name,
-            "quantity": float(item.quantity),
-            "unit": item.unit
-        }
-    recipe_ingredients = recipe.recipe_ingredients.all()
-    added_items = []
-    for ri in recipe_ingredients:
-        ingredient_id = ri.ingredient.id
+    if recipe_id is not None:
+        recipe_ids = {recipe_id}
+    else:
+        recipe_ids = request.data.get("recipe_ids")
+        if not isinstance(recipe_ids, list) or not recipe_ids:
+            return Response({"error": "recipe_ids must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            required_quantity = float(Fraction(ri.quantity.strip()))
-        except Exception as e:
-            logger.warning(f"Invalid quantity '{ri.quantity}' in recipe {recipe.id}: {e}")
-            continue
-        required_unit = ri.unit
-        recipe_name = ri.ingredient.ingredient_name.lower()
-        normalized_recipe_name = re.sub(
-            r'\b(finely|shredded|cooked|boneless|skinless|chopped|sliced)\b', '', recipe_name, flags=re.IGNORECASE).strip()
-        found_match = False
-        for inv_id, inv_data in inventory_dict.items():
-            if inv_id == ingredient_id or normalized_recipe_name in inv_data["name"] or inv_data["name"] in normalized_recipe_name:
-                available_quantity = inv_data["quantity"]
-                if available_quantity >= required_quantity:
-                    found_match = True
-                break
-        if not found_match:
-            # Check if already in shopping list
-            existing_item = ShoppingListItem.objects.filter(
-                user=user, ingredient=ri.ingredient, is_purchased=False
-            ).first()
-            if existing_item:
-                continue  # Skip duplicates
-            data = {
-                "ingredient": ingredient_id,
-                "quantity": required_quantity,
-                "unit": required_unit,
-                "is_purchased": False,
-            }
-            serializer = ShoppingListItemSerializer(
-                data=data, context={'request': request})
-            if serializer.is_valid():
-                item = serializer.save(user=user)
-                added_items.append(serializer.data)
-            else:
-                logger.error(
-                    f"ShoppingListItem validation failed: {serializer.errors}")
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    return Response({"message": "Added missing ingredients", "items": added_items}, status=status.HTTP_201_CREATED)
+            recipe_ids = {int(r) for r in recipe_ids}
+        except (TypeError, ValueError):
+            return Response({"error": "recipe_ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+    saved_ids = set(SavedItem.objects.filter(
+        user=user, recipe_id__in=recipe_ids).values_list('recipe_id', flat=True))
+    if saved_ids != recipe_ids:
+        return Response({"error": "Recipe not found in saved recipes"}, status=status.HTTP_404_NOT_FOUND)
+
+    items = add_missing_to_shopping_list(user, recipe_ids)
+    serializer = ShoppingListItemSerializer(items, many=True)
+    return Response({"message": "Added missing ingredients", "items": serializer.data}, status=status.HTTP_201_CREATED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Rows of the user's recipes, saved items, weekly plan, pantry and shopping list changed since
+    ?since=<token>, with the ids deleted since then. Without a token everything is returned.
+    Clients keep the returned token for the next call.
+    """
+    since = None
+    if request.query_params.get("since"):
+        try:
+            since = decode_sync_token(request.query_params["since"])
+        except InvalidSyncToken:
+            return Response({"error": "Invalid sync token"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(changes_since(request.user, since, request))
+
+
+# Snapshot section -> the data its own endpoint returns
+SNAPSHOT_SECTIONS = {
+    "user_info": user_info_data,
+    "inventory": inventory_data,
+    "shopping_list": shopping_list_data,
+    "weekly_plan": weekly_plan_data,
+    "saved_recipes": saved_recipes_data,
+}
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def user_snapshot(request):
+    """
+    What user-info/, inventory/, shopping-list/, weekly-plan/ and saved-recipes/ return, in one
+    response and one query per list section. ?include=inventory,shopping_list picks sections.
+    """
+    include = request.query_params.get("include")
+    sections = [name.strip() for name in include.split(",") if name.strip()] if include else list(SNAPSHOT_SECTIONS)
+    unknown = [name for name in sections if name not in SNAPSHOT_SECTIONS]
+    if unknown:
+        return Response({"error": f"Unknown sections: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({name: SNAPSHOT_SECTIONS[name](request) for name in sections})
@@ -0,0 +1,27 @@
+from django.test import TransactionTestCase
+from recipes.models import Recipe, RecipeIngredient
+
+
+def create_recipe(user, name, ingredients, unit="pieces", description="Test description",
+                  instructions="Test instructions"):
+    """
+    Create a recipe with its ingredient rows. ingredients holds (ingredient, quantity) or
+    (ingredient, quantity, unit) tuples, or bare ingredients, which get a quantity of 1.
+    """
+    recipe = Recipe.objects.create(user=user, recipe_name=name, description=description, instructions=instructions)
+    for entry in ingredients:
+        if not isinstance(entry, tuple):
+            entry = (entry, "1")
+        ingredient, quantity, entry_unit = entry if len(entry) == 3 else entry + (unit,)
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=quantity, unit=entry_unit)
+    return recipe
+
+
+class CommittingTestCase(TransactionTestCase):
+    """
+    For tests that need their writes committed. Cache versions are bumped in on_commit
+    callbacks, which never run inside TestCase's wrapping transaction. Sequences are reset
+    so ids restart for each test like they do in TestCase, which keeps ids from an earlier
+    test out of the in-process indexes.
+    """
+    reset_sequences = True
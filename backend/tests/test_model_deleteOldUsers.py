@@ -0,0 +1,78 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from recipes.management.commands.delete_old_users import Command
+from recipes.models import (
+    Recipe, Ingredient, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, UserDeletion, SyncTombstone
+)
+
+class DeleteOldUsersCommandTest(TestCase):
+    def setUp(self):
+        """Set up three users past the deletion window, one inside it and one keeping their account"""
+        self.keeper = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.recipe = Recipe.objects.create(user=self.keeper, recipe_name="Tomato Salad",
+                                            description="Test description", instructions="Test instructions")
+        self.old_users = [self.create_user(f"old_user_{i}", days_ago=200) for i in range(3)]
+        self.recent_user = self.create_user("recent_user", days_ago=10)
+
+    def create_user(self, username, days_ago):
+        user = User.objects.create_user(username=username, password="dbbytes_basil", is_active=False)
+        UserDeletion.objects.create(user=user, delete_request_time=timezone.now() - timedelta(days=days_ago))
+        SavedItem.objects.create(user=user, recipe=self.recipe)
+        WeeklyPlan.objects.create(user=user, recipe=self.recipe, day="Monday", meal_type="Lunch")
+        UserInventory.objects.create(user=user, ingredient=self.tomato, quantity_display="1", quantity=1, unit="pieces")
+        ShoppingListItem.objects.create(user=user, ingredient=self.tomato, quantity=1, unit="pieces")
+        return user
+
+    def run_command(self, *args):
+        out = StringIO()
+        call_command("delete_old_users", *args, stdout=out)
+        return out.getvalue()
+
+    def test_purges_old_users_in_batches(self):
+        """Test that users past the window and their rows are deleted, reporting the real count"""
+        output = self.run_command("--batch-size", "2")
+        self.assertIn("Deleted 2 of 3 user(s)", output)
+        self.assertIn("Deleted 3 user(s).", output)
+        self.assertEqual(set(User.objects.values_list("username", flat=True)), {"capstone_user", "recent_user"})
+        for model in (SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, UserDeletion):
+            self.assertEqual(model.objects.count(), 1, model.__name__)
+        # The keeper's recipe stays, and rows only deleted users could see leave no tombstones
+        self.assertTrue(Recipe.objects.filter(id=self.recipe.id).exists())
+        self.assertEqual(SyncTombstone.objects.count(), 0)
+
+    def test_dry_run(self):
+        """Test that a dry run reports the counts and deletes nothing"""
+        output = self.run_command("--dry-run")
+        self.assertIn("Would delete 3 user(s)", output)
+        self.assertIn("shopping list items: 3", output.lower())
+        self.assertEqual(User.objects.count(), 5)
+
+    def test_resume_after_failure(self):
+        """Test that a failed batch rolls back alone and a rerun finishes the rest"""
+        original = Command.delete_batch
+        calls = []
+
+        def fail_second(command, user_ids):
+            calls.append(user_ids)
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            original(command, user_ids)
+
+        with mock.patch.object(Command, "delete_batch", fail_second):
+            with self.assertRaises(CommandError):
+                self.run_command("--batch-size", "1")
+        self.assertEqual(UserDeletion.objects.count(), 3)
+
+        self.assertIn("Deleted 2 user(s).", self.run_command())
+        self.assertEqual(UserDeletion.objects.count(), 1)
+
+    def test_nothing_to_delete(self):
+        """Test the message when no deletion is due"""
+        self.assertIn("No Accounts to Delete.", self.run_command("--days", "365"))
@@ -20,3 +20,14 @@ class IngredientModelTest(TestCase):
     def test_ingredient_string(self):
         """Test the returned string with the ingredient name"""
         self.assertEqual(str(self.ingredient), "Tomato")
+
+    def test_ingredient_canonical_name(self):
+        """Test that the lookup and matching names are computed on save"""
+        ingredient = Ingredient.objects.create(ingredient_name="  Finely  Chopped Onion ")
+        self.assertEqual(ingredient.canonical_name, "finely chopped onion")
+        self.assertEqual(ingredient.match_name, "onion")
+
+    def test_ingredient_unique_ignoring_case(self):
+        """Test that ingredient names are unique case-insensitively"""
+        with self.assertRaises(Exception):
+            Ingredient.objects.create(ingredient_name="tomato")
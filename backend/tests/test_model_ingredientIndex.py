@@ -0,0 +1,65 @@
+from django.test import TestCase, override_settings
+from recipes.models import Ingredient
+from recipes.suggestions import IngredientIndex, trigrams
+
+class IngredientIndexTest(TestCase):
+    def setUp(self):
+        """Set up a few ingredients with overlapping names"""
+        for name in ["Oil", "Olive Oil", "Boil-in-bag Rice", "Onion", "Chopped Onion", "Red Onion", "Tomatoes"]:
+            Ingredient.objects.create(ingredient_name=name)
+        self.index = IngredientIndex()
+        self.index.load_all()
+
+    def ids(self, *names):
+        return {Ingredient.objects.get(ingredient_name=name).id for name in names}
+
+    def matches(self, name):
+        return self.index.matching_ingredients(Ingredient.objects.get(ingredient_name=name).id)
+
+    def test_trigrams(self):
+        """Test that words are padded like pg_trgm"""
+        self.assertEqual(trigrams("oil"), {"  o", " oi", "oil", "il "})
+
+    def test_no_substring_false_positives(self):
+        """Test that "oil" matches "olive oil" but not "boil" """
+        self.assertEqual(self.matches("Oil"), self.ids("Oil", "Olive Oil"))
+
+    def test_no_prefix_false_positives(self):
+        """Test that names sharing only a word prefix do not stand in for each other"""
+        for short, long in [("Egg", "Eggplant"), ("Butter", "Butternut Squash"), ("Corn", "Popcorn"),
+                            ("Pea", "Peanut"), ("Chicken", "Chickpea")]:
+            Ingredient.objects.create(ingredient_name=short)
+            Ingredient.objects.create(ingredient_name=long)
+        self.index.load_all()
+        for short, long in [("Egg", "Eggplant"), ("Butter", "Butternut Squash"), ("Corn", "Popcorn"),
+                            ("Pea", "Peanut"), ("Chicken", "Chickpea")]:
+            self.assertEqual(self.matches(short), self.ids(short), short)
+            self.assertEqual(self.matches(long), self.ids(long), long)
+
+    def test_plural_matches(self):
+        """Test that a plural still matches its singular as a whole word"""
+        Ingredient.objects.create(ingredient_name="Egg")
+        Ingredient.objects.create(ingredient_name="Eggs")
+        self.index.load_all()
+        self.assertEqual(self.matches("Egg"), self.ids("Egg", "Eggs"))
+
+    def test_ranked(self):
+        """Test that the same match name ranks first, then closer names"""
+        onion = Ingredient.objects.get(ingredient_name="Onion").id
+        ranked = self.index.ranked_matches(onion)
+        self.assertEqual(ranked[self.ids("Chopped Onion").pop()], 1.0)
+        self.assertLess(ranked[self.ids("Red Onion").pop()], 1.0)
+        self.assertNotIn(self.ids("Oil").pop(), ranked)
+
+    def test_new_ingredient_is_matched(self):
+        """Test that an ingredient loaded incrementally is matched both ways"""
+        tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.index.apply_changes((), (tomato.id,))
+        self.assertIn(tomato.id, self.matches("Tomatoes"))
+        self.assertIn(self.ids("Tomatoes").pop(), self.index.matching_ingredients(tomato.id))
+
+    @override_settings(INGREDIENT_MATCH_THRESHOLD=0.7)
+    def test_threshold(self):
+        """Test that the threshold setting controls how close a match must be"""
+        self.index.load_all()
+        self.assertEqual(self.matches("Oil"), self.ids("Oil"))
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.contrib.auth.models import User
 from recipes.models import Recipe, Ingredient, RecipeIngredient, FoodGroup
@@ -36,3 +37,23 @@ class RecipeIngredientModels(TestCase):
     def test_recipe_ingredient_string(self):
         expect_str = "Tomato Salad - Tomato"
         self.assertEqual(str(self.recipe_ingredient), expect_str)
+
+    def test_recipe_ingredient_quantity_value(self):
+        """Test that the display quantity is parsed once on save"""
+        self.assertEqual(self.recipe_ingredient.quantity_value, 2)
+        self.recipe_ingredient.quantity = "1 1/2"
+        self.recipe_ingredient.save()
+        self.recipe_ingredient.refresh_from_db()
+        self.assertEqual(float(self.recipe_ingredient.quantity_value), 1.5)
+
+    def test_recipe_ingredient_invalid_quantity(self):
+        """Test that a quantity which cannot be parsed fails validation but still saves without a value"""
+        row = RecipeIngredient(recipe=self.recipe, ingredient=self.ingredient, quantity="a handful", unit="pieces")
+        with self.assertRaises(ValidationError) as raised:
+            row.full_clean()
+        self.assertIn("quantity", raised.exception.message_dict)
+
+        # Legacy rows like this one must stay editable, so save() does not raise
+        row.save()
+        row.refresh_from_db()
+        self.assertIsNone(row.quantity_value)
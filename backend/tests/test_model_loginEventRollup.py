@@ -0,0 +1,45 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from recipes.models import LoginEvent, LoginEventDailyCount
+
+class LoginEventRollupTest(TestCase):
+    def setUp(self):
+        """Set up old and recent login events for two users"""
+        self.old = timezone.now() - timedelta(days=100)
+        for _ in range(3):
+            self.event("capstone_user", "success", "mobile", self.old)
+        self.event("capstone_user", "failure", "mobile", self.old)
+        self.event("other_user", "success", "web", self.old)
+        self.recent = self.event("capstone_user", "success", "mobile", timezone.now())
+
+    def event(self, username, outcome, source, timestamp):
+        return LoginEvent.objects.create(username=username, outcome=outcome, source=source, timestamp=timestamp)
+
+    def rollup(self, *args):
+        out = StringIO()
+        call_command("rollup_login_events", "--days", "90", *args, stdout=out)
+        return out.getvalue()
+
+    def counts(self):
+        return {(row.username, row.outcome, row.source): row.count for row in LoginEventDailyCount.objects.all()}
+
+    def test_old_events_become_daily_counts(self):
+        """Test that old events are counted per user, outcome and source and then deleted"""
+        self.assertIn("Rolled up 5", self.rollup("--batch-size", "2"))
+        self.assertEqual(self.counts(), {
+            ("capstone_user", "success", "mobile"): 3,
+            ("capstone_user", "failure", "mobile"): 1,
+            ("other_user", "success", "web"): 1,
+        })
+        self.assertEqual(list(LoginEvent.objects.values_list("id", flat=True)), [self.recent.id])
+
+    def test_rerun_adds_to_existing_counts(self):
+        """Test that events rolled up later for the same day are added to its count"""
+        self.rollup()
+        self.event("capstone_user", "success", "mobile", self.old)
+        self.rollup()
+        self.assertEqual(self.counts()[("capstone_user", "success", "mobile")], 4)
+        self.assertIn("No login events", self.rollup())
@@ -0,0 +1,45 @@
+from unittest import skipIf
+from django.test import TestCase
+from django.contrib.auth.models import User
+from recipes.models import Ingredient, RecipeIngredient
+from recipes.matrix import RecipeMatrix, np
+from tests.helpers import create_recipe
+
+@skipIf(np is None, "numpy and scipy are not installed")
+class RecipeMatrixTest(TestCase):
+    def setUp(self):
+        """Set up a few recipes over shared ingredients"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        self.flour = Ingredient.objects.create(ingredient_name="Flour")
+        self.salad = create_recipe(self.user, "Tomato Salad", [(self.tomato, "2"), (self.basil, "1")], unit="g")
+        self.bread = create_recipe(self.user, "Bread", [(self.flour, "500")], unit="g")
+        self.matrix = RecipeMatrix()
+        self.matrix.load_all()
+
+    def scores(self, matrix):
+        available = {self.tomato.id: ("mass", 5.0), self.flour.id: ("mass", 100.0)}
+        recipe_ids, shared, missing, shortfalls = matrix.score(available)
+        return {int(r): (s, m, f) for r, s, m, f in zip(recipe_ids, shared, missing, shortfalls)}
+
+    def test_score(self):
+        """Test shared and missing counts and the shortfall per recipe"""
+        scores = self.scores(self.matrix)
+        self.assertEqual(scores[self.salad.id], (1, 1, 1.0))
+        self.assertEqual(scores[self.bread.id], (1, 1, 400.0))
+
+    def test_changes_match_a_full_load(self):
+        """Test that changed, added and deleted recipes are spliced in like a full load would build them"""
+        salt = Ingredient.objects.create(ingredient_name="Salt")
+        soup = create_recipe(self.user, "Tomato Soup", [(self.tomato, "3"), (salt, "1")], unit="g")
+        RecipeIngredient.objects.filter(recipe=self.salad, ingredient=self.basil).delete()
+        bread_id = self.bread.id
+        self.bread.delete()
+        self.matrix.apply_changes({soup.id, self.salad.id, bread_id}, set())
+
+        full = RecipeMatrix()
+        full.load_all()
+        self.assertEqual(self.scores(self.matrix), self.scores(full))
+        self.assertNotIn(bread_id, self.scores(self.matrix))
+        self.assertEqual(self.scores(self.matrix)[self.salad.id], (1, 0, 0.0))
@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+from recipes.units import COUNT, MASS, VOLUME, convert, covers, lookup, to_base
+
+class UnitConversionTest(SimpleTestCase):
+    def test_aliases_and_plurals(self):
+        """Test that spellings of one unit share a dimension and factor"""
+        self.assertEqual(lookup("Cups"), lookup("cup"))
+        self.assertEqual(lookup(" Tbsp. "), lookup("tablespoons"))
+        self.assertEqual(lookup("pieces")[0], COUNT)
+        self.assertEqual(lookup("lbs")[0], MASS)
+        self.assertEqual(lookup("bunch"), ("unit:bunch", 1.0))
+
+    def test_convert_within_dimension(self):
+        """Test conversions inside volume and mass"""
+        self.assertAlmostEqual(convert(3, "tsp", "tbsp"), 1.0, places=3)
+        self.assertAlmostEqual(convert(1, "kg", "g"), 1000.0)
+        self.assertEqual(to_base(2, "l"), (VOLUME, 2000.0))
+
+    def test_convert_with_density(self):
+        """Test that volume and mass only convert through a density"""
+        self.assertIsNone(convert(1, "cup", "g"))
+        self.assertAlmostEqual(convert(1, "cup", "g", density=0.5), 118.294, places=3)
+        self.assertAlmostEqual(convert(118.294, "g", "cup", density=0.5), 1.0, places=3)
+        self.assertIsNone(convert(1, "piece", "g", density=0.5))
+
+    def test_covers(self):
+        """Test comparing quantities in different units"""
+        self.assertTrue(covers(1, "cup", 16, "tbsp"))
+        self.assertFalse(covers(200, "g", 2, "cups"))
+        self.assertTrue(covers(500, "g", 2, "cups", density=1.0))
+        self.assertFalse(covers(2, "bunch", 1, "sprig"))
+        self.assertTrue(covers(2, "bunch", 1, "bunch"))
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
-from recipes.models import Recipe
-from recipes.serializers import RecipeSerializer
+from recipes.models import Recipe, Ingredient
+from recipes.serializers import RecipeSerializer, IngredientSerializer
 from rest_framework.test import APIRequestFactory
 
 class RecipeSerializerTest(TestCase):
@@ -61,4 +61,13 @@ class RecipeSerializerTest(TestCase):
         serializer =RecipeSerializer(data = data, context={"request": request})
         self.assertFalse(serializer.is_valid())  #we are expecting the validation to fail
         self.assertIn("description", serializer.errors)
-        self.assertIn("instructions", serializer.errors)
\ No newline at end of file
+        self.assertIn("instructions", serializer.errors)
+
+class IngredientSerializerTest(TestCase):
+    def test_ingredient_reused(self):
+        """Test that creating an ingredient with a differently cased name reuses the existing one"""
+        existing = Ingredient.objects.create(ingredient_name="Olive Oil")
+        serializer = IngredientSerializer(data={"ingredient_name": "olive  OIL"})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.save().id, existing.id)
+        self.assertEqual(Ingredient.objects.count(), 1)
@@ -0,0 +1,64 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Ingredient, SavedItem, UserInventory, ShoppingListItem
+from tests.helpers import create_recipe
+
+class AddMissingIngredientsViewTest(TestCase):
+    def setUp(self):
+        """Set up a user with some tomatoes and a few saved recipes"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="2",
+                                     quantity=2, unit="pieces")
+        self.salad = self.create_saved_recipe("Tomato Salad", [(self.tomato, "1"), (self.basil, "1")])
+
+    def create_saved_recipe(self, name, ingredients):
+        recipe = create_recipe(self.user, name, ingredients)
+        SavedItem.objects.create(user=self.user, recipe=recipe)
+        return recipe
+
+    def test_adds_only_missing(self):
+        """Test that covered ingredients and items already on the list are skipped"""
+        response = self.client.post(f"/api/recipes/shopping-list/add-missing/{self.salad.id}/")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([i["ingredient_name"] for i in response.data["items"]], ["Basil"])
+
+        response = self.client.post(f"/api/recipes/shopping-list/add-missing/{self.salad.id}/")
+        self.assertEqual(response.data["items"], [])
+        self.assertEqual(ShoppingListItem.objects.filter(user=self.user).count(), 1)
+
+    def test_several_recipes(self):
+        """Test that several recipes are handled at once, with each ingredient added once"""
+        onion = Ingredient.objects.create(ingredient_name="Onion")
+        soup = self.create_saved_recipe("Tomato Soup", [(self.tomato, "5"), (onion, "1"), (self.basil, "2")])
+        response = self.client.post("/api/recipes/shopping-list/add-missing/",
+                                    {"recipe_ids": [self.salad.id, soup.id]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sorted(i["ingredient_name"] for i in response.data["items"]), ["Basil", "Onion", "Tomato"])
+
+    def test_unsaved_recipe(self):
+        """Test that recipes the user has not saved are rejected"""
+        other = create_recipe(self.user, "Basil Pesto", [(self.basil, "3")])
+        response = self.client.post("/api/recipes/shopping-list/add-missing/",
+                                    {"recipe_ids": [self.salad.id, other.id]}, format="json")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(ShoppingListItem.objects.exists())
+
+    def test_fixed_query_count(self):
+        """Test that adding ten recipes costs the same queries as adding one"""
+        counts = []
+        for n in (1, 10):
+            recipes = [self.create_saved_recipe(f"Recipe {n}-{i}", [
+                (Ingredient.objects.create(ingredient_name=f"Spice {n}-{i}"), "1")]) for i in range(n)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post("/api/recipes/shopping-list/add-missing/",
+                                            {"recipe_ids": [r.id for r in recipes]}, format="json")
+            self.assertEqual(len(response.data["items"]), n)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,112 @@
+import json
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.caching import get_ingredient_version
+from recipes.models import Recipe, Ingredient, RecipeIngredient, UserInventory
+from recipes.suggestions import get_ingredient_index
+from tests.helpers import CommittingTestCase
+
+# Rescore other users right after the commit rather than on the background thread
+@override_settings(COVERAGE_REFRESH_BUFFERED=False)
+class AddRecipeViewTest(CommittingTestCase):
+    def setUp(self):
+        """Set up a user and one existing ingredient"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+
+    def recipe_data(self, ingredients):
+        return {
+            "recipe_name": "Tomato Salad",
+            "description": "Test description",
+            "instructions": "Test instructions",
+            "ingredients": ingredients
+        }
+
+    def ingredient_list(self, n):
+        return [{"ingredient_name": "tomato", "quantity": "2", "unit": "pieces"}] + [
+            {"ingredient_name": f"Spice {i}", "quantity": "1/2", "unit": "tsp"} for i in range(n - 1)]
+
+    def test_add_with_ingredients(self):
+        """Test that nested ingredients are created with the recipe and reuse existing ingredients"""
+        response = self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(2)), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([i["ingredient_name"] for i in response.data["recipe_ingredients"]], ["Tomato", "Spice 0"])
+        recipe = Recipe.objects.get(id=response.data["id"])
+        rows = RecipeIngredient.objects.filter(recipe=recipe).order_by("id")
+        self.assertEqual(rows[0].ingredient, self.tomato)
+        self.assertEqual(float(rows[1].quantity_value), 0.5)
+        self.assertEqual(Ingredient.objects.get(ingredient_name="Spice 0").canonical_name, "spice 0")
+
+    def test_add_multipart_json_string(self):
+        """Test that multipart requests can send the ingredients as a JSON string"""
+        data = self.recipe_data(json.dumps(self.ingredient_list(1)))
+        response = self.client.post("/api/recipes/add/", data, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data["recipe_ingredients"]), 1)
+
+    def test_invalid_ingredient_rejects_recipe(self):
+        """Test that an invalid quantity rejects the whole recipe"""
+        ingredients = self.ingredient_list(2)
+        ingredients[1]["quantity"] = "a pinch"
+        response = self.client.post("/api/recipes/add/", self.recipe_data(ingredients), format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("ingredients", response.data)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_update_replaces_ingredients(self):
+        """Test that update_recipe replaces the ingredient list when one is given"""
+        response = self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(3)), format="json")
+        recipe_id = response.data["id"]
+        response = self.client.put(f"/api/recipes/update/{recipe_id}/",
+                                   {"ingredients": [{"ingredient_name": "Basil", "quantity": "1", "unit": "bunch"}]},
+                                   format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([i["ingredient_name"] for i in response.data["recipe_ingredients"]], ["Basil"])
+
+        # Leaving the list out keeps the ingredients
+        response = self.client.put(f"/api/recipes/update/{recipe_id}/", {"recipe_name": "Basil Salad"}, format="json")
+        self.assertEqual(len(response.data["recipe_ingredients"]), 1)
+
+    def test_existing_ingredients_keep_ingredient_version(self):
+        """Test that only a save creating ingredients invalidates the ingredient list"""
+        version = get_ingredient_version()
+        self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(1)), format="json")
+        self.assertEqual(get_ingredient_version(), version)
+        self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(2)), format="json")
+        self.assertEqual(get_ingredient_version(), version + 1)
+
+    def test_fixed_query_count(self):
+        """Test that saving a recipe costs the same number of queries for 2 or 10 ingredients"""
+        # Stock every ingredient so both recipes are suggested and the coverage refresh is counted
+        for i in range(-1, 9):
+            ingredient = Ingredient.objects.create(ingredient_name=f"Spice {i}") if i >= 0 else self.tomato
+            UserInventory.objects.create(user=self.user, ingredient=ingredient, quantity_display="5",
+                                         quantity=5, unit="tsp" if i >= 0 else "pieces")
+        self.client.get("/api/recipes/recipes/suggest/")
+
+        counts = []
+        for n in (2, 10):
+            # Catch the in-process index up with the previous save, so only this save is counted
+            get_ingredient_index()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(n)),
+                                            format="json")
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data["recipe_ingredients"]), n)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_new_recipe_is_suggested(self):
+        """Test that a recipe saved in one request reaches the suggestions"""
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="5",
+                                     quantity=5, unit="pieces")
+        self.client.get("/api/recipes/recipes/suggest/")
+        self.client.post("/api/recipes/add/", self.recipe_data(self.ingredient_list(1)), format="json")
+        response = self.client.get("/api/recipes/recipes/suggest/")
+        self.assertEqual([s["recipe"]["recipe_name"] for s in response.data["suggested_recipes"]], ["Tomato Salad"])
+        self.assertTrue(response.data["suggested_recipes"][0]["can_make"])
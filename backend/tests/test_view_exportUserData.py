@@ -0,0 +1,127 @@
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from recipes import export
+from recipes.export import run_export_job
+from recipes.models import (
+    Recipe, Ingredient, RecipeIngredient, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, LoginEvent,
+    UserExport
+)
+
+URL = "/api/recipes/export-user-data/"
+
+class ExportUserDataViewTest(TestCase):
+    def setUp(self):
+        """Set up a user with a row in every exported section"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil",
+                                             email="capstone@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        recipe = Recipe.objects.create(user=self.user, recipe_name="Tomato Salad",
+                                       description="Test description", instructions="Test instructions")
+        RecipeIngredient.objects.create(recipe=recipe, ingredient=self.tomato, quantity="2", unit="pieces")
+        SavedItem.objects.create(user=self.user, recipe=recipe)
+        WeeklyPlan.objects.create(user=self.user, recipe=recipe, day="Monday", meal_type="Lunch")
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="2",
+                                     quantity=2, unit="pieces")
+        ShoppingListItem.objects.create(user=self.user, ingredient=self.tomato, quantity=1, unit="pieces")
+        LoginEvent.objects.create(username="capstone_user", outcome="success", source="web")
+
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root)
+        location = export.export_storage.location
+        export.export_storage.location = self.export_root
+        self.addCleanup(setattr, export.export_storage, "location", location)
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_json_export(self):
+        """Test that the streamed JSON holds the profile and every section"""
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response["Content-Disposition"])
+        data = json.loads(self.read(response))
+        self.assertEqual(data["username"], "capstone_user")
+        self.assertEqual(data["email"], "capstone@example.com")
+        for section in ("login_attempts", "recipes", "ingredients", "saved_items", "weekly_plan",
+                        "inventory", "shopping_list"):
+            self.assertEqual(len(data[section]), 1, section)
+        self.assertEqual(data["ingredients"][0]["ingredient_name"], "Tomato")
+        self.assertEqual(data["saved_items"][0]["recipe_name"], "Tomato Salad")
+        self.assertNotIn("ingredient__ingredient_name", data["shopping_list"][0])
+        self.assertEqual(data["login_history"], [])
+
+    def test_ndjson_export(self):
+        """Test that NDJSON has one row per line, the profile first"""
+        lines = [json.loads(line) for line in self.read(self.client.get(URL, {"output": "ndjson"})).splitlines()]
+        self.assertEqual(lines[0]["section"], "profile")
+        self.assertEqual(len(lines), 8)
+        self.assertEqual(self.client.get(URL, {"output": "xml"}).status_code, 400)
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_fixed_query_count(self):
+        """Test that the export costs one query per section however many rows there are"""
+        with CaptureQueriesContext(connection) as queries:
+            self.read(self.client.get(URL))
+        few = len(queries)
+        for i in range(5):
+            ShoppingListItem.objects.create(user=self.user, ingredient=self.tomato, quantity=i + 1, unit="pieces")
+        with CaptureQueriesContext(connection) as queries:
+            data = json.loads(self.read(self.client.get(URL)))
+        self.assertEqual(len(data["shopping_list"]), 6)
+        self.assertEqual(len(queries), few)
+
+    def test_background_job(self):
+        """Test that a job writes the export to a file that only its owner can download"""
+        response = self.client.post(URL + "jobs/", {"output": "ndjson"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "pending")
+        self.assertNotIn("download_url", response.data)
+
+        # The thread starts on commit, which TestCase never reaches
+        run_export_job(response.data["id"])
+        status = self.client.get(response.data["status_url"]).data
+        self.assertEqual(status["status"], "done")
+
+        download = self.client.get(status["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(len(self.read(download).splitlines()), 8)
+
+        other = User.objects.create_user(username="other_user", password="dbbytes_basil")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(status["download_url"]).status_code, 404)
+
+    def test_new_job_replaces_finished_one(self):
+        """Test that starting an export removes the previous file"""
+        first = self.client.post(URL + "jobs/").data
+        self.assertEqual(self.client.post(URL + "jobs/").data["id"], first["id"])
+        run_export_job(first["id"])
+        file_name = UserExport.objects.get(id=first["id"]).file_name
+        self.assertTrue(export.export_storage.exists(file_name))
+
+        second = self.client.post(URL + "jobs/").data
+        self.assertNotEqual(second["id"], first["id"])
+        self.assertFalse(export.export_storage.exists(file_name))
+
+    @override_settings(EXPORT_JOB_TIMEOUT=60)
+    def test_stale_pending_job_is_replaced(self):
+        """Test that a job left pending by a dead worker does not block new exports"""
+        first = self.client.post(URL + "jobs/").data
+        UserExport.objects.filter(id=first["id"]).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        second = self.client.post(URL + "jobs/").data
+        self.assertNotEqual(second["id"], first["id"])
+        self.assertFalse(UserExport.objects.filter(id=first["id"]).exists())
+
+        # The new job finishes normally
+        run_export_job(second["id"])
+        self.assertEqual(self.client.get(second["status_url"]).data["status"], "done")
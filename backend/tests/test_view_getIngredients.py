@@ -0,0 +1,58 @@
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.caching import get_ingredient_version
+from recipes.models import Ingredient
+from tests.helpers import CommittingTestCase
+
+class GetIngredientsViewTest(CommittingTestCase):
+    def setUp(self):
+        """Set up a user and a few ingredients"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Ingredient.objects.create(ingredient_name=f"Spice {i}")
+
+    def test_full_list(self):
+        """Test that the plain list is unchanged"""
+        response = self.client.get("/api/recipes/ingredients/")
+        self.assertEqual(len(response.data), 5)
+
+    def test_pages(self):
+        """Test that ?limit= pages through the ingredients"""
+        response = self.client.get("/api/recipes/ingredients/", {"limit": 3})
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get("/api/recipes/ingredients/", {"cursor": response.data["next_cursor"]})
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_etag(self):
+        """Test that a matching If-None-Match gets a 304 without touching the database"""
+        response = self.client.get("/api/recipes/ingredients/", {"limit": 3})
+        etag = response["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/recipes/ingredients/", {"limit": 3}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 0)
+
+        # Another page has its own tag
+        response = self.client.get("/api/recipes/ingredients/", {"limit": 2}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_changes_with_ingredients(self):
+        """Test that adding an ingredient changes the ETag and the cached payload"""
+        etag = self.client.get("/api/recipes/ingredients/")["ETag"]
+        Ingredient.objects.create(ingredient_name="Saffron")
+        response = self.client.get("/api/recipes/ingredients/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 6)
+
+    def test_version_moves_on_commit(self):
+        """Test that the ETag cannot change while the write that changes it is uncommitted"""
+        version = get_ingredient_version()
+        with transaction.atomic():
+            Ingredient.objects.create(ingredient_name="Saffron")
+            self.assertEqual(get_ingredient_version(), version)
+        self.assertEqual(get_ingredient_version(), version + 1)
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, RecipeIngredient
+
+class GetRecipeViewTest(TestCase):
+    def setUp(self):
+        """Set up a recipe with two ingredients"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        self.recipe = Recipe.objects.create(user=self.user, recipe_name="Tomato Salad",
+                                            description="Test description", instructions="Test instructions")
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.tomato, quantity="2", unit="pieces")
+        RecipeIngredient.objects.create(recipe=self.recipe, ingredient=self.basil, quantity="1", unit="bunch")
+        self.url = f"/api/recipes/recipes/{self.recipe.id}/"
+
+    def test_detail(self):
+        """Test that the recipe is returned with its ingredients and validators"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["recipe_name"], "Tomato Salad")
+        self.assertEqual(len(response.data["recipe_ingredients"]), 2)
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    def test_fixed_query_count(self):
+        """Test that the recipe loads in the same number of queries however many ingredients it has"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        few = len(queries)
+        for i in range(5):
+            spice = Ingredient.objects.create(ingredient_name=f"Spice {i}")
+            RecipeIngredient.objects.create(recipe=self.recipe, ingredient=spice, quantity="1", unit="pinch")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertEqual(len(queries), few)
+
+    def test_not_modified(self):
+        """Test that a matching If-None-Match gets an empty 304 after one query"""
+        etag = self.client.get(self.url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(queries), 1)
+
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_ingredient_change_moves_etag(self):
+        """Test that changing an ingredient row gives the recipe a new ETag"""
+        etag = self.client.get(self.url)["ETag"]
+        RecipeIngredient.objects.filter(ingredient=self.basil).first().delete()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["recipe_ingredients"]), 1)
+
+        # Renaming an ingredient changes the serialized recipe too
+        etag = response["ETag"]
+        self.tomato.ingredient_name = "Roma Tomato"
+        self.tomato.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_unknown_recipe(self):
+        """Test that an unknown recipe id is a 404"""
+        response = self.client.get("/api/recipes/recipes/99999/")
+        self.assertEqual(response.status_code, 404)
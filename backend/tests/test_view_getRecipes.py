@@ -0,0 +1,57 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from recipes.models import Recipe
+
+class GetRecipesPaginationTest(TestCase):
+    def setUp(self):
+        """Set up two users with recipes, some sharing a created_at timestamp"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.other = User.objects.create_user(username="other_user", password="dbbytes_basil")
+        self.client = APIClient()
+        for i in range(5):
+            Recipe.objects.create(user=self.user, recipe_name=f"Recipe {i}",
+                                  description="Test description", instructions="Test instructions")
+        Recipe.objects.create(user=self.other, recipe_name="Other recipe",
+                              description="Test description", instructions="Test instructions")
+        # Ties on created_at must still page correctly
+        Recipe.objects.filter(recipe_name__in=["Recipe 1", "Recipe 2", "Recipe 3"]).update(
+            created_at=timezone.now())
+
+    def fetch_all_pages(self, params):
+        names, cursor = [], None
+        while True:
+            query = dict(params)
+            if cursor:
+                query["cursor"] = cursor
+            response = self.client.get("/api/recipes/", query)
+            self.assertEqual(response.status_code, 200)
+            names += [r["recipe_name"] for r in response.data["results"]]
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                return names
+
+    def test_unpaginated_list(self):
+        """Test that the endpoint still returns a plain list without pagination params"""
+        response = self.client.get("/api/recipes/")
+        self.assertEqual(len(response.data), 6)
+
+    def test_pages_cover_every_recipe_once(self):
+        """Test that walking the cursors returns each recipe exactly once, newest first"""
+        names = self.fetch_all_pages({"limit": 2})
+        self.assertEqual(len(names), 6)
+        self.assertEqual(len(set(names)), 6)
+        expected = [r.recipe_name for r in Recipe.objects.order_by('-created_at', '-id')]
+        self.assertEqual(names, expected)
+
+    def test_user_filter(self):
+        """Test that ?user= pages only over the authenticated user's recipes"""
+        self.client.force_authenticate(user=self.other)
+        names = self.fetch_all_pages({"user": "1", "limit": 2})
+        self.assertEqual(names, ["Other recipe"])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get("/api/recipes/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
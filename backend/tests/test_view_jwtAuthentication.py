@@ -0,0 +1,99 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from recipes.authentication import refresh_token_for_user, user_cache
+from recipes.caching import bump_auth_version
+
+class JWTAuthenticationTest(TestCase):
+    def setUp(self):
+        """Set up a user holding a real access token"""
+        user_cache.clear()
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.authorize(self.user)
+
+    def authorize(self, user):
+        self.access = refresh_token_for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+
+    def get_user_info(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/recipes/user-info/")
+        return response, len(queries)
+
+    def test_login_token_has_claims(self):
+        """Test that the login endpoint issues tokens carrying the username"""
+        response = self.client.post("/api/recipes/login/", {"username": "capstone_user", "password": "dbbytes_basil"})
+        access = AccessToken(response.data["token"]["access"])
+        self.assertEqual(access["username"], "capstone_user")
+        # Activity is checked against the user on every request, never read from the token
+        self.assertNotIn("is_active", access)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['token']['access']}")
+        self.assertEqual(self.client.get("/api/recipes/user-info/").status_code, 200)
+
+    def test_cached_user_skips_query(self):
+        """Test that only the first request looks the user up"""
+        response, queries = self.get_user_info()
+        self.assertEqual(response.data, {"username": "capstone_user"})
+        self.assertEqual(queries, 1)
+        response, queries = self.get_user_info()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, 0)
+
+    def test_deactivation_invalidates(self):
+        """Test that a deactivated user is refused even after being cached"""
+        self.get_user_info()
+        response = self.client.post("/api/recipes/request-account-deletion/")
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.get_user_info()
+        self.assertEqual(response.status_code, 401)
+
+        # Reactivating (without the refused token) lets the same token in again
+        self.client.credentials()
+        response = self.client.post("/api/recipes/reactivate/", {"username": "capstone_user", "password": "dbbytes_basil"})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        response, _ = self.get_user_info()
+        self.assertEqual(response.status_code, 200)
+
+    def test_change_in_another_process_invalidates(self):
+        """Test that a cached user is reloaded once another process bumps the auth version"""
+        self.get_user_info()
+        # Another worker deactivated the user: the row changed and the shared version moved on
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        bump_auth_version(self.user.id)
+        response, queries = self.get_user_info()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(queries, 1)
+
+    def test_deletion_request_keeps_other_fields(self):
+        """Test that deactivating through a cached user does not write back its stale fields"""
+        self.get_user_info()
+        User.objects.filter(id=self.user.id).update(email="new@example.com")
+        self.client.post("/api/recipes/request-account-deletion/")
+        self.assertEqual(User.objects.get(id=self.user.id).email, "new@example.com")
+
+    def test_reused_id_is_refused(self):
+        """Test that a token cannot authenticate a new user who got the id of a deleted one"""
+        self.get_user_info()
+        user_id = self.user.id
+        self.user.delete()
+        User.objects.create_user(id=user_id, username="someone_else", password="dbbytes_basil")
+        response, _ = self.get_user_info()
+        self.assertEqual(response.status_code, 401)
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used users are dropped beyond the cache size"""
+        old_size = user_cache.max_size
+        user_cache.max_size = 2
+        try:
+            users = [User.objects.create_user(username=f"user_{i}", password="dbbytes_basil") for i in range(3)]
+            for user in users:
+                user_cache.set(user, 1)
+            self.assertIsNone(user_cache.get(users[0].id, 1))
+            self.assertEqual(user_cache.get(users[2].id, 1).username, "user_2")
+        finally:
+            user_cache.max_size = old_size
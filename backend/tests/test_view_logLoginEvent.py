@@ -0,0 +1,82 @@
+from unittest import mock
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from recipes.login_events import LoginEventWriter
+from recipes.models import LoginEvent
+
+URL = "/api/recipes/log-login/"
+
+class ManualWriter(LoginEventWriter):
+    """Flushed by the test instead of a background thread"""
+    def start(self):
+        pass
+
+class LogLoginEventViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.writer = ManualWriter(max_queue=5, batch_size=2, flush_seconds=1)
+        patcher = mock.patch("recipes.views.login_event_writer", self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, username="capstone_user"):
+        return self.client.post(URL, {"username": username, "outcome": "success", "source": "mobile"})
+
+    def test_events_are_queued_then_bulk_written(self):
+        """Test that events are only written on flush, in batches"""
+        for i in range(3):
+            self.assertEqual(self.post(f"user_{i}").status_code, 202)
+        self.assertEqual(LoginEvent.objects.count(), 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.writer.flush(), 3)
+        # Two batches: 2 + 1
+        self.assertEqual(len([q for q in queries if q["sql"].startswith("INSERT")]), 2)
+        self.assertEqual(set(LoginEvent.objects.values_list("username", flat=True)), {"user_0", "user_1", "user_2"})
+
+    def test_full_queue_sheds_load(self):
+        """Test that events beyond the queue size are dropped with a 503"""
+        for _ in range(5):
+            self.post()
+        response = self.post()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.writer.dropped, 1)
+        self.writer.flush()
+        self.assertEqual(LoginEvent.objects.count(), 5)
+
+    def test_stop_writes_what_is_left(self):
+        """Test that stopping the writer flushes the queue"""
+        self.post()
+        self.writer.stop()
+        self.assertEqual(LoginEvent.objects.count(), 1)
+
+    def test_missing_fields(self):
+        """Test that username and outcome are required"""
+        response = self.client.post(URL, {"username": "capstone_user"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_fields(self):
+        """Test that values outside the model's choices or length are refused before queueing"""
+        for data in ({"username": "capstone_user", "outcome": "x" * 11},
+                     {"username": "capstone_user", "outcome": "success", "source": "fax"},
+                     {"username": "u" * 151, "outcome": "success"}):
+            self.assertEqual(self.client.post(URL, data).status_code, 400)
+        self.assertEqual(self.writer.events.qsize(), 0)
+        # The clients also log attempts, and the source may be left out
+        self.assertEqual(self.client.post(URL, {"username": "capstone_user", "outcome": "attempt"}).status_code, 202)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        """Test that one row the database refuses does not lose the rest of its batch"""
+        self.post("user_0")
+        self.post("user_1")
+        with mock.patch.object(LoginEvent.objects, "bulk_create", side_effect=DatabaseError("value too long")):
+            self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(LoginEvent.objects.count(), 2)
+
+    @override_settings(LOGIN_EVENT_BUFFERED=False)
+    def test_unbuffered(self):
+        """Test that buffering can be turned off to write in the request"""
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(LoginEvent.objects.count(), 1)
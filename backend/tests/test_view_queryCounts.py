@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, RecipeIngredient, SavedItem, WeeklyPlan, UserInventory
+from tests.helpers import CommittingTestCase
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Rescore other users right after the commit rather than on the background thread
+@override_settings(COVERAGE_REFRESH_BUFFERED=False)
+class QueryCountTest(CommittingTestCase):
+    """Rendering N rows must not issue N extra queries on any list endpoint"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="10",
+                                     quantity=10, unit="pieces")
+        self.count = 0
+
+    def add_recipes(self, n):
+        for _ in range(n):
+            self.count += 1
+            author = User.objects.create_user(username=f"author_{self.count}", password="dbbytes_basil")
+            recipe = Recipe.objects.create(user=author, recipe_name=f"Recipe {self.count}",
+                                           description="Test description", instructions="Test instructions")
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=self.tomato, quantity="1", unit="pieces")
+            extra = Ingredient.objects.create(ingredient_name=f"Spice {self.count}")
+            RecipeIngredient.objects.create(recipe=recipe, ingredient=extra, quantity="1", unit="pinch")
+            SavedItem.objects.create(user=self.user, recipe=recipe)
+            WeeklyPlan.objects.create(user=self.user, recipe=recipe, day=DAYS[self.count % 7],
+                                      meal_type=["Breakfast", "Lunch", "Dinner"][self.count // 7 % 3])
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, url, expected):
+        self.add_recipes(1)
+        self.assertEqual(self.count_queries(url), expected)
+        self.add_recipes(5)
+        self.assertEqual(self.count_queries(url), expected)
+
+    def test_recipe_list(self):
+        """Test recipes, authors and ingredients load in a fixed number of queries"""
+        self.assertConstantQueries("/api/recipes/", 2)
+
+    def test_recipe_list_page(self):
+        """Test a keyset page loads in a fixed number of queries"""
+        self.assertConstantQueries("/api/recipes/?limit=3", 2)
+
+    def test_saved_recipes(self):
+        """Test saved recipes load in a single query"""
+        self.assertConstantQueries("/api/recipes/saved-recipes/", 1)
+
+    def test_weekly_plan(self):
+        """Test the weekly plan loads in a single query"""
+        self.assertConstantQueries("/api/recipes/weekly-plan/", 1)
+
+    def count_uncached_suggestion_queries(self):
+        # Build the coverage rows, then drop the cached result so the read path is counted
+        self.client.get("/api/recipes/recipes/suggest/")
+        caches['suggestions'].clear()
+        return self.count_queries("/api/recipes/recipes/suggest/")
+
+    def test_suggestions(self):
+        """Test suggestions load in a fixed number of queries"""
+        self.add_recipes(1)
+        self.assertEqual(self.count_uncached_suggestion_queries(), 4)
+        self.add_recipes(5)
+        self.assertEqual(self.count_uncached_suggestion_queries(), 4)
+
+    def test_cached_suggestions(self):
+        """Test a repeat suggestion request does not touch the database"""
+        self.add_recipes(1)
+        self.client.get("/api/recipes/recipes/suggest/")
+        self.assertEqual(self.count_queries("/api/recipes/recipes/suggest/"), 0)
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Ingredient
+from tests.helpers import CommittingTestCase
+
+class SearchIngredientsViewTest(CommittingTestCase):
+    def setUp(self):
+        """Set up a user and a few ingredients"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        for name in ["Olive Oil", "Olives", "Oregano", "Basil", "Coconut Oil"]:
+            Ingredient.objects.create(ingredient_name=name)
+
+    def search(self, q, **params):
+        response = self.client.get("/api/recipes/ingredients/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [r["ingredient_name"] for r in response.data["results"]]
+
+    def test_prefix(self):
+        """Test that names starting with the query come first, then names with a later word matching"""
+        self.assertEqual(self.search("ol"), ["Olive Oil", "Olives"])
+        self.assertEqual(self.search("OIL"), ["Olive Oil", "Coconut Oil"])
+        self.assertEqual(self.search("o"), ["Olive Oil", "Olives", "Oregano", "Coconut Oil"])
+        self.assertEqual(self.search(""), [])
+
+    def test_limit(self):
+        """Test that ?limit= caps the number of results"""
+        self.assertEqual(self.search("o", limit=2), ["Olive Oil", "Olives"])
+
+    def test_new_ingredient(self):
+        """Test that ingredients saved after the index was built are found"""
+        self.search("b")
+        Ingredient.objects.create(ingredient_name="Bay Leaf")
+        self.assertEqual(self.search("b"), ["Basil", "Bay Leaf"])
+        basil = Ingredient.objects.get(ingredient_name="Basil")
+        basil.ingredient_name = "Thai Basil"
+        basil.save()
+        self.assertEqual(self.search("b"), ["Bay Leaf", "Thai Basil"])
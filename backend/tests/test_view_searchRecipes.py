@@ -0,0 +1,72 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, RecipeIngredient
+from tests.helpers import create_recipe
+
+class SearchRecipesViewTest(TestCase):
+    def setUp(self):
+        """Set up a user and a few recipes"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        create_recipe(self.user, "Tomato Soup", [self.tomato], description="A warm soup",
+                      instructions="Simmer the tomatoes")
+        create_recipe(self.user, "Pesto", [self.basil], description="Green sauce with tomato on the side",
+                      instructions="Blend")
+        create_recipe(self.user, "Caprese", [self.tomato, self.basil], description="Fresh and simple",
+                      instructions="Slice and layer")
+
+    def search(self, q, **params):
+        response = self.client.get("/api/recipes/recipes/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response, [r["recipe_name"] for r in response.data["results"]]
+
+    def test_ranked(self):
+        """Test that name matches rank above ingredient and description matches"""
+        _, names = self.search("tomato")
+        self.assertEqual(names[0], "Tomato Soup")
+        self.assertEqual(set(names), {"Tomato Soup", "Pesto", "Caprese"})
+
+    def test_all_words_and_prefix(self):
+        """Test that every word must match and the last one may be a prefix"""
+        self.assertEqual(self.search("basil slic")[1], ["Caprese"])
+        self.assertEqual(self.search("simm")[1], ["Tomato Soup"])
+        self.assertEqual(self.search("saffron")[1], [])
+
+    def test_syntax_is_ignored(self):
+        """Test that search operators in the query are treated as text"""
+        self.assertEqual(self.search('pesto" -(*')[1], ["Pesto"])
+
+    def test_pages(self):
+        """Test that ?limit= and ?cursor= page through the results"""
+        response, names = self.search("tomato", limit=2)
+        self.assertEqual(len(names), 2)
+        response, more = self.search("tomato", cursor=response.data["next_cursor"], limit=2)
+        self.assertEqual(len(more), 1)
+        self.assertIsNone(response.data["next_cursor"])
+
+    def test_index_follows_changes(self):
+        """Test that edits, new ingredients, renames and deletes reach the index"""
+        soup = Recipe.objects.get(recipe_name="Tomato Soup")
+        soup.recipe_name = "Gazpacho"
+        soup.save()
+        self.assertEqual(self.search("gazpacho")[1], ["Gazpacho"])
+
+        RecipeIngredient.objects.create(recipe=soup, ingredient=Ingredient.objects.create(ingredient_name="Cucumber"),
+                                        quantity="1", unit="pieces")
+        self.assertEqual(self.search("cucumber")[1], ["Gazpacho"])
+
+        self.basil.ingredient_name = "Thai Basil"
+        self.basil.save()
+        self.assertEqual(set(self.search("thai")[1]), {"Pesto", "Caprese"})
+
+        soup.delete()
+        self.assertEqual(self.search("gazpacho")[1], [])
+
+    def test_query_required(self):
+        """Test that an empty query is rejected"""
+        response = self.client.get("/api/recipes/recipes/search/")
+        self.assertEqual(response.status_code, 400)
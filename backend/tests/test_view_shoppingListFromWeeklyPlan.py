@@ -0,0 +1,95 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, RecipeIngredient, WeeklyPlan, UserInventory, ShoppingListItem
+from tests.helpers import create_recipe
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+URL = "/api/recipes/shopping-list/from-weekly-plan/"
+
+class ShoppingListFromWeeklyPlanViewTest(TestCase):
+    def setUp(self):
+        """Set up a user with a pantry and a small weekly plan"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="3",
+                                     quantity=3, unit="pieces")
+
+        salad = create_recipe(self.user, "Tomato Salad", [(self.tomato, "2", "pieces"), (self.basil, "1", "bunch")])
+        soup = create_recipe(self.user, "Tomato Soup", [(self.tomato, "4", "Pieces"), (self.basil, "1/2", "bunch")])
+        self.plan(salad, "Monday")
+        self.plan(salad, "Tuesday")
+        self.plan(soup, "Wednesday")
+
+    def plan(self, recipe, day):
+        WeeklyPlan.objects.create(user=self.user, recipe=recipe, day=day, meal_type="Dinner")
+
+    def shopping_list(self):
+        return {(i.ingredient.ingredient_name, i.unit): float(i.quantity)
+                for i in ShoppingListItem.objects.filter(user=self.user)}
+
+    def test_aggregates_and_subtracts_pantry(self):
+        """Test that quantities are summed per ingredient and unit, then reduced by the pantry"""
+        response = self.client.post(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 2)
+        # 2 + 2 + 4 tomatoes needed, 3 in the pantry; 1 + 1 + 1/2 bunches of basil
+        self.assertEqual(self.shopping_list(), {("Tomato", "pieces"): 5.0, ("Basil", "bunch"): 2.5})
+
+    def test_units_are_merged(self):
+        """Test that quantities in different units of one dimension are merged into the first unit"""
+        RecipeIngredient.objects.filter(ingredient=self.basil).delete()
+        oil = Ingredient.objects.create(ingredient_name="Olive Oil")
+        dressing = create_recipe(self.user, "Dressing", [(oil, "1", "cup")])
+        drizzle = create_recipe(self.user, "Drizzle", [(oil, "6", "tbsp")])
+        self.plan(dressing, "Friday")
+        self.plan(drizzle, "Saturday")
+        UserInventory.objects.create(user=self.user, ingredient=oil, quantity_display="2",
+                                     quantity=2, unit="tbsp")
+        self.client.post(URL)
+        # 1 cup + 6 tbsp - 2 tbsp in the pantry
+        self.assertAlmostEqual(self.shopping_list()[("Olive Oil", "cup")], 1.25)
+
+    def test_rounded_to_zero_is_skipped(self):
+        """Test that a remainder too small to store does not become a 0.00 row"""
+        oil = Ingredient.objects.create(ingredient_name="Olive Oil")
+        self.plan(create_recipe(self.user, "Dressing", [(oil, "1", "cup")]), "Friday")
+        # 1 cup is 16 tbsp, leaving 0.01 tbsp (under 0.001 cup) to buy
+        UserInventory.objects.create(user=self.user, ingredient=oil, quantity_display="15.99",
+                                     quantity=15.99, unit="tbsp")
+        self.client.post(URL)
+        self.assertNotIn(("Olive Oil", "cup"), self.shopping_list())
+
+    def test_repeat_does_not_duplicate(self):
+        """Test that running it again updates the existing rows instead of adding new ones"""
+        self.client.post(URL)
+        response = self.client.post(URL)
+        self.assertEqual(response.data["created"], 0)
+        self.assertEqual(ShoppingListItem.objects.filter(user=self.user).count(), 2)
+
+        # A bigger plan raises the quantity of the row already on the list
+        self.plan(Recipe.objects.get(recipe_name="Tomato Salad"), "Thursday")
+        response = self.client.post(URL)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(self.shopping_list(), {("Tomato", "pieces"): 7.0, ("Basil", "bunch"): 3.5})
+
+    def test_fixed_query_count(self):
+        """Test that a full week costs the same queries as three meals"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(URL)
+        few = len(queries)
+
+        ShoppingListItem.objects.all().delete()
+        for i, day in enumerate(DAYS):
+            spice = Ingredient.objects.create(ingredient_name=f"Spice {i}")
+            recipe = create_recipe(self.user, f"Recipe {i}", [(spice, "1", "pinch"), (self.tomato, "1", "pieces")])
+            WeeklyPlan.objects.create(user=self.user, recipe=recipe, day=day, meal_type="Lunch")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(URL)
+        self.assertEqual(response.data["created"], 9)
+        self.assertEqual(len(queries), few)
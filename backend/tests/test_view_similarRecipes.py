@@ -0,0 +1,73 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Ingredient, RecipeIngredient, RecipeBand, RecipeSignature
+from recipes.similarity import NUM_BANDS, minhash, estimated_similarity
+from tests.helpers import create_recipe
+
+class SimilarRecipesViewTest(TestCase):
+    def setUp(self):
+        """Set up recipes with overlapping ingredient sets"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        names = ["Tomato", "Basil", "Garlic", "Olive Oil", "Pasta", "Onion", "Flour", "Sugar", "Butter", "Egg"]
+        self.ingredients = {name: Ingredient.objects.create(ingredient_name=name) for name in names}
+
+        self.pasta = self.create_recipe("Tomato Pasta", ["Tomato", "Basil", "Garlic", "Olive Oil", "Pasta"])
+        self.close = self.create_recipe("Garlic Pasta", ["Tomato", "Basil", "Garlic", "Olive Oil", "Pasta", "Onion"])
+        self.cake = self.create_recipe("Cake", ["Flour", "Sugar", "Butter", "Egg"])
+
+    def create_recipe(self, name, ingredient_names):
+        return create_recipe(self.user, name, [self.ingredients[n] for n in ingredient_names], unit="piece")
+
+    def url(self, recipe):
+        return f"/api/recipes/recipes/{recipe.id}/similar/"
+
+    def test_returns_overlapping_recipes(self):
+        """Test that a recipe sharing most ingredients is returned and an unrelated one is not"""
+        response = self.client.get(self.url(self.pasta))
+        self.assertEqual(response.status_code, 200)
+        names = [result["recipe"]["recipe_name"] for result in response.data["results"]]
+        self.assertEqual(names, ["Garlic Pasta"])
+        # True Jaccard similarity is 5/6
+        self.assertGreater(response.data["results"][0]["similarity"], 0.6)
+
+    def test_index_follows_ingredient_changes(self):
+        """Test that signatures are rewritten when a recipe's ingredients change"""
+        RecipeIngredient.objects.filter(recipe=self.close).delete()
+        for name in ["Flour", "Sugar", "Butter", "Egg"]:
+            RecipeIngredient.objects.create(recipe=self.close, ingredient=self.ingredients[name],
+                                            quantity="1", unit="piece")
+        response = self.client.get(self.url(self.cake))
+        self.assertEqual([result["recipe"]["id"] for result in response.data["results"]], [self.close.id])
+        self.assertEqual(self.client.get(self.url(self.pasta)).data["results"], [])
+
+    def test_deleted_recipe_leaves_index(self):
+        """Test that deleting a recipe removes its rows from the index"""
+        self.close.delete()
+        self.assertFalse(RecipeSignature.objects.filter(recipe_id=self.close.id).exists())
+        self.assertEqual(self.client.get(self.url(self.pasta)).data["results"], [])
+
+    def test_unknown_recipe(self):
+        """Test that an unknown recipe id is a 404"""
+        response = self.client.get("/api/recipes/recipes/99999/similar/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_signature_estimates_jaccard(self):
+        """Test that identical sets agree everywhere and disjoint sets almost nowhere"""
+        first = minhash({"tomato", "basil", "garlic"})
+        self.assertEqual(estimated_similarity(first, minhash({"garlic", "basil", "tomato"})), 1.0)
+        self.assertLess(estimated_similarity(first, minhash({"flour", "sugar", "egg"})), 0.1)
+
+    def test_build_command(self):
+        """Test that the management command rebuilds the index from scratch"""
+        RecipeBand.objects.all().delete()
+        RecipeSignature.objects.all().delete()
+        out = StringIO()
+        call_command("build_similarity_index", "--batch-size", "2", stdout=out)
+        self.assertIn("3 recipe(s)", out.getvalue())
+        self.assertEqual(RecipeSignature.objects.count(), 3)
+        self.assertEqual(RecipeBand.objects.count(), 3 * NUM_BANDS)
@@ -0,0 +1,192 @@
+from datetime import date
+from unittest import mock, skipIf
+from django.test import override_settings
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Ingredient, RecipeIngredient, UserInventory, PantryCoverage
+from recipes.coverage import CoverageRefresher
+from recipes.matrix import np
+from tests.helpers import CommittingTestCase, create_recipe
+
+class ManualRefresher(CoverageRefresher):
+    """Refreshed by the test instead of a background thread"""
+    def start(self):
+        pass
+
+# Rescore other users right after the commit rather than on the background thread
+@override_settings(COVERAGE_REFRESH_BUFFERED=False)
+class SuggestRecipesViewTest(CommittingTestCase):
+    def setUp(self):
+        """Set up a user with a small pantry and a few recipes"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.basil = Ingredient.objects.create(ingredient_name="Basil")
+        self.chopped_onion = Ingredient.objects.create(ingredient_name="Chopped Onion")
+        self.onion = Ingredient.objects.create(ingredient_name="Onion")
+        self.flour = Ingredient.objects.create(ingredient_name="Flour")
+
+        self.salad = create_recipe(self.user, "Tomato Salad", [(self.tomato, "2"), (self.basil, "1")])
+        self.soup = create_recipe(self.user, "Onion Soup", [(self.chopped_onion, "3")])
+        self.bread = create_recipe(self.user, "Bread", [(self.flour, "2")])
+
+        UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="5",
+                                     quantity=5, unit="pieces")
+        UserInventory.objects.create(user=self.user, ingredient=self.onion, quantity_display="1",
+                                     quantity=1, unit="pieces")
+
+    def get_suggestions(self):
+        response = self.client.get("/api/recipes/recipes/suggest/")
+        self.assertEqual(response.status_code, 200)
+        return {s["recipe"]["recipe_name"]: s for s in response.data["suggested_recipes"]}
+
+    def test_only_recipes_sharing_an_ingredient_are_suggested(self):
+        """Test that recipes with no pantry ingredient are not suggested"""
+        suggestions = self.get_suggestions()
+        self.assertIn("Tomato Salad", suggestions)
+        self.assertIn("Onion Soup", suggestions)
+        self.assertNotIn("Bread", suggestions)
+
+    def test_missing_ingredients(self):
+        """Test the can_make and missing_ingredients shape"""
+        suggestions = self.get_suggestions()
+        salad = suggestions["Tomato Salad"]
+        self.assertFalse(salad["can_make"])
+        self.assertEqual(salad["missing_ingredients"], [
+            {"ingredient_name": "Basil", "required_quantity": 1.0, "unit": "pieces"}
+        ])
+
+        # Prep words are ignored, but only one onion is available
+        soup = suggestions["Onion Soup"]
+        self.assertFalse(soup["can_make"])
+        self.assertEqual(soup["missing_ingredients"][0]["available_quantity"], 1.0)
+
+    def test_can_make(self):
+        """Test that a fully stocked recipe can be made and is listed first"""
+        UserInventory.objects.create(user=self.user, ingredient=self.basil, quantity_display="1",
+                                     quantity=1, unit="pieces")
+        response = self.client.get("/api/recipes/recipes/suggest/")
+        first = response.data["suggested_recipes"][0]
+        self.assertEqual(first["recipe"]["recipe_name"], "Tomato Salad")
+        self.assertTrue(first["can_make"])
+        self.assertEqual(first["missing_ingredients"], [])
+
+    def test_ranking_and_limit(self):
+        """Test that ?limit= pages through suggestions ranked by missing count, then expiry"""
+        create_recipe(self.user, "Tomato Toast", [(self.tomato, "1"), (self.flour, "1")])
+        create_recipe(self.user, "Fried Onion", [(self.onion, "1"), (self.flour, "1")])
+        onion = UserInventory.objects.get(ingredient=self.onion)
+        onion.expires_at = date(2026, 1, 1)
+        onion.save()
+        UserInventory.objects.create(user=self.user, ingredient=self.basil, quantity_display="1",
+                                     quantity=1, unit="pieces")
+
+        names, cursor = [], None
+        while True:
+            params = {"limit": 1}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/recipes/recipes/suggest/", params)
+            self.assertEqual(len(response.data["suggested_recipes"]), 1)
+            names.append(response.data["suggested_recipes"][0]["recipe"]["recipe_name"])
+            cursor = response.data["next_cursor"]
+            if not cursor:
+                break
+        # The expiring onion breaks the tie between the two recipes missing flour
+        self.assertEqual(names, ["Tomato Salad", "Fried Onion", "Tomato Toast", "Onion Soup"])
+
+    def test_cache_invalidated_by_inventory(self):
+        """Test that a cached result is replaced once the inventory changes"""
+        self.assertFalse(self.get_suggestions()["Tomato Salad"]["can_make"])
+        UserInventory.objects.create(user=self.user, ingredient=self.basil, quantity_display="1",
+                                     quantity=1, unit="pieces")
+        self.assertTrue(self.get_suggestions()["Tomato Salad"]["can_make"])
+
+    def test_cache_invalidated_by_recipe_change(self):
+        """Test that a cached result is replaced once a recipe's ingredients change"""
+        self.assertFalse(self.get_suggestions()["Tomato Salad"]["can_make"])
+        RecipeIngredient.objects.filter(recipe=self.salad, ingredient=self.basil).delete()
+        self.assertTrue(self.get_suggestions()["Tomato Salad"]["can_make"])
+
+    def test_new_recipe_is_indexed(self):
+        """Test that recipes added after the index was built are suggested"""
+        self.get_suggestions()
+        create_recipe(self.user, "Roast Tomato", [(self.tomato, "1")])
+        suggestions = self.get_suggestions()
+        self.assertTrue(suggestions["Roast Tomato"]["can_make"])
+
+    @override_settings(COVERAGE_REFRESH_BUFFERED=True)
+    def test_recipe_change_rescored_in_background(self):
+        """Test that a recipe save leaves rescoring to the refresher, which then drops stale cached results"""
+        refresher = ManualRefresher()
+        with mock.patch("recipes.signals.coverage_refresher", refresher):
+            self.get_suggestions()
+            create_recipe(self.user, "Roast Tomato", [(self.tomato, "1")])
+            self.assertNotIn("Roast Tomato", self.get_suggestions())
+            self.assertTrue(refresher.refresh())
+            self.assertTrue(self.get_suggestions()["Roast Tomato"]["can_make"])
+            self.assertFalse(refresher.refresh())
+
+    @override_settings(COVERAGE_REFRESH_BUFFERED=True)
+    def test_pending_change_survives_restart(self):
+        """Test that a change the refresher did not get to is rescored by the next one"""
+        with mock.patch("recipes.signals.coverage_refresher", ManualRefresher()):
+            self.get_suggestions()
+            create_recipe(self.user, "Roast Tomato", [(self.tomato, "1")])
+        # A new process finds the change in the database
+        self.assertTrue(ManualRefresher().refresh())
+        self.assertTrue(self.get_suggestions()["Roast Tomato"]["can_make"])
+
+    def test_units_are_converted(self):
+        """Test that quantities are compared across units, and volume against mass only with a density"""
+        flour = UserInventory.objects.create(user=self.user, ingredient=self.flour, quantity_display="200",
+                                             quantity=200, unit="grams")
+        flour_cups = RecipeIngredient.objects.get(recipe=self.bread)
+        flour_cups.unit = "cups"
+        flour_cups.save()
+        self.assertIn("Bread", self.get_suggestions())
+        self.assertFalse(self.get_suggestions()["Bread"]["can_make"])
+
+        # 2 cups at 0.4 g/ml is about 189 g
+        self.flour.density = 0.4
+        self.flour.save()
+        self.assertTrue(self.get_suggestions()["Bread"]["can_make"])
+
+        flour.unit = "kg"
+        flour.quantity = 1
+        flour.save()
+        self.assertTrue(self.get_suggestions()["Bread"]["can_make"])
+
+    def test_coverage_maintained_incrementally(self):
+        """Test that inventory writes update the stored coverage rows of a built user"""
+        self.get_suggestions()
+        self.assertFalse(PantryCoverage.objects.filter(user=self.user, recipe=self.bread).exists())
+        UserInventory.objects.create(user=self.user, ingredient=self.flour, quantity_display="2",
+                                     quantity=2, unit="pieces")
+        row = PantryCoverage.objects.get(user=self.user, recipe=self.bread)
+        self.assertTrue(row.can_make)
+        self.assertEqual(row.coverage, 1.0)
+
+        UserInventory.objects.filter(user=self.user, ingredient=self.flour).delete()
+        self.assertFalse(PantryCoverage.objects.filter(user=self.user, recipe=self.bread).exists())
+
+    def test_moved_inventory_row_rescores_both_ingredients(self):
+        """Test that changing an inventory row's ingredient updates the recipes of the old one too"""
+        flour = UserInventory.objects.create(user=self.user, ingredient=self.flour, quantity_display="2",
+                                             quantity=2, unit="pieces")
+        self.get_suggestions()
+        self.assertTrue(PantryCoverage.objects.filter(user=self.user, recipe=self.bread).exists())
+
+        item = UserInventory.objects.get(id=flour.id)
+        item.ingredient = self.basil
+        item.save()
+        self.assertFalse(PantryCoverage.objects.filter(user=self.user, recipe=self.bread).exists())
+        self.assertTrue(PantryCoverage.objects.get(user=self.user, recipe=self.salad).can_make)
+
+
+@skipIf(np is None, "numpy and scipy are not installed")
+@override_settings(SUGGESTION_BACKEND="matrix")
+class MatrixSuggestRecipesViewTest(SuggestRecipesViewTest):
+    """Run the same checks against the sparse matrix backend"""
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem, SyncTombstone
+from recipes.sync import encode_sync_token
+
+URL = "/api/recipes/sync/"
+
+class SyncViewTest(TestCase):
+    def setUp(self):
+        """Set up a user with one row of every synced kind"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.tomato = Ingredient.objects.create(ingredient_name="Tomato")
+        self.recipe = Recipe.objects.create(user=self.user, recipe_name="Tomato Salad",
+                                            description="Test description", instructions="Test instructions")
+        self.saved = SavedItem.objects.create(user=self.user, recipe=self.recipe)
+        self.plan = WeeklyPlan.objects.create(user=self.user, recipe=self.recipe, day="Monday", meal_type="Lunch")
+        self.pantry = UserInventory.objects.create(user=self.user, ingredient=self.tomato, quantity_display="2",
+                                                   quantity=2, unit="pieces")
+        self.item = ShoppingListItem.objects.create(user=self.user, ingredient=self.tomato, quantity=1, unit="pieces")
+
+    def token(self, offset):
+        return encode_sync_token(timezone.now() + offset)
+
+    def test_full_sync(self):
+        """Test that a sync without a token returns every row and a token"""
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["full"])
+        self.assertTrue(response.data["token"])
+        for key in ("recipes", "saved_items", "weekly_plan", "inventory", "shopping_list"):
+            self.assertEqual(len(response.data[key]), 1)
+
+    def test_nothing_changed(self):
+        """Test that a token newer than every change returns no rows"""
+        response = self.client.get(URL, {"since": self.token(timedelta(seconds=10))})
+        self.assertFalse(response.data["full"])
+        for key in ("recipes", "saved_items", "weekly_plan", "inventory", "shopping_list"):
+            self.assertEqual(response.data[key], [])
+            self.assertEqual(response.data["deleted"][key], [])
+
+    def test_changes_and_deletes(self):
+        """Test that changed rows come back and deleted rows come back as ids"""
+        token = self.token(timedelta(seconds=-10))
+        self.pantry.quantity = 5
+        self.pantry.save()
+        item_id = self.item.id
+        self.item.delete()
+
+        response = self.client.get(URL, {"since": token})
+        self.assertEqual([row["id"] for row in response.data["inventory"]], [self.pantry.id])
+        self.assertEqual(response.data["deleted"]["shopping_list"], [item_id])
+
+    def test_deleted_recipe_cascades(self):
+        """Test that deleting a recipe reports it and the rows that pointed at it as deleted"""
+        token = self.token(timedelta(seconds=-10))
+        recipe_id, saved_id, plan_id = self.recipe.id, self.saved.id, self.plan.id
+        self.recipe.delete()
+
+        # Recipe deletes reach every user, not only the author
+        other = User.objects.create_user(username="other_user", password="dbbytes_basil")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(URL, {"since": token}).data["deleted"]["recipes"], [recipe_id])
+
+        self.client.force_authenticate(user=self.user)
+        deleted = self.client.get(URL, {"since": token}).data["deleted"]
+        self.assertEqual(deleted["saved_items"], [saved_id])
+        self.assertEqual(deleted["weekly_plan"], [plan_id])
+
+    def test_expired_token(self):
+        """Test that a token older than the tombstone retention gets a full sync"""
+        response = self.client.get(URL, {"since": self.token(timedelta(days=-365))})
+        self.assertTrue(response.data["full"])
+        self.assertEqual(len(response.data["recipes"]), 1)
+
+    def test_invalid_token(self):
+        """Test that a malformed token is rejected"""
+        response = self.client.get(URL, {"since": "not-a-token"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_delete_leaves_no_tombstones(self):
+        """Test that deleting a user does not write tombstones for rows only they could see"""
+        self.user.delete()
+        self.assertEqual(list(SyncTombstone.objects.values_list('kind', flat=True)), [SyncTombstone.RECIPE])
+
+    def test_fixed_query_count(self):
+        """Test that a delta sync costs the same queries however many rows changed"""
+        token = self.token(timedelta(seconds=-10))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(URL, {"since": token})
+        few = len(queries)
+        for day in ("Tuesday", "Wednesday", "Thursday"):
+            WeeklyPlan.objects.create(user=self.user, recipe=self.recipe, day=day, meal_type="Dinner")
+            ShoppingListItem.objects.create(user=self.user, ingredient=self.tomato, quantity=1, unit="pieces").delete()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(URL, {"since": token})
+        self.assertEqual(len(response.data["weekly_plan"]), 4)
+        self.assertEqual(len(queries), few)
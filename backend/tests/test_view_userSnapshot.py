@@ -0,0 +1,57 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from recipes.models import Recipe, Ingredient, SavedItem, WeeklyPlan, UserInventory, ShoppingListItem
+
+URL = "/api/recipes/me/snapshot/"
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+class UserSnapshotViewTest(TestCase):
+    def setUp(self):
+        """Set up a user with a pantry, a shopping list, a plan and a saved recipe"""
+        self.user = User.objects.create_user(username="capstone_user", password="dbbytes_basil")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.count = 0
+        self.add_rows()
+
+    def add_rows(self):
+        self.count += 1
+        ingredient = Ingredient.objects.create(ingredient_name=f"Spice {self.count}")
+        recipe = Recipe.objects.create(user=self.user, recipe_name=f"Recipe {self.count}",
+                                       description="Test description", instructions="Test instructions")
+        SavedItem.objects.create(user=self.user, recipe=recipe)
+        WeeklyPlan.objects.create(user=self.user, recipe=recipe, day=DAYS[self.count % 7], meal_type="Dinner")
+        UserInventory.objects.create(user=self.user, ingredient=ingredient, quantity_display="1",
+                                     quantity=1, unit="pinch")
+        ShoppingListItem.objects.create(user=self.user, ingredient=ingredient, quantity=1, unit="pinch")
+
+    def test_matches_separate_endpoints(self):
+        """Test that every section holds what its own endpoint returns"""
+        snapshot = self.client.get(URL).data
+        self.assertEqual(snapshot["user_info"], self.client.get("/api/recipes/user-info/").data)
+        self.assertEqual(snapshot["inventory"], self.client.get("/api/recipes/inventory/").data)
+        self.assertEqual(snapshot["shopping_list"], self.client.get("/api/recipes/shopping-list/").data)
+        self.assertEqual(snapshot["weekly_plan"], self.client.get("/api/recipes/weekly-plan/").data)
+        self.assertEqual(snapshot["saved_recipes"], self.client.get("/api/recipes/saved-recipes/").data)
+
+    def test_include(self):
+        """Test that ?include= returns only the named sections and rejects unknown ones"""
+        response = self.client.get(URL, {"include": "inventory,shopping_list"})
+        self.assertEqual(set(response.data), {"inventory", "shopping_list"})
+        response = self.client.get(URL, {"include": "inventory,recipes"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_fixed_query_count(self):
+        """Test that the snapshot costs one query per list section however many rows there are"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(URL)
+        self.assertEqual(len(queries), 4)
+        for _ in range(5):
+            self.add_rows()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(URL)
+        self.assertEqual(len(response.data["inventory"]), 6)
+        self.assertEqual(len(queries), 4)
@@ -453,4 +453,30 @@ export const addMissingIngredientsToShoppingList = async (recipeId) => {
     }
 };
 
+// Fetch what changed since the last sync from /sync/; pass the token it returned last time, or null for everything
+export const syncChanges = async (token) => {
+    console.log('Executing syncChanges');
+    try {
+        const response = await api.get('/sync/', { params: token ? { since: token } : {} });
+        console.log('syncChanges - Response:', response.status, response.data.full);
+        return response.data;
+    } catch (error) {
+        console.error('syncChanges - Error:', error.message);
+        throw error;
+    }
+};
+
+// Fetch the dashboard data in one request from /me/snapshot/; sections is an optional list such as ['inventory', 'shopping_list']
+export const getSnapshot = async (sections) => {
+    console.log('Executing getSnapshot');
+    try {
+        const response = await api.get('/me/snapshot/', { params: sections ? { include: sections.join(',') } : {} });
+        console.log('getSnapshot - Response:', response.status);
+        return response.data;
+    } catch (error) {
+        console.error('getSnapshot - Error:', error.message);
+        throw error;
+    }
+};
+
 export default api;
\ No newline at end of file